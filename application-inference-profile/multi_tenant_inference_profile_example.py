@@ -7,13 +7,29 @@ Author: Navule Pavan Kumar Rao
 Date: November 20, 2025
 """
 
-import boto3
 import json
+import os
+import sys
+import tempfile
+import time
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "global-cris", "foundation_models"))
+from clients import get_client
+from profile_registry import ProfileRegistry, profile_name_for
+from tenant_scheduler import TenantScheduler, converse_cost
+from tenant_teardown import delete_profiles
+from usage_ledger import UsageLedger
+
 # Initialize Bedrock clients for India region (Mumbai)
-bedrock = boto3.client('bedrock', region_name='ap-south-1')
-bedrock_runtime = boto3.client('bedrock-runtime', region_name='ap-south-1')
+bedrock = get_client("bedrock", region="ap-south-1")
+bedrock_runtime = get_client("bedrock-runtime", region="ap-south-1")
+
+# Cached name -> ARN / tenant -> ARN index of application inference profiles
+registry = ProfileRegistry(bedrock)
+
+# Append-only usage log used for per-tenant chargeback (a fresh directory per run)
+ledger = UsageLedger(tempfile.mkdtemp(prefix="bedrock_tenant_usage-"))
 
 # Base Global CRIS model ARN
 base_model_arn = "arn:aws:bedrock:ap-south-1::inference-profile/global.anthropic.claude-sonnet-4-5-20250929-v1:0"
@@ -23,7 +39,7 @@ print("=" * 70)
 
 def create_tenant_inference_profile(tenant_id, tenant_name):
     """Create a dedicated application inference profile for a tenant"""
-    profile_name = f"tenant_{tenant_id}_profile"
+    profile_name = profile_name_for(tenant_id)
     
     print(f"\n📝 Creating application inference profile for {tenant_name} (ID: {tenant_id})...")
     
@@ -43,6 +59,7 @@ def create_tenant_inference_profile(tenant_id, tenant_name):
         )
         
         profile_arn = response['inferenceProfileArn']
+        registry.add(profile_name, profile_arn)
         print(f"   ✅ Application inference profile created: {profile_arn}")
         print(f"   📊 Status: {response['status']}")
         return profile_arn
@@ -50,19 +67,19 @@ def create_tenant_inference_profile(tenant_id, tenant_name):
     except ClientError as e:
         if e.response['Error']['Code'] == 'ResourceInUseException':
             print(f"   ⚠️  Application inference profile already exists, retrieving existing profile...")
-            # List and find existing profile
-            list_response = bedrock.list_inference_profiles()
-            for profile in list_response.get('inferenceProfileSummaries', []):
-                if profile['inferenceProfileName'] == profile_name:
-                    print(f"   ✅ Found existing application inference profile: {profile['inferenceProfileArn']}")
-                    return profile['inferenceProfileArn']
+            # Look up the existing profile in the (fully paginated) registry
+            profile_arn = registry.get_by_name(profile_name, refresh_on_miss=True)
+            if profile_arn:
+                print(f"   ✅ Found existing application inference profile: {profile_arn}")
+                return profile_arn
         raise
 
-def invoke_model_for_tenant(tenant_profile_arn, tenant_name, user_message):
+def invoke_model_for_tenant(tenant_profile_arn, tenant_name, user_message, tenant_id=None):
     """Invoke model with tenant-specific application inference profile for usage tracking"""
     print(f"\n💬 Invoking model for {tenant_name}...")
     print(f"   Query: {user_message}")
     
+    start = time.perf_counter()
     response = bedrock_runtime.converse(
         modelId=tenant_profile_arn,  # Tenant-specific profile
         messages=[{
@@ -75,7 +92,17 @@ def invoke_model_for_tenant(tenant_profile_arn, tenant_name, user_message):
         }
     )
     
-    # Usage is automatically tracked per tenant
+    # Usage is automatically tracked per tenant, and recorded in the ledger for chargeback
+    ledger.record(
+        tenant_id or tenant_name,
+        tenant_profile_arn,
+        base_model_arn,
+        response['usage']['inputTokens'],
+        response['usage']['outputTokens'],
+        response['usage'].get('cacheReadInputTokens', 0),
+        response['usage'].get('cacheWriteInputTokens', 0),
+        (time.perf_counter() - start) * 1000,
+    )
     response_text = response['output']['message']['content'][0]['text']
     usage = response['usage']
     
@@ -92,16 +119,13 @@ def invoke_model_for_tenant(tenant_profile_arn, tenant_name, user_message):
         'output_tokens': usage['outputTokens']
     }
 
-def cleanup_tenant_profile(tenant_profile_arn, tenant_name):
-    """Delete tenant application inference profile"""
-    print(f"\n🧹 Cleaning up application inference profile for {tenant_name}...")
-    try:
-        bedrock.delete_inference_profile(
-            inferenceProfileIdentifier=tenant_profile_arn
-        )
-        print(f"   ✅ Application inference profile deleted successfully")
-    except Exception as e:
-        print(f"   ⚠️  Error deleting application inference profile: {e}")
+def cleanup_tenant_profiles(tenant_profile_arns):
+    """Delete tenant application inference profiles concurrently"""
+    print(f"\n🧹 Cleaning up {len(tenant_profile_arns)} application inference profiles...")
+    summary = delete_profiles(bedrock, tenant_profile_arns, registry=registry)
+    print(f"   ✅ Deleted: {summary['deleted']}, already gone: {summary['not_found']}, failed: {summary['failed']}")
+    for arn, error in summary['errors'].items():
+        print(f"   ⚠️  Error deleting {arn}: {error}")
 
 # Main execution
 try:
@@ -112,7 +136,7 @@ try:
     ]
     
     tenant_profiles = {}
-    tenant_usage = {}
+    run_started = time.time()
     
     # Step 1: Create application inference profiles for each tenant
     print("\n" + "=" * 70)
@@ -128,56 +152,59 @@ try:
     print("STEP 2: Processing Tenant Requests (Usage Tracked Separately)")
     print("=" * 70)
     
-    # Tenant A makes a request
-    result_a = invoke_model_for_tenant(
-        tenant_profiles["tenant-001"],
-        "Acme Corp",
-        "What are the benefits of cloud computing?"
-    )
-    tenant_usage["tenant-001"] = result_a
-    
-    # Tenant B makes a request
-    result_b = invoke_model_for_tenant(
-        tenant_profiles["tenant-002"],
-        "TechStart Inc",
-        "Explain machine learning in simple terms."
-    )
-    tenant_usage["tenant-002"] = result_b
+    tenant_requests = [
+        ("tenant-001", "Acme Corp", "What are the benefits of cloud computing?"),
+        ("tenant-002", "TechStart Inc", "Explain machine learning in simple terms."),
+        ("tenant-001", "Acme Corp", "How does serverless architecture work?"),
+    ]
     
-    # Tenant A makes another request
-    result_a2 = invoke_model_for_tenant(
-        tenant_profiles["tenant-001"],
-        "Acme Corp",
-        "How does serverless architecture work?"
-    )
-    # Accumulate usage for Tenant A
-    tenant_usage["tenant-001"]["tokens"] += result_a2["tokens"]
-    tenant_usage["tenant-001"]["input_tokens"] += result_a2["input_tokens"]
-    tenant_usage["tenant-001"]["output_tokens"] += result_a2["output_tokens"]
+    # Tenants share the Global CRIS quota, so their calls go through the fair-queuing scheduler
+    with TenantScheduler(concurrency=2) as scheduler:
+        for tenant in tenants:
+            scheduler.configure_tenant(tenant["id"], weight=1.0)
+        futures = [
+            scheduler.submit(
+                tenant_id,
+                invoke_model_for_tenant,
+                tenant_profiles[tenant_id],
+                tenant_name,
+                user_message,
+                tenant_id,  # positional: submit() takes tenant_id itself
+                cost=converse_cost([{"role": "user", "content": [{"text": user_message}]}], max_tokens=150),
+            )
+            for tenant_id, tenant_name, user_message in tenant_requests
+        ]
+        for future in futures:
+            future.result()
     
     # Step 3: Display usage summary per tenant
     print("\n" + "=" * 70)
     print("STEP 3: Tenant Usage Summary (For Billing/Chargeback)")
     print("=" * 70)
     
+    # Aggregate this run's calls from the usage ledger
+    tenant_usage = {row["tenant"]: row for row in ledger.aggregate("tenant", start=run_started)}
+    
     for tenant in tenants:
         tenant_id = tenant["id"]
         tenant_name = tenant["name"]
         usage = tenant_usage[tenant_id]
         
         print(f"\n📊 {tenant_name} ({tenant_id}):")
+        print(f"   Calls: {usage['calls']}")
         print(f"   Total Input Tokens: {usage['input_tokens']}")
         print(f"   Total Output Tokens: {usage['output_tokens']}")
-        print(f"   Total Tokens: {usage['tokens']}")
+        print(f"   Total Tokens: {usage['total_tokens']}")
         print(f"   Profile ARN: {tenant_profiles[tenant_id]}")
+    ledger.close()
+    print(f"\n📁 Usage ledger: {ledger.directory}")
     
     # Step 4: Cleanup (commented out for now)
     print("\n" + "=" * 70)
     print("STEP 4: Cleanup")
     print("=" * 70)
     
-    for tenant in tenants:
-        cleanup_tenant_profile(tenant_profiles[tenant["id"]], tenant["name"])
+    cleanup_tenant_profiles(list(tenant_profiles.values()))
     
     # Summary
     print("\n" + "=" * 70)
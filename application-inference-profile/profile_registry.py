@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Cached registry of application inference profiles.
+
+Listing every application inference profile takes one
+list_inference_profiles(typeEquals="APPLICATION") call per page of up to
+1,000 profiles. The registry pages through all of them once and indexes
+them by profile name and tenant ID (parsed from the
+`tenant_<tenant_id>_profile` naming convention, so no per-profile tag
+lookups are needed). The index is kept in memory and in a JSON file on disk,
+and is refreshed when older than its TTL, so cold starts of other processes
+usually make no control-plane calls at all.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "global-cris", "foundation_models"))
+from clients import get_client
+
+DEFAULT_TTL = 300
+# One cache file per region ({region} is filled in from the client)
+DEFAULT_CACHE_PATH = os.path.join(tempfile.gettempdir(), "bedrock_application_profiles_{region}.json")
+
+# Profile name used by the multi-tenant example for each tenant
+PROFILE_NAME_TEMPLATE = "tenant_{tenant_id}_profile"
+_PROFILE_NAME_PATTERN = re.compile(r"^tenant_(?P<tenant_id>.+)_profile$")
+
+
+def profile_name_for(tenant_id: str) -> str:
+    """Application inference profile name for a tenant."""
+    return PROFILE_NAME_TEMPLATE.format(tenant_id=tenant_id)
+
+
+def tenant_id_from_name(profile_name: str) -> str | None:
+    """Tenant ID encoded in a profile name, or None for other profiles."""
+    match = _PROFILE_NAME_PATTERN.match(profile_name)
+    return match.group("tenant_id") if match else None
+
+
+def list_application_profiles(bedrock) -> list:
+    """
+    List every application inference profile, following all pages.
+
+    Returns:
+        inferenceProfileSummaries from all pages
+    """
+    paginator = bedrock.get_paginator("list_inference_profiles")
+    profiles = []
+    for page in paginator.paginate(typeEquals="APPLICATION", PaginationConfig={"PageSize": 1000}):
+        profiles.extend(page.get("inferenceProfileSummaries", []))
+    return profiles
+
+
+class ProfileRegistry:
+    """Name -> ARN and tenant ID -> ARN index with memory and disk caching."""
+
+    def __init__(self, bedrock=None, cache_path: str | None = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            bedrock: Bedrock control-plane client, defaults to the shared client
+            cache_path: JSON file shared between processes, None for memory only
+            ttl: Seconds before the index is listed again
+        """
+        self.bedrock = bedrock or get_client("bedrock")
+        self.cache_path = cache_path.format(region=self.bedrock.meta.region_name) if cache_path else None
+        self.ttl = ttl
+        self._by_name = {}
+        self._by_tenant = {}
+        self._fetched_at = 0.0
+        self._lock = threading.RLock()
+        self.stats = {"refreshes": 0, "profiles_listed": 0, "disk_loads": 0}
+
+    @property
+    def age(self) -> float:
+        return time.time() - self._fetched_at
+
+    def _index(self, profiles: dict, fetched_at: float) -> None:
+        self._by_name = dict(profiles)
+        self._by_tenant = {}
+        for name, arn in self._by_name.items():
+            tenant_id = tenant_id_from_name(name)
+            if tenant_id is not None:
+                self._by_tenant[tenant_id] = arn
+        self._fetched_at = fetched_at
+
+    def _load_disk(self) -> bool:
+        """Load the disk cache if it is fresh (caller holds the lock)."""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if time.time() - cached.get("fetched_at", 0) > self.ttl:
+            return False
+        self._index(cached["profiles"], cached["fetched_at"])
+        self.stats["disk_loads"] += 1
+        return True
+
+    def _save_disk(self) -> None:
+        """Write the index atomically so concurrent readers never see a partial file."""
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"fetched_at": self._fetched_at, "profiles": self._by_name}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def refresh(self) -> None:
+        """List all application inference profiles and rebuild the index."""
+        with self._lock:
+            profiles = list_application_profiles(self.bedrock)
+            self._index({p["inferenceProfileName"]: p["inferenceProfileArn"] for p in profiles}, time.time())
+            self.stats["refreshes"] += 1
+            self.stats["profiles_listed"] += len(profiles)
+            self._save_disk()
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            if self.age <= self.ttl:
+                return
+            if not self._load_disk():
+                self.refresh()
+
+    def _lookup(self, index_name: str, key: str, refresh_on_miss: bool) -> str | None:
+        self._ensure_fresh()
+        with self._lock:
+            arn = getattr(self, index_name).get(key)
+            # The profile may have been created since the index was built
+            if arn is None and refresh_on_miss:
+                self.refresh()
+                arn = getattr(self, index_name).get(key)
+            return arn
+
+    def get_by_name(self, profile_name: str, refresh_on_miss: bool = False) -> str | None:
+        """ARN of the profile with this name, or None."""
+        return self._lookup("_by_name", profile_name, refresh_on_miss)
+
+    def get_by_tenant(self, tenant_id: str, refresh_on_miss: bool = False) -> str | None:
+        """ARN of the tenant's profile, or None."""
+        return self._lookup("_by_tenant", tenant_id, refresh_on_miss)
+
+    def add(self, profile_name: str, profile_arn: str, persist: bool = True) -> None:
+        """
+        Record a newly created profile without listing again.
+
+        Bulk callers pass persist=False and call save() once at the end.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            self._by_name[profile_name] = profile_arn
+            tenant_id = tenant_id_from_name(profile_name)
+            if tenant_id is not None:
+                self._by_tenant[tenant_id] = profile_arn
+            if persist:
+                self._save_disk()
+
+    def save(self) -> None:
+        """Write the current index to the disk cache (a no-op before the index was ever loaded)."""
+        with self._lock:
+            if self._fetched_at:
+                self._save_disk()
+
+    def remove(self, profile_arn: str, persist: bool = True) -> None:
+        """Forget a deleted profile."""
+        self._ensure_fresh()
+        with self._lock:
+            self._by_name = {name: arn for name, arn in self._by_name.items() if arn != profile_arn}
+            self._by_tenant = {tenant: arn for tenant, arn in self._by_tenant.items() if arn != profile_arn}
+            if persist:
+                self._save_disk()
+
+    def tenants(self) -> dict:
+        """Snapshot of the tenant ID -> ARN index."""
+        self._ensure_fresh()
+        with self._lock:
+            return dict(self._by_tenant)
+
+    def __len__(self) -> int:
+        self._ensure_fresh()
+        return len(self._by_name)
+
+
+if __name__ == "__main__":
+    try:
+        registry = ProfileRegistry()
+        start = time.perf_counter()
+        print(f"🔎 Application inference profiles: {len(registry)}")
+        print(f"   Tenants: {len(registry.tenants())}")
+        print(f"   Loaded in {1000 * (time.perf_counter() - start):.0f} ms, stats: {registry.stats}")
+        for tenant_id, arn in sorted(registry.tenants().items())[:10]:
+            print(f"   {tenant_id}: {arn}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Bulk tenant onboarding with application inference profiles.
+
+Reads tenants from a CSV (columns `id`/`tenant_id` and `name`/`tenant_name`)
+or JSONL file and creates one application inference profile per tenant,
+concurrently. Control-plane calls go through the adaptive RateLimiter, so
+CreateInferenceProfile stays under a transactions-per-second budget and the
+concurrency backs off when throttled. Tenants that already have a profile in
+the ProfileRegistry are skipped without any call.
+
+Every tenant ends up in a JSONL manifest:
+
+    {"tenant_id": "tenant-001", "tenant_name": "Acme Corp",
+     "profile_arn": "arn:aws:bedrock:...", "status": "created"}
+
+with status "created", "existing" or "error". Throttling and transient
+network errors (timeouts, dropped connections) are retried; a tenant that
+still fails gets an "error" record and the rest of the batch carries on.
+
+Usage:
+    python tenant_onboarding.py tenants.csv --manifest tenant_manifest.jsonl --tps 5
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "global-cris", "foundation_models"))
+from clients import get_client
+from profile_registry import ProfileRegistry, profile_name_for
+from rate_limiter import ModelQuota, RateLimiter, backoff, is_throttle
+
+# Base Global CRIS model ARN that tenant profiles copy from
+BASE_MODEL_ARN = "arn:aws:bedrock:ap-south-1::inference-profile/global.anthropic.claude-sonnet-4-5-20250929-v1:0"
+
+# Conservative default; raise it to your account's CreateInferenceProfile quota
+DEFAULT_TPS = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 8
+
+_OPERATION = "CreateInferenceProfile"
+
+
+def tenant_tags(tenant_id: str, tenant_name: str) -> list:
+    """Cost-allocation tags attached to every tenant profile."""
+    return [
+        {"key": "tenant_id", "value": tenant_id},
+        {"key": "tenant_name", "value": tenant_name},
+        {"key": "application", "value": "saas-platform"},
+    ]
+
+
+def read_tenants(path: str) -> list:
+    """
+    Read tenants from a CSV or JSONL file.
+
+    Returns:
+        List of {"id": ..., "name": ...} dicts
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    tenants = []
+    for row in rows:
+        tenant_id = row.get("id") or row.get("tenant_id")
+        if not tenant_id:
+            raise ValueError(f"Tenant row without an id: {row}")
+        tenants.append({"id": tenant_id, "name": row.get("name") or row.get("tenant_name") or tenant_id})
+    return tenants
+
+
+def create_tenant_profile(
+    bedrock,
+    tenant: dict,
+    limiter: RateLimiter,
+    registry: ProfileRegistry,
+    base_model_arn: str = BASE_MODEL_ARN,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> dict:
+    """
+    Create one tenant's profile, retrying throttled calls and network errors with backoff.
+
+    A retry after a timeout may find the profile already created by the first
+    attempt; it is then reported as "existing".
+
+    Returns:
+        Manifest record for the tenant
+    """
+    profile_name = profile_name_for(tenant["id"])
+    record = {"tenant_id": tenant["id"], "tenant_name": tenant["name"], "profile_arn": None}
+
+    for attempt in range(max_retries + 1):
+        with limiter.acquire(_OPERATION) as permit:
+            try:
+                response = bedrock.create_inference_profile(
+                    inferenceProfileName=profile_name,
+                    description=f"Inference profile for tenant {tenant['name']}",
+                    modelSource={"copyFrom": base_model_arn},
+                    tags=tenant_tags(tenant["id"], tenant["name"]),
+                )
+            except ClientError as e:
+                code = e.response.get("Error", {}).get("Code")
+                if code == "ResourceInUseException":
+                    record["profile_arn"] = registry.get_by_name(profile_name, refresh_on_miss=True)
+                    record["status"] = "existing" if record["profile_arn"] else "error"
+                    return record
+                if not is_throttle(e) or attempt == max_retries:
+                    return {**record, "status": "error", "error": str(e)}
+                permit.record_throttle()
+            except BotoCoreError as e:
+                permit.failed = True
+                if attempt == max_retries:
+                    return {**record, "status": "error", "error": str(e)}
+            else:
+                registry.add(profile_name, response["inferenceProfileArn"], persist=False)
+                return {**record, "profile_arn": response["inferenceProfileArn"], "status": "created"}
+        backoff(attempt)
+
+
+def onboard_tenants(
+    tenants: list,
+    manifest_path: str,
+    bedrock=None,
+    registry: ProfileRegistry | None = None,
+    base_model_arn: str = BASE_MODEL_ARN,
+    tps: float = DEFAULT_TPS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    on_result=None,
+) -> dict:
+    """
+    Create application inference profiles for many tenants concurrently.
+
+    Args:
+        tenants: List of {"id": ..., "name": ...} dicts
+        manifest_path: JSONL manifest written as tenants complete
+        bedrock: Bedrock control-plane client (botocore retries are disabled
+            by default so throttling is handled here)
+        registry: ProfileRegistry used to skip existing tenants
+        base_model_arn: Inference profile the tenant profiles copy from
+        tps: CreateInferenceProfile calls per second
+        concurrency: Maximum calls in flight
+        on_result: Optional callback receiving each manifest record
+
+    Returns:
+        Counts per status
+    """
+    bedrock = bedrock or get_client("bedrock", max_attempts=1)
+    registry = registry if registry is not None else ProfileRegistry(bedrock)
+    quota = ModelQuota(
+        requests_per_minute=tps * 60,
+        request_burst=max(1.0, tps),
+        initial_concurrency=concurrency,
+        max_concurrency=concurrency,
+    )
+    limiter = RateLimiter({_OPERATION: quota})
+    summary = {"created": 0, "existing": 0, "error": 0}
+    existing = registry.tenants()
+
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+
+        def write(record):
+            summary[record["status"]] += 1
+            manifest.write(json.dumps(record) + "\n")
+            manifest.flush()
+            if on_result:
+                on_result(record)
+
+        pending = []
+        for tenant in tenants:
+            profile_arn = existing.get(tenant["id"])
+            if profile_arn:
+                write({"tenant_id": tenant["id"], "tenant_name": tenant["name"], "profile_arn": profile_arn, "status": "existing"})
+            else:
+                pending.append(tenant)
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="onboarding") as executor:
+                futures = {
+                    executor.submit(create_tenant_profile, bedrock, tenant, limiter, registry, base_model_arn): tenant
+                    for tenant in pending
+                }
+                for future in as_completed(futures):
+                    try:
+                        record = future.result()
+                    except (ClientError, BotoCoreError) as e:
+                        tenant = futures[future]
+                        record = {"tenant_id": tenant["id"], "tenant_name": tenant["name"], "profile_arn": None,
+                                  "status": "error", "error": str(e)}
+                    write(record)
+        finally:
+            # Keep the profiles created so far even if the run is interrupted
+            registry.save()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create application inference profiles for many tenants")
+    parser.add_argument("tenants", help="CSV or JSONL file of tenants (id, name)")
+    parser.add_argument("--manifest", default="tenant_manifest.jsonl", help="Output tenant -> ARN manifest (JSONL)")
+    parser.add_argument("--base-model-arn", default=BASE_MODEL_ARN)
+    parser.add_argument("--tps", type=float, default=DEFAULT_TPS, help="CreateInferenceProfile calls per second")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--region", default=None)
+    args = parser.parse_args()
+
+    bedrock = get_client("bedrock", region=args.region, max_attempts=1)
+    tenants = read_tenants(args.tenants)
+    print(f"🏢 Onboarding {len(tenants)} tenants at up to {args.tps:g} TPS, concurrency {args.concurrency}")
+    summary = onboard_tenants(
+        tenants,
+        args.manifest,
+        bedrock=bedrock,
+        base_model_arn=args.base_model_arn,
+        tps=args.tps,
+        concurrency=args.concurrency,
+    )
+    print(f"✅ Created: {summary['created']}, already existing: {summary['existing']}, errors: {summary['error']}")
+    print(f"📁 Manifest: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
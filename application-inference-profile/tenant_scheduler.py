@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Weighted fair-queuing scheduler for per-tenant Bedrock calls.
+
+All tenant application inference profiles copy from the same Global CRIS
+profile and share its quota, so one tenant running a batch job can starve the
+others. TenantScheduler sits in front of the calls:
+
+- every tenant has its own FIFO queue, a weight and an optional cap on
+  concurrent calls
+- a fixed pool of workers (the shared concurrency budget) always serves the
+  queued call with the smallest virtual finish tag, where
+  finish = max(virtual time, tenant's last finish) + cost / weight
+  (self-clocked fair queuing)
+- cost is measured in tokens: an estimate when the call is queued, corrected
+  with the real usage when it completes, so a tenant sending long prompts
+  gets proportionally fewer calls
+
+A small tenant's call therefore waits behind at most about one call per
+other active tenant, however deep the big tenant's queue is.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import heapq
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "global-cris", "foundation_models"))
+from metrics import percentile
+from rate_limiter import estimate_tokens
+
+DEFAULT_CONCURRENCY = 16
+
+
+def converse_cost(messages: list, max_tokens: int = 1024) -> int:
+    """Estimated token cost of a converse() call (input estimate + max output)."""
+    return estimate_tokens(messages) + max_tokens
+
+
+def usage_cost(result) -> int | None:
+    """Actual token cost from a converse() response or invoke_model_for_tenant() result."""
+    if not isinstance(result, dict):
+        return None
+    if "usage" in result:
+        return result["usage"].get("totalTokens")
+    return result.get("tokens")
+
+
+@dataclass
+class _Job:
+    tenant_id: str
+    func: object
+    args: tuple
+    kwargs: dict
+    cost: float
+    finish: float
+    future: Future
+    queued_at: float = field(default_factory=time.monotonic)
+
+
+class _Tenant:
+    def __init__(self, weight: float, max_concurrency: int | None):
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self.queue = deque()
+        self.in_flight = 0
+        self.last_finish = 0.0
+        self.in_heap = False
+        self.waits = deque(maxlen=1000)
+        self.stats = {"completed": 0, "failed": 0, "tokens": 0}
+
+    def can_run(self) -> bool:
+        return bool(self.queue) and (self.max_concurrency is None or self.in_flight < self.max_concurrency)
+
+
+class TenantScheduler:
+    """Weighted fair queuing across tenants with token-based costs."""
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        default_weight: float = 1.0,
+        default_max_concurrency: int | None = None,
+        cost_of_result=usage_cost,
+    ):
+        """
+        Args:
+            concurrency: Calls in flight across all tenants
+            default_weight: Weight of tenants not configured explicitly
+            default_max_concurrency: Per-tenant cap for unconfigured tenants
+            cost_of_result: Maps a call's result to its actual token cost
+                (None keeps the estimate)
+        """
+        self.default_weight = default_weight
+        self.default_max_concurrency = default_max_concurrency
+        self.cost_of_result = cost_of_result
+        self._tenants = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"tenant-scheduler-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def configure_tenant(self, tenant_id: str, weight: float = 1.0, max_concurrency: int | None = None) -> None:
+        """Set a tenant's weight (share of the budget) and concurrency cap."""
+        with self._cond:
+            tenant = self._tenant(tenant_id)
+            tenant.weight = weight
+            tenant.max_concurrency = max_concurrency
+            self._push(tenant_id, tenant)
+            self._cond.notify_all()
+
+    def _tenant(self, tenant_id: str) -> _Tenant:
+        tenant = self._tenants.get(tenant_id)
+        if tenant is None:
+            tenant = _Tenant(self.default_weight, self.default_max_concurrency)
+            self._tenants[tenant_id] = tenant
+        return tenant
+
+    def _push(self, tenant_id: str, tenant: _Tenant) -> None:
+        """Make the tenant's head job eligible for dispatch (caller holds the lock)."""
+        if not tenant.in_heap and tenant.can_run():
+            tenant.in_heap = True
+            heapq.heappush(self._heap, (tenant.queue[0].finish, next(self._sequence), tenant_id))
+
+    def submit(self, tenant_id: str, func, *args, cost: float = 1.0, **kwargs) -> Future:
+        """
+        Queue a call for a tenant.
+
+        Args:
+            tenant_id: Tenant the call is charged to
+            func: Callable to run, e.g. invoke_model_for_tenant
+            *args: Positional arguments for func
+            cost: Estimated tokens (see converse_cost)
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Future resolving to func's result
+        """
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("TenantScheduler is shut down")
+            tenant = self._tenant(tenant_id)
+            start = max(self._virtual_time, tenant.last_finish)
+            tenant.last_finish = start + cost / tenant.weight
+            tenant.queue.append(_Job(tenant_id, func, args, kwargs, cost, tenant.last_finish, future))
+            self._push(tenant_id, tenant)
+            self._cond.notify()
+        return future
+
+    def _next_job(self) -> _Job | None:
+        """Pop the eligible job with the smallest finish tag (caller holds the lock)."""
+        while self._heap:
+            _, _, tenant_id = heapq.heappop(self._heap)
+            tenant = self._tenants[tenant_id]
+            tenant.in_heap = False
+            if not tenant.can_run():
+                continue
+            job = tenant.queue.popleft()
+            tenant.in_flight += 1
+            self._virtual_time = max(self._virtual_time, job.finish - job.cost / tenant.weight)
+            tenant.waits.append(time.monotonic() - job.queued_at)
+            self._push(tenant_id, tenant)
+            return job
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+
+            if not job.future.set_running_or_notify_cancel():
+                result, error = None, None
+                cancelled = True
+            else:
+                cancelled = False
+                try:
+                    result, error = job.func(*job.args, **job.kwargs), None
+                except BaseException as e:  # noqa: BLE001 - handed to the caller's future
+                    result, error = None, e
+
+            with self._cond:
+                tenant = self._tenants[job.tenant_id]
+                tenant.in_flight -= 1
+                actual = None if error or cancelled else self.cost_of_result(result)
+                if actual is not None:
+                    # Charge the difference to the tenant's future calls
+                    tenant.last_finish += (actual - job.cost) / tenant.weight
+                    tenant.stats["tokens"] += actual
+                tenant.stats["failed" if error else "completed"] += 1
+                self._push(job.tenant_id, tenant)
+                self._cond.notify_all()
+
+            if cancelled:
+                continue
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def snapshot(self) -> dict:
+        """Queue depth, in-flight calls, queue-wait percentiles and counters per tenant."""
+        with self._cond:
+            return {
+                tenant_id: {
+                    "weight": tenant.weight,
+                    "queued": len(tenant.queue),
+                    "in_flight": tenant.in_flight,
+                    "wait_p50_ms": round(1000 * percentile(list(tenant.waits), 50), 1) if tenant.waits else None,
+                    "wait_p99_ms": round(1000 * percentile(list(tenant.waits), 99), 1) if tenant.waits else None,
+                    **tenant.stats,
+                }
+                for tenant_id, tenant in self._tenants.items()
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers after the queued calls have run."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+if __name__ == "__main__":
+    # Simulated calls: latency proportional to tokens, no AWS calls
+    def simulated_call(tokens):
+        time.sleep(tokens / 20000)
+        return {"tokens": tokens}
+
+    print("⚖️  Weighted fair queuing: a batch tenant vs. two interactive tenants")
+    with TenantScheduler(concurrency=8) as scheduler:
+        scheduler.configure_tenant("batch-tenant", weight=1.0, max_concurrency=6)
+        scheduler.configure_tenant("small-tenant-a", weight=1.0)
+        scheduler.configure_tenant("small-tenant-b", weight=2.0)
+
+        futures = [scheduler.submit("batch-tenant", simulated_call, 2000, cost=2000) for _ in range(400)]
+        for _ in range(40):
+            futures.append(scheduler.submit("small-tenant-a", simulated_call, 300, cost=300))
+            futures.append(scheduler.submit("small-tenant-b", simulated_call, 300, cost=300))
+            time.sleep(0.05)
+        for future in futures:
+            future.result()
+
+        for tenant_id, state in scheduler.snapshot().items():
+            print(f"   📊 {tenant_id:<15} completed {state['completed']:>4}, tokens {state['tokens']:>7}, "
+                  f"queue wait p50 {state['wait_p50_ms']:>7} ms, p99 {state['wait_p99_ms']:>7} ms")
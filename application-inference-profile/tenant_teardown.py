@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Parallel teardown of tenant application inference profiles.
+
+Profiles are selected by tag (by default `application=saas-platform`,
+optionally narrowed to specific `tenant_id` values), then deleted
+concurrently. Both the tag lookups and the deletes go through the adaptive
+RateLimiter; throttled calls are retried with jittered backoff, profiles that
+are already gone are counted separately, and every other error (including
+timeouts and connection errors) is reported per profile instead of aborting
+the run.
+
+Usage:
+    # Show what would be deleted
+    python tenant_teardown.py --tag application=saas-platform --dry-run
+
+    # Delete two tenants' profiles
+    python tenant_teardown.py --tenant-id tenant-001 --tenant-id tenant-002
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "global-cris", "foundation_models"))
+from clients import get_client
+from profile_registry import ProfileRegistry, list_application_profiles
+from rate_limiter import ModelQuota, RateLimiter, backoff, is_throttle
+
+DEFAULT_TAGS = {"application": "saas-platform"}
+DEFAULT_TPS = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 8
+
+
+def control_plane_limiter(tps: float = DEFAULT_TPS, concurrency: int = DEFAULT_CONCURRENCY) -> RateLimiter:
+    """RateLimiter applying the same TPS budget and concurrency cap to every operation."""
+    return RateLimiter(
+        default_quota=ModelQuota(
+            requests_per_minute=tps * 60,
+            request_burst=max(1.0, tps),
+            initial_concurrency=concurrency,
+            max_concurrency=concurrency,
+        )
+    )
+
+
+def call_with_retries(limiter: RateLimiter, operation: str, func, max_retries: int = DEFAULT_MAX_RETRIES, **kwargs):
+    """
+    Call a control-plane API through the limiter, retrying throttled calls.
+
+    Raises:
+        ClientError: Non-throttling errors, or throttling after max_retries
+    """
+    for attempt in range(max_retries + 1):
+        with limiter.acquire(operation) as permit:
+            try:
+                return func(**kwargs)
+            except ClientError as e:
+                if not is_throttle(e) or attempt == max_retries:
+                    raise
+                permit.record_throttle()
+        backoff(attempt)
+
+
+def select_profiles(
+    bedrock,
+    limiter: RateLimiter,
+    tags: dict | None = None,
+    tenant_ids=None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> tuple:
+    """
+    Find application inference profiles whose tags match.
+
+    Profiles deleted since they were listed are skipped; a profile whose tags
+    cannot be read is left out and reported instead of failing the selection.
+
+    Args:
+        bedrock: Bedrock control-plane client
+        limiter: RateLimiter for the ListTagsForResource calls
+        tags: Tags that must all match, defaults to application=saas-platform
+        tenant_ids: Optional tenant_id tag values to keep
+        concurrency: Tag lookups in flight
+
+    Returns:
+        (list of {"arn", "name", "tags"} dicts, {arn: error} for failed tag lookups)
+    """
+    tags = DEFAULT_TAGS if tags is None else tags
+    tenant_ids = set(tenant_ids) if tenant_ids else None
+    profiles = list_application_profiles(bedrock)
+
+    def tags_of(profile):
+        try:
+            response = call_with_retries(
+                limiter, "ListTagsForResource", bedrock.list_tags_for_resource, resourceARN=profile["inferenceProfileArn"]
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ResourceNotFoundException":
+                return None, None
+            return None, str(e)
+        except BotoCoreError as e:
+            return None, str(e)
+        return {tag["key"]: tag["value"] for tag in response.get("tags", [])}, None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="teardown-tags") as executor:
+        results = list(executor.map(tags_of, profiles))
+
+    selected = []
+    errors = {}
+    for profile, (profile_tags, error) in zip(profiles, results):
+        if error:
+            errors[profile["inferenceProfileArn"]] = error
+            continue
+        if profile_tags is None:
+            continue
+        if any(profile_tags.get(key) != value for key, value in tags.items()):
+            continue
+        if tenant_ids is not None and profile_tags.get("tenant_id") not in tenant_ids:
+            continue
+        selected.append({"arn": profile["inferenceProfileArn"], "name": profile["inferenceProfileName"], "tags": profile_tags})
+    return selected, errors
+
+
+def delete_profiles(
+    bedrock,
+    arns: list,
+    limiter: RateLimiter | None = None,
+    dry_run: bool = False,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    registry: ProfileRegistry | None = None,
+) -> dict:
+    """
+    Delete application inference profiles concurrently.
+
+    Args:
+        bedrock: Bedrock control-plane client
+        arns: Profile ARNs to delete
+        limiter: RateLimiter for the DeleteInferenceProfile calls
+        dry_run: Only report what would be deleted
+        concurrency: Deletes in flight
+        registry: Optional ProfileRegistry to drop deleted profiles from
+
+    Returns:
+        Summary with counts and per-profile errors
+    """
+    limiter = limiter or control_plane_limiter(concurrency=concurrency)
+    summary = {"selected": len(arns), "deleted": 0, "not_found": 0, "failed": 0, "dry_run": dry_run, "errors": {}}
+    if dry_run:
+        summary["would_delete"] = list(arns)
+        return summary
+
+    def delete(arn):
+        try:
+            call_with_retries(limiter, "DeleteInferenceProfile", bedrock.delete_inference_profile, inferenceProfileIdentifier=arn)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "ResourceNotFoundException":
+                return arn, "not_found", None
+            return arn, "failed", str(e)
+        except BotoCoreError as e:
+            return arn, "failed", str(e)
+        return arn, "deleted", None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="teardown") as executor:
+        for arn, status, error in executor.map(delete, arns):
+            summary[status] += 1
+            if error:
+                summary["errors"][arn] = error
+            elif registry is not None:
+                registry.remove(arn, persist=False)
+    if registry is not None:
+        registry.save()
+    return summary
+
+
+def teardown(
+    bedrock=None,
+    tags: dict | None = None,
+    tenant_ids=None,
+    dry_run: bool = False,
+    tps: float = DEFAULT_TPS,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> dict:
+    """
+    Select profiles by tag and delete them; see select_profiles() and delete_profiles().
+
+    The summary's "lookup_errors" maps profiles whose tags could not be read
+    (and so were neither selected nor deleted) to their error.
+    """
+    bedrock = bedrock or get_client("bedrock", max_attempts=1)
+    limiter = control_plane_limiter(tps, concurrency)
+    selected, lookup_errors = select_profiles(bedrock, limiter, tags, tenant_ids, concurrency)
+    registry = ProfileRegistry(bedrock)
+    summary = delete_profiles(bedrock, [p["arn"] for p in selected], limiter, dry_run, concurrency, registry)
+    summary["lookup_errors"] = lookup_errors
+    return summary
+
+
+def _parse_tag(value: str) -> tuple:
+    key, sep, tag_value = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got {value!r}")
+    return key, tag_value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete tenant application inference profiles selected by tag")
+    parser.add_argument("--tag", type=_parse_tag, action="append", help="key=value tag to match (repeatable)")
+    parser.add_argument("--tenant-id", action="append", help="Only delete these tenants' profiles (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="List the profiles without deleting them")
+    parser.add_argument("--tps", type=float, default=DEFAULT_TPS, help="Control-plane calls per second")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--region", default=None)
+    args = parser.parse_args()
+
+    tags = dict(args.tag) if args.tag else DEFAULT_TAGS
+    bedrock = get_client("bedrock", region=args.region, max_attempts=1)
+    print(f"🧹 Selecting application inference profiles tagged {tags}" + (f" for {args.tenant_id}" if args.tenant_id else ""))
+    summary = teardown(bedrock, tags, args.tenant_id, args.dry_run, args.tps, args.concurrency)
+
+    for arn, error in summary["lookup_errors"].items():
+        print(f"   ⚠️ Could not read tags, skipped {arn}: {error}")
+    if args.dry_run:
+        print(f"🔎 Dry run: {summary['selected']} profiles would be deleted")
+        for arn in summary["would_delete"]:
+            print(f"   {arn}")
+        return
+    print(f"✅ Deleted: {summary['deleted']}, already gone: {summary['not_found']}, failed: {summary['failed']}")
+    for arn, error in summary["errors"].items():
+        print(f"   ❌ {arn}: {error}")
+
+
+if __name__ == "__main__":
+    main()
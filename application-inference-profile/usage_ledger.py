@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Append-only, columnar usage ledger for per-tenant chargeback.
+
+Every model call appends one record (timestamp, tenant, profile ARN, model,
+input / output / cache read / cache write tokens, latency). Records are
+buffered and flushed as immutable segments once `segment_rows` records are
+buffered or the oldest buffered record is `max_age` seconds old, and on
+close() (also run by `with` and at interpreter exit). Each segment is one
+directory with one `.npy` file per column:
+
+    ledger/
+        dictionaries.json          # string -> code tables for tenant, profile, model
+        segment-000000/timestamp.npy, tenant.npy, input_tokens.npy, ...
+        segment-000001/...
+
+String columns are dictionary-encoded as int32 codes, so aggregation is
+pure NumPy (np.unique + np.bincount) over memory-mapped columns and only the
+columns a query needs are read. Segments are written to a temporary
+directory and renamed into place, so readers never see a partial segment.
+
+Arrow IPC / Parquet would give the same layout with an extra dependency;
+plain .npy segments keep the ledger within the NumPy the repo already uses.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# Column name -> dtype; tenant / profile / model hold dictionary codes
+COLUMNS = {
+    "timestamp": np.float64,
+    "tenant": np.int32,
+    "profile": np.int32,
+    "model": np.int32,
+    "input_tokens": np.int64,
+    "output_tokens": np.int64,
+    "cache_read_tokens": np.int64,
+    "cache_write_tokens": np.int64,
+    "latency_ms": np.float32,
+}
+DICTIONARY_COLUMNS = ("tenant", "profile", "model")
+METRIC_COLUMNS = ("input_tokens", "output_tokens", "cache_read_tokens", "cache_write_tokens", "latency_ms")
+
+DEFAULT_SEGMENT_ROWS = 65536
+DEFAULT_MAX_AGE = 60.0
+_SEGMENT_PREFIX = "segment-"
+
+
+class UsageLedger:
+    """
+    Thread-safe append-only usage log with vectorized aggregation.
+
+    One process appends to a ledger directory; any number can read it.
+    """
+
+    def __init__(self, directory: str, segment_rows: int = DEFAULT_SEGMENT_ROWS, max_age: float | None = DEFAULT_MAX_AGE):
+        """
+        Args:
+            directory: Ledger directory (created if missing)
+            segment_rows: Buffered records that trigger a flush
+            max_age: Seconds a record may stay buffered before the next
+                record() flushes it, None to flush on size only
+        """
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.max_age = max_age
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered_since = None  # time.monotonic() of the oldest buffered record
+        self._dictionaries = {name: {} for name in DICTIONARY_COLUMNS}
+        self._values = {name: [] for name in DICTIONARY_COLUMNS}
+
+        path = os.path.join(directory, "dictionaries.json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self._values = json.load(f)
+            self._dictionaries = {
+                name: {value: code for code, value in enumerate(values)} for name, values in self._values.items()
+            }
+        self._next_segment = len(self._segments())
+        atexit.register(self.close)
+
+    def _segments(self) -> list:
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.startswith(_SEGMENT_PREFIX)
+        )
+
+    def _encode(self, column: str, value: str) -> int:
+        codes = self._dictionaries[column]
+        code = codes.get(value)
+        if code is None:
+            code = len(self._values[column])
+            codes[value] = code
+            self._values[column].append(value)
+        return code
+
+    def record(
+        self,
+        tenant_id: str,
+        profile_arn: str,
+        model_id: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        latency_ms: float = 0.0,
+        timestamp: float | None = None,
+    ) -> None:
+        """Append one usage record."""
+        with self._lock:
+            row = (
+                time.time() if timestamp is None else timestamp,
+                self._encode("tenant", tenant_id),
+                self._encode("profile", profile_arn),
+                self._encode("model", model_id),
+                input_tokens,
+                output_tokens,
+                cache_read_tokens,
+                cache_write_tokens,
+                latency_ms,
+            )
+            for name, value in zip(COLUMNS, row):
+                self._buffer[name].append(value)
+            now = time.monotonic()
+            if self._buffered_since is None:
+                self._buffered_since = now
+            if len(self._buffer["timestamp"]) >= self.segment_rows or (
+                self.max_age is not None and now - self._buffered_since >= self.max_age
+            ):
+                self._flush()
+
+    def record_converse(self, tenant_id: str, profile_arn: str, response: dict, model_id: str | None = None) -> None:
+        """Append the usage of a Converse / ConverseStream response."""
+        usage = response.get("usage", {})
+        self.record(
+            tenant_id,
+            profile_arn,
+            model_id or profile_arn,
+            usage.get("inputTokens", 0),
+            usage.get("outputTokens", 0),
+            usage.get("cacheReadInputTokens", 0),
+            usage.get("cacheWriteInputTokens", 0),
+            response.get("metrics", {}).get("latencyMs", 0.0),
+        )
+
+    def flush(self) -> None:
+        """Write buffered records as a new segment."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        """Write a segment (caller holds the lock)."""
+        if not self._buffer["timestamp"]:
+            return
+        # Dictionaries first, so every code in the new segment can be decoded
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._values, f)
+        os.replace(tmp_path, os.path.join(self.directory, "dictionaries.json"))
+
+        tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        for name, dtype in COLUMNS.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(self._buffer[name], dtype=dtype))
+        os.rename(tmp_dir, os.path.join(self.directory, f"{_SEGMENT_PREFIX}{self._next_segment:06d}"))
+        self._next_segment += 1
+        self._buffer = {name: [] for name in COLUMNS}
+        self._buffered_since = None
+
+    def close(self) -> None:
+        """Flush buffered records; runs automatically at exit and when leaving a `with` block."""
+        self.flush()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def columns(self, names, start: float | None = None, end: float | None = None) -> dict:
+        """
+        Read columns across all segments and unflushed records.
+
+        Args:
+            names: Column names to read
+            start: Include records with timestamp >= start
+            end: Include records with timestamp < end
+
+        Returns:
+            {name: NumPy array}
+        """
+        names = list(dict.fromkeys(["timestamp", *names]))
+        parts = {name: [] for name in names}
+        with self._lock:
+            segments = self._segments()
+            buffered = {name: np.asarray(self._buffer[name], dtype=COLUMNS[name]) for name in names}
+        for segment in segments:
+            for name in names:
+                parts[name].append(np.load(os.path.join(segment, f"{name}.npy"), mmap_mode="r"))
+        for name in names:
+            parts[name].append(buffered[name])
+
+        data = {name: np.concatenate(parts[name]) for name in names}
+        if start is not None or end is not None:
+            timestamps = data["timestamp"]
+            mask = np.ones(len(timestamps), dtype=bool)
+            if start is not None:
+                mask &= timestamps >= start
+            if end is not None:
+                mask &= timestamps < end
+            data = {name: values[mask] for name, values in data.items()}
+        return data
+
+    def aggregate(
+        self,
+        by: str | tuple = "tenant",
+        start: float | None = None,
+        end: float | None = None,
+        window: float | None = None,
+    ) -> list:
+        """
+        Sum usage per group, optionally per time window.
+
+        Args:
+            by: "tenant", "profile", "model" or a tuple of them
+            start: Include records with timestamp >= start
+            end: Include records with timestamp < end
+            window: Bucket size in seconds (e.g. 3600 for hourly), None for totals
+
+        Returns:
+            List of dicts with the group values, "window_start" (when
+            window is set), "calls", the token sums and "latency_ms_avg"
+        """
+        keys = (by,) if isinstance(by, str) else tuple(by)
+        data = self.columns([*keys, *METRIC_COLUMNS], start, end)
+        if not len(data["timestamp"]):
+            return []
+
+        group_columns = [data[key].astype(np.int64) for key in keys]
+        if window:
+            buckets = np.floor(data["timestamp"] / window).astype(np.int64)
+            first_bucket = int(buckets.min())
+            group_columns.append(buckets - first_bucket)
+        shape = tuple(int(column.max()) + 1 for column in group_columns)
+        if math.prod(shape) <= np.iinfo(np.int64).max:
+            # One flat int64 key per group, so a 1-D np.unique does the grouping
+            flat_groups, inverse = np.unique(np.ravel_multi_index(group_columns, shape), return_inverse=True)
+            groups = np.stack(np.unravel_index(flat_groups, shape), axis=1)
+        else:
+            # Too many key combinations for one int64 (e.g. long windowed ranges): group whole rows
+            groups, inverse = np.unique(np.stack(group_columns, axis=1), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+        calls = np.bincount(inverse, minlength=len(groups))
+        sums = {name: np.bincount(inverse, weights=data[name], minlength=len(groups)) for name in METRIC_COLUMNS}
+
+        with self._lock:
+            values = {name: list(self._values[name]) for name in keys}
+        rows = []
+        for i, group in enumerate(groups):
+            row = {key: values[key][group[j]] for j, key in enumerate(keys)}
+            if window:
+                row["window_start"] = float((group[-1] + first_bucket) * window)
+            row["calls"] = int(calls[i])
+            for name in METRIC_COLUMNS[:-1]:
+                row[name] = int(sums[name][i])
+            row["total_tokens"] = row["input_tokens"] + row["output_tokens"]
+            row["latency_ms_avg"] = float(sums["latency_ms"][i] / calls[i])
+            rows.append(row)
+        return rows
+
+    def __len__(self) -> int:
+        return len(self.columns([])["timestamp"])
+
+
+if __name__ == "__main__":
+    import random
+
+    tenants = [f"tenant-{i:03d}" for i in range(200)]
+    models = ["global.anthropic.claude-haiku-4-5-20251001-v1:0", "global.anthropic.claude-sonnet-4-5-20250929-v1:0"]
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            ledger = UsageLedger(directory, max_age=None)
+            now = time.time()
+            print("📝 Appending 1,000,000 usage records...")
+            start = time.perf_counter()
+            for i in range(1_000_000):
+                tenant = tenants[int(rng.paretovariate(1.2)) % len(tenants)]
+                ledger.record(
+                    tenant,
+                    f"arn:aws:bedrock:ap-south-1:123456789012:application-inference-profile/{tenant}",
+                    models[i % 2],
+                    rng.randint(50, 4000),
+                    rng.randint(10, 800),
+                    latency_ms=rng.uniform(300, 3000),
+                    timestamp=now - rng.uniform(0, 86400),
+                )
+            ledger.close()
+            print(f"   ✅ {len(ledger)} records in {time.perf_counter() - start:.1f} s")
+
+            start = time.perf_counter()
+            totals = ledger.aggregate("tenant")
+            hourly = ledger.aggregate(("tenant", "model"), start=now - 6 * 3600, window=3600)
+            print(f"📊 Aggregated {len(totals)} tenants and {len(hourly)} tenant/model/hour rows "
+                  f"in {1000 * (time.perf_counter() - start):.0f} ms")
+            for row in sorted(totals, key=lambda r: -r["total_tokens"])[:5]:
+                print(f"   {row['tenant']}: {row['calls']} calls, {row['total_tokens']} tokens, "
+                      f"avg latency {row['latency_ms_avg']:.0f} ms")
+        except Exception as e:
+            print(f"❌ Error: {e}")
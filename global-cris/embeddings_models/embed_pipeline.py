@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Batch embedding pipeline for Cohere Embed v4 with Global CRIS.
+
+Instead of one text per invoke_model call, texts from any iterable are
+grouped into batches of up to 96 (the Cohere Embed v4 `texts` limit) and
+sent concurrently. Results are decoded into contiguous NumPy arrays, either
+in memory or in a memory-mapped `.npy` file for large corpora. Float
+embeddings become float32; int8 / uint8 / binary / ubinary embeddings keep
+their packed 1-byte representation (see packed_embeddings.py).
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "foundation_models"))
+from clients import get_client
+from packed_embeddings import EMBEDDING_DTYPES, embedding_width
+
+# Global CRIS model ID for Cohere Embed v4
+MODEL_ID = "global.cohere.embed-v4:0"
+
+# Maximum number of texts per Cohere Embed v4 request
+MAX_BATCH_SIZE = 96
+DEFAULT_CONCURRENCY = 8
+DEFAULT_OUTPUT_DIMENSION = 1024
+
+
+def batched(iterable, size: int):
+    """Yield lists of up to `size` items from an iterable."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def ordered_map(func, iterable, executor: ThreadPoolExecutor, window: int):
+    """
+    Like executor.map, but keeps at most `window` calls in flight, so the
+    input iterable is consumed lazily.
+
+    Yields:
+        Results in input order
+    """
+    pending = deque()
+    for item in iterable:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+class CohereEmbedder:
+    """Concurrent, batched Cohere Embed v4 client producing NumPy arrays."""
+
+    def __init__(
+        self,
+        client=None,
+        model_id: str = MODEL_ID,
+        input_type: str = "search_document",
+        output_dimension: int = DEFAULT_OUTPUT_DIMENSION,
+        batch_size: int = MAX_BATCH_SIZE,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        embedding_type: str = "float",
+    ):
+        """
+        Args:
+            client: Bedrock runtime client, defaults to the shared client
+            model_id: Cohere Embed v4 model ID
+            input_type: "search_document", "search_query", "classification" or "clustering"
+            output_dimension: 256, 512, 1024 or 1536
+            batch_size: Texts per request (at most 96)
+            concurrency: Requests in flight
+            embedding_type: "float", "int8", "uint8", "binary" or "ubinary"
+        """
+        if not 1 <= batch_size <= MAX_BATCH_SIZE:
+            raise ValueError(f"batch_size must be between 1 and {MAX_BATCH_SIZE}")
+        if embedding_type not in EMBEDDING_DTYPES:
+            raise ValueError(f"embedding_type must be one of {sorted(EMBEDDING_DTYPES)}")
+        self.client = client or get_client("bedrock-runtime", max_pool_connections=max(concurrency, 10))
+        self.model_id = model_id
+        self.input_type = input_type
+        self.output_dimension = output_dimension
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.embedding_type = embedding_type
+        self.dtype = EMBEDDING_DTYPES[embedding_type]
+        # Row width of the decoded array (binary types pack 8 dimensions per byte)
+        self.width = embedding_width(embedding_type, output_dimension)
+        self.stats = {"requests": 0, "texts": 0, "input_tokens": 0}
+        self._stats_lock = threading.Lock()
+
+    def _request_body(self, texts: list) -> str:
+        return json.dumps(
+            {
+                "texts": texts,
+                "input_type": self.input_type,
+                "embedding_types": [self.embedding_type],
+                "output_dimension": self.output_dimension,
+            }
+        )
+
+    def embed_batch(self, texts: list) -> np.ndarray:
+        """
+        Embed one batch of texts with a single invoke_model call.
+
+        Args:
+            texts: Up to batch_size texts
+
+        Returns:
+            Array of shape (len(texts), width) with the embedding type's dtype
+        """
+        response = self.client.invoke_model(
+            modelId=self.model_id, body=self._request_body(texts), contentType="application/json"
+        )
+        model_response = json.loads(response["body"].read())
+        vectors = np.asarray(model_response["embeddings"][self.embedding_type], dtype=self.dtype)
+
+        headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        with self._stats_lock:
+            self.stats["requests"] += 1
+            self.stats["texts"] += len(texts)
+            self.stats["input_tokens"] += int(headers.get("x-amzn-bedrock-input-token-count", 0))
+        return vectors
+
+    def iter_batches(self, texts):
+        """
+        Embed an iterable of texts concurrently.
+
+        Yields:
+            Arrays, one per batch, in input order
+        """
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="cohere-embed") as executor:
+            yield from ordered_map(
+                self.embed_batch, batched(texts, self.batch_size), executor, self.concurrency * 2
+            )
+
+    def embed(self, texts) -> np.ndarray:
+        """
+        Embed all texts into one contiguous array.
+
+        Returns:
+            Array of shape (n_texts, width)
+        """
+        arrays = list(self.iter_batches(texts))
+        if not arrays:
+            return np.empty((0, self.width), dtype=self.dtype)
+        return np.concatenate(arrays)
+
+    def embed_to_npy(self, texts, path: str, total: int | None = None) -> np.memmap:
+        """
+        Embed texts straight into a memory-mapped .npy file.
+
+        Only one window of batches is held in memory at a time, so the corpus
+        can be much larger than RAM.
+
+        Args:
+            texts: Iterable of texts
+            path: Destination .npy path
+            total: Number of texts; required when `texts` has no len()
+
+        Returns:
+            Read-only memmap of shape (total, width)
+        """
+        if total is None:
+            if not hasattr(texts, "__len__"):
+                raise ValueError("total is required when texts has no len()")
+            total = len(texts)
+
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=(total, self.width))
+        offset = 0
+        for vectors in self.iter_batches(texts):
+            out[offset:offset + len(vectors)] = vectors
+            offset += len(vectors)
+        if offset != total:
+            raise ValueError(f"Expected {total} texts, embedded {offset}")
+        out.flush()
+        del out
+        return np.load(path, mmap_mode="r")
+
+
+if __name__ == "__main__":
+    documents = [
+        f"Document {i}: Global cross-Region inference routes requests to regions with capacity."
+        for i in range(500)
+    ]
+
+    try:
+        print(f"🚀 Embedding {len(documents)} documents with Cohere Embed v4 (Global CRIS)...")
+        embedder = CohereEmbedder(concurrency=4)
+        vectors = embedder.embed(documents)
+        print(f"✅ Embeddings: shape {vectors.shape}, dtype {vectors.dtype}, {vectors.nbytes / 1024:.0f} KiB")
+        print(f"📊 Requests: {embedder.stats['requests']} (instead of {len(documents)})")
+        print(f"📊 Input tokens: {embedder.stats['input_tokens']}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Content-addressed embedding cache for Cohere Embed v4.
+
+Embeddings are stored in SQLite keyed by a SHA-256 hash of the text, model
+ID, input_type, embedding type and output_dimension, as the raw bytes of the
+packed vector. CachedEmbedder looks a whole batch up in one query and sends
+only the misses to Bedrock, so re-indexing a mostly unchanged corpus costs
+almost no embed calls.
+
+The cache is bounded by entry count and/or total vector bytes; the least
+recently used entries are evicted first.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from embed_pipeline import batched
+
+# Keys per SELECT ... IN (...) (SQLite allows 999 variables on older builds)
+_LOOKUP_CHUNK = 500
+
+# Texts looked up (and embedded on a miss) per round trip
+DEFAULT_CHUNK_SIZE = 4096
+
+
+def cache_key(text: str, model_id: str, input_type: str, embedding_type: str, output_dimension: int) -> bytes:
+    """SHA-256 digest identifying one embedding."""
+    digest = hashlib.sha256()
+    for part in (model_id, input_type, embedding_type, str(output_dimension)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+
+class EmbeddingCache:
+    """Thread-safe SQLite store of packed vectors with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int | None = None, max_bytes: int | None = None):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway cache)
+            max_entries: Maximum number of cached embeddings
+            max_bytes: Maximum total size of the cached vectors
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key BLOB PRIMARY KEY, vector BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        self._entries, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def __len__(self) -> int:
+        return self._entries
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get_many(self, keys: list) -> dict:
+        """
+        Look up many keys at once and mark the hits as recently used.
+
+        Returns:
+            {key: vector bytes} for the keys that are cached
+        """
+        found = {}
+        with self._lock:
+            for chunk in batched(dict.fromkeys(keys), _LOOKUP_CHUNK):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk  # nosec B608 - placeholders only
+                )
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?", ((now, key) for key in found)
+                )
+                self._conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+        return found
+
+    def put_many(self, items) -> None:
+        """Store (key, vector bytes) pairs, then evict down to the limits."""
+        now = time.time()
+        with self._lock:
+            for key, vector in items:
+                previous = self._conn.execute("SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, vector, len(vector), now),
+                )
+                if previous:
+                    self._bytes -= previous[0]
+                else:
+                    self._entries += 1
+                self._bytes += len(vector)
+                self.stats["writes"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _over_limit(self) -> bool:
+        return (self.max_entries is not None and self._entries > self.max_entries) or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        )
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until within limits (caller holds the lock)."""
+        while self._over_limit():
+            victims = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_used LIMIT ?", (_LOOKUP_CHUNK,)
+            ).fetchall()
+            if not victims:
+                break
+            evicted = []
+            for key, size in victims:
+                if not self._over_limit():
+                    break
+                evicted.append((key,))
+                self._entries -= 1
+                self._bytes -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+            self.stats["evictions"] += len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._entries = self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedder:
+    """CohereEmbedder front end that only embeds cache misses."""
+
+    def __init__(self, embedder, cache: EmbeddingCache, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            embedder: CohereEmbedder doing the actual Bedrock calls
+            cache: EmbeddingCache holding previous results
+            chunk_size: Texts looked up and embedded per round
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.chunk_size = chunk_size
+
+    def _key(self, text: str) -> bytes:
+        embedder = self.embedder
+        return cache_key(text, embedder.model_id, embedder.input_type, embedder.embedding_type, embedder.output_dimension)
+
+    def _embed_chunk(self, texts: list) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.embedder.embed(list(missing.values()))
+            fresh = {key: vector.tobytes() for key, vector in zip(missing, vectors)}
+            self.cache.put_many(fresh.items())
+            cached.update(fresh)
+
+        out = np.empty((len(texts), self.embedder.width), dtype=self.embedder.dtype)
+        for row, key in enumerate(keys):
+            out[row] = np.frombuffer(cached[key], dtype=self.embedder.dtype)
+        return out
+
+    def iter_chunks(self, texts):
+        """
+        Embed an iterable of texts through the cache.
+
+        Yields:
+            Arrays of up to chunk_size rows, in input order
+        """
+        for chunk in batched(texts, self.chunk_size):
+            yield self._embed_chunk(chunk)
+
+    def embed(self, texts) -> np.ndarray:
+        """Embed all texts into one array, calling Bedrock only for misses."""
+        arrays = list(self.iter_chunks(texts))
+        if not arrays:
+            return np.empty((0, self.embedder.width), dtype=self.embedder.dtype)
+        return np.concatenate(arrays)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from embed_pipeline import CohereEmbedder
+
+    documents = [f"Document {i}: Global CRIS routes requests to regions with capacity." for i in range(300)]
+    cache_path = os.path.join(tempfile.gettempdir(), "cohere_embedding_cache.sqlite3")
+
+    try:
+        cache = EmbeddingCache(cache_path, max_bytes=256 * 1024 * 1024)
+        embedder = CachedEmbedder(CohereEmbedder(embedding_type="int8"), cache)
+
+        print(f"🚀 First pass: embedding {len(documents)} documents...")
+        embedder.embed(documents)
+        print(f"📊 Bedrock requests: {embedder.embedder.stats['requests']}, hit rate: {cache.hit_rate:.0%}")
+
+        # Nightly re-index: only 10 documents changed
+        documents[:10] = [f"Updated document {i}" for i in range(10)]
+        before = embedder.embedder.stats["texts"]
+        print("\n🔁 Second pass with 10 changed documents...")
+        vectors = embedder.embed(documents)
+        print(f"✅ Embeddings: shape {vectors.shape}, dtype {vectors.dtype}")
+        print(f"📊 Texts sent to Bedrock: {embedder.embedder.stats['texts'] - before}")
+        print(f"📊 Cache: {len(cache)} entries, {cache.nbytes / 1024:.0f} KiB, stats {cache.stats}")
+        cache.close()
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Batch image embedding pipeline for Cohere Embed v4 with Global CRIS.
+
+Images are read from a local directory or an S3 prefix, downsized and
+re-encoded as JPEG in a process pool (decoding and resizing is CPU-bound and
+would otherwise serialize behind the network), base64-encoded into data URIs
+and sent in batches using the `images` or `inputs` request shape.
+
+Three stages run concurrently, each with a bounded window, so the corpus is
+streamed rather than loaded: file / S3 reads in threads, encoding in
+processes and Bedrock calls in threads. ImageEmbedder is a CohereEmbedder,
+so embed(), embed_to_npy() and PackedEmbeddingIndex.from_embedder() work on
+image sources unchanged.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import base64
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from PIL import Image, ImageOps
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "foundation_models"))
+from clients import get_client
+from embed_pipeline import CohereEmbedder, ordered_map
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif", ".bmp", ".tif", ".tiff")
+
+# Images are large, so batches are smaller than the 96-text limit to keep
+# request bodies well under the invoke_model payload limit
+DEFAULT_IMAGES_PER_REQUEST = 8
+DEFAULT_MAX_SIDE = 1024
+DEFAULT_JPEG_QUALITY = 85
+REQUEST_SHAPES = ("images", "inputs")
+
+
+def list_images(source: str):
+    """
+    List image files under a local directory or an s3://bucket/prefix.
+
+    Yields:
+        Local paths or s3:// URIs, in sorted (local) or key (S3) order
+    """
+    if source.startswith("s3://"):
+        bucket, _, prefix = source[5:].partition("/")
+        paginator = get_client("s3").get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            for obj in page.get("Contents", []):
+                if obj["Key"].lower().endswith(IMAGE_EXTENSIONS):
+                    yield f"s3://{bucket}/{obj['Key']}"
+    elif os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield os.path.join(root, name)
+    else:
+        yield source
+
+
+def read_image(source: str) -> bytes | str:
+    """Read the raw bytes of a local image or an s3:// object (data URIs pass through)."""
+    if source.startswith("data:"):
+        return source
+    if source.startswith("s3://"):
+        bucket, _, key = source[5:].partition("/")
+        return get_client("s3").get_object(Bucket=bucket, Key=key)["Body"].read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def encode_image(data: bytes | str, max_side: int = DEFAULT_MAX_SIDE, quality: int = DEFAULT_JPEG_QUALITY) -> str:
+    """
+    Downsize and re-encode an image as a base64 JPEG data URI.
+
+    Runs in a worker process, so it only takes and returns picklable values.
+
+    Args:
+        data: Raw image bytes in any format Pillow can read (an existing
+            data URI is returned unchanged)
+        max_side: Longest side after resizing (aspect ratio is kept)
+        quality: JPEG quality
+
+    Returns:
+        "data:image/jpeg;base64,..." string
+    """
+    if isinstance(data, str):
+        return data
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, format="JPEG", quality=quality, optimize=True)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+class ImageEmbedder(CohereEmbedder):
+    """CohereEmbedder for image sources (paths, s3:// URIs or data URIs)."""
+
+    def __init__(
+        self,
+        client=None,
+        request_shape: str = "images",
+        max_side: int = DEFAULT_MAX_SIDE,
+        quality: int = DEFAULT_JPEG_QUALITY,
+        processes: int | None = None,
+        io_threads: int = 16,
+        batch_size: int = DEFAULT_IMAGES_PER_REQUEST,
+        **kwargs,
+    ):
+        """
+        Args:
+            client: Bedrock runtime client, defaults to the shared client
+            request_shape: "images" (list of data URIs) or "inputs" (content blocks)
+            max_side: Longest image side sent to Bedrock
+            quality: JPEG quality of the re-encoded images
+            processes: Encoding processes, defaults to the CPU count
+            io_threads: Threads reading files / S3 objects
+            batch_size: Images per request
+            **kwargs: Other CohereEmbedder options (embedding_type, output_dimension, ...)
+        """
+        if request_shape not in REQUEST_SHAPES:
+            raise ValueError(f"request_shape must be one of {REQUEST_SHAPES}")
+        kwargs.setdefault("input_type", "search_document")
+        super().__init__(client, batch_size=batch_size, **kwargs)
+        self.request_shape = request_shape
+        self.max_side = max_side
+        self.quality = quality
+        self.processes = processes or os.cpu_count() or 1
+        self.io_threads = io_threads
+
+    def _request_body(self, images: list) -> str:
+        body = {
+            "input_type": self.input_type,
+            "embedding_types": [self.embedding_type],
+            "output_dimension": self.output_dimension,
+        }
+        if self.request_shape == "images":
+            body["images"] = images
+        else:
+            body["inputs"] = [{"content": [{"type": "image_url", "image_url": image}]} for image in images]
+        return json.dumps(body)
+
+    def iter_encoded(self, sources):
+        """
+        Read and re-encode image sources concurrently.
+
+        Sources that are already data URIs are passed through.
+
+        Yields:
+            Data URIs, in input order
+        """
+        encode = partial(encode_image, max_side=self.max_side, quality=self.quality)
+        with (
+            ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix="image-read") as readers,
+            ProcessPoolExecutor(max_workers=self.processes) as encoders,
+        ):
+            raw = ordered_map(read_image, sources, readers, self.io_threads * 2)
+            yield from ordered_map(encode, raw, encoders, self.processes * 2)
+
+    def iter_batches(self, sources):
+        """
+        Embed image sources concurrently.
+
+        Yields:
+            Arrays, one per batch, in input order
+        """
+        yield from super().iter_batches(self.iter_encoded(sources))
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from packed_embeddings import PackedEmbeddingIndex
+
+    with tempfile.TemporaryDirectory() as workdir:
+        if len(sys.argv) > 1:
+            source = sys.argv[1]
+        else:
+            # Sample images so the demo runs without a dataset
+            source = os.path.join(workdir, "images")
+            os.makedirs(source)
+            for i in range(24):
+                Image.new("RGB", (2048, 1536), (i * 10 % 256, 80, 255 - i * 10 % 256)).save(
+                    os.path.join(source, f"sample_{i:02d}.png")
+                )
+
+        try:
+            sources = list(list_images(source))
+            print(f"🚀 Embedding {len(sources)} images from {source} with Cohere Embed v4 (Global CRIS)...")
+            embedder = ImageEmbedder(embedding_type="ubinary")
+            start = time.perf_counter()
+            index = PackedEmbeddingIndex.from_embedder(embedder, sources, os.path.join(workdir, "images.npy"))
+            elapsed = time.perf_counter() - start
+            print(f"✅ Packed index: {len(index)} vectors, {index.nbytes} bytes ({index.embedding_type})")
+            print(f"📊 Requests: {embedder.stats['requests']}, {len(sources) / elapsed:.1f} images/s")
+            del index
+        except Exception as e:
+            print(f"❌ Error: {e}")
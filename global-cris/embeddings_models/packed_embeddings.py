@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Compact Cohere Embed v4 embeddings in packed NumPy arrays.
+
+Cohere Embed v4 can return int8, uint8, binary and ubinary embeddings in
+addition to float. Stored as NumPy arrays of the matching dtype they take:
+
+- float:   4 bytes per dimension
+- int8 / uint8: 1 byte per dimension (4x smaller)
+- binary / ubinary: 1 bit per dimension, 8 dimensions per byte (32x smaller)
+
+The search kernels below work on those packed arrays directly: Hamming
+distance for binary embeddings (XOR + popcount) and dot product for int8 /
+uint8 embeddings. Both process the corpus in chunks, so a memory-mapped
+index never has to be widened to float in full.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+
+import numpy as np
+
+# NumPy dtype of each Cohere embedding type
+EMBEDDING_DTYPES = {
+    "float": np.float32,
+    "int8": np.int8,
+    "uint8": np.uint8,
+    "binary": np.int8,
+    "ubinary": np.uint8,
+}
+
+BINARY_TYPES = ("binary", "ubinary")
+
+# Corpus rows scored per chunk by the search kernels
+DEFAULT_CHUNK_ROWS = 65536
+
+# Set bits in every byte value, used when np.bitwise_count is unavailable (NumPy < 2.0)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def embedding_width(embedding_type: str, output_dimension: int) -> int:
+    """Number of array columns per embedding (bytes for binary types)."""
+    if embedding_type in BINARY_TYPES:
+        if output_dimension % 8:
+            raise ValueError("Binary embeddings need an output_dimension divisible by 8")
+        return output_dimension // 8
+    return output_dimension
+
+
+def to_ubinary(packed: np.ndarray) -> np.ndarray:
+    """
+    Convert packed binary embeddings to ubinary.
+
+    Cohere's signed `binary` values are the `ubinary` bytes minus 128, which
+    is the same bit pattern with the top bit flipped.
+    """
+    packed = np.asarray(packed)
+    if packed.dtype == np.uint8:
+        return packed
+    return packed.view(np.uint8) ^ np.uint8(0x80)
+
+
+def binarize(vectors: np.ndarray) -> np.ndarray:
+    """Pack float embeddings into ubinary form (bit set where the value is > 0)."""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values]
+
+
+def hamming_distances(queries: np.ndarray, corpus: np.ndarray, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    """
+    Hamming distances between packed binary queries and a packed corpus.
+
+    Args:
+        queries: (width,) or (n_queries, width) binary or ubinary array
+        corpus: (n_rows, width) binary or ubinary array
+        chunk_rows: Corpus rows processed at a time
+
+    Returns:
+        int32 array of shape (n_queries, n_rows)
+    """
+    queries = np.atleast_2d(to_ubinary(queries))
+    distances = np.empty((len(queries), len(corpus)), dtype=np.int32)
+    # Keep the XOR intermediate (queries x chunk x width bytes) bounded
+    chunk_rows = max(1, min(chunk_rows, (64 << 20) // max(1, len(queries) * queries.shape[1])))
+    for start in range(0, len(corpus), chunk_rows):
+        block = to_ubinary(corpus[start:start + chunk_rows])
+        xor = np.bitwise_xor(queries[:, None, :], block[None, :, :])
+        distances[:, start:start + len(block)] = _popcount(xor).sum(axis=2, dtype=np.int32)
+    return distances
+
+
+def dot_scores(queries: np.ndarray, corpus: np.ndarray, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> np.ndarray:
+    """
+    Dot products between int8 / uint8 (or float) queries and a corpus.
+
+    Chunks are widened to float64 so the product runs on BLAS; every int8
+    dot product of up to 1536 dimensions is exactly representable, so the
+    result equals int32 accumulation.
+
+    Args:
+        queries: (width,) or (n_queries, width) array
+        corpus: (n_rows, width) array
+        chunk_rows: Corpus rows widened at a time
+
+    Returns:
+        Array of shape (n_queries, n_rows), int32 for integer inputs
+    """
+    queries = np.atleast_2d(queries)
+    integer = np.issubdtype(corpus.dtype, np.integer)
+    out_dtype = np.int32 if integer else np.float32
+    work_dtype = np.float64 if integer else np.float32
+    query_block = queries.astype(work_dtype)
+    scores = np.empty((len(queries), len(corpus)), dtype=out_dtype)
+    for start in range(0, len(corpus), chunk_rows):
+        block = corpus[start:start + chunk_rows].astype(work_dtype)
+        scores[:, start:start + len(block)] = query_block @ block.T
+    return scores
+
+
+def top_k(scores: np.ndarray, k: int, largest: bool = True) -> tuple:
+    """
+    Indices and scores of the k best entries in each row, best first.
+
+    Returns:
+        (indices, scores), each of shape (n_queries, k)
+    """
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((len(scores), 0), dtype=np.int64)
+        return empty, empty.astype(scores.dtype)
+    keyed = -scores.astype(np.int64 if np.issubdtype(scores.dtype, np.integer) else np.float64) if largest else scores
+    candidates = np.argpartition(keyed, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(keyed, candidates, axis=1), axis=1, kind="stable")
+    indices = np.take_along_axis(candidates, order, axis=1)
+    return indices, np.take_along_axis(scores, indices, axis=1)
+
+
+def hamming_search(queries: np.ndarray, corpus: np.ndarray, k: int = 10) -> tuple:
+    """Nearest neighbours by Hamming distance (smallest first)."""
+    return top_k(hamming_distances(queries, corpus), k, largest=False)
+
+
+def dot_search(queries: np.ndarray, corpus: np.ndarray, k: int = 10) -> tuple:
+    """Nearest neighbours by dot product (largest first)."""
+    return top_k(dot_scores(queries, corpus), k, largest=True)
+
+
+class PackedEmbeddingIndex:
+    """Packed embeddings of one type plus the matching search kernel."""
+
+    def __init__(self, vectors: np.ndarray, embedding_type: str, output_dimension: int):
+        """
+        Args:
+            vectors: (n_rows, width) array of the embedding type's dtype
+            embedding_type: "float", "int8", "uint8", "binary" or "ubinary"
+            output_dimension: Embedding dimension before packing
+        """
+        if embedding_type not in EMBEDDING_DTYPES:
+            raise ValueError(f"embedding_type must be one of {sorted(EMBEDDING_DTYPES)}")
+        width = embedding_width(embedding_type, output_dimension)
+        if vectors.ndim != 2 or vectors.shape[1] != width:
+            raise ValueError(f"Expected vectors of shape (n, {width}), got {vectors.shape}")
+        if vectors.dtype != EMBEDDING_DTYPES[embedding_type]:
+            raise ValueError(f"{embedding_type} embeddings must be {np.dtype(EMBEDDING_DTYPES[embedding_type])}")
+        self.vectors = vectors
+        self.embedding_type = embedding_type
+        self.output_dimension = output_dimension
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+    def search(self, queries: np.ndarray, k: int = 10) -> tuple:
+        """
+        Search the index with queries of the same embedding type.
+
+        Returns:
+            (indices, scores): Hamming distances for binary types, dot
+            products otherwise
+        """
+        if self.embedding_type in BINARY_TYPES:
+            return hamming_search(queries, self.vectors, k)
+        return dot_search(queries, self.vectors, k)
+
+    def save(self, path: str) -> None:
+        """Write the vectors to `path` (.npy) and the metadata to `path`.json."""
+        np.save(path, self.vectors)
+        self._write_metadata(path)
+
+    def _write_metadata(self, path: str) -> None:
+        with open(f"{path}.json", "w", encoding="utf-8") as f:
+            json.dump({"embedding_type": self.embedding_type, "output_dimension": self.output_dimension}, f)
+
+    @classmethod
+    def from_embedder(cls, embedder, items, path: str, total: int | None = None) -> "PackedEmbeddingIndex":
+        """
+        Stream an embedder's output straight into a saved, memory-mapped index.
+
+        Args:
+            embedder: CohereEmbedder (or ImageEmbedder) with the desired embedding_type
+            items: Texts or images accepted by the embedder
+            path: Destination .npy path
+            total: Number of items; required when `items` has no len()
+
+        Returns:
+            PackedEmbeddingIndex backed by the file at `path`
+        """
+        vectors = embedder.embed_to_npy(items, path, total)
+        index = cls(vectors, embedder.embedding_type, embedder.output_dimension)
+        index._write_metadata(path)
+        return index
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "PackedEmbeddingIndex":
+        """Load an index written by save(), memory-mapped by default."""
+        with open(f"{path}.json", encoding="utf-8") as f:
+            metadata = json.load(f)
+        vectors = np.load(path, mmap_mode="r" if mmap else None)
+        return cls(vectors, metadata["embedding_type"], metadata["output_dimension"])
+
+
+if __name__ == "__main__":
+    from embed_pipeline import CohereEmbedder
+
+    documents = [
+        "Global cross-Region inference routes requests to regions with available capacity.",
+        "Amazon S3 stores objects in buckets with eleven nines of durability.",
+        "Application inference profiles track usage and cost per tenant.",
+        "AWS Lambda runs code without provisioning servers.",
+    ]
+    question = "How can I track Bedrock costs for each customer?"
+
+    try:
+        for embedding_type in ("int8", "ubinary"):
+            print(f"\n🚀 Cohere Embed v4 with embedding_types=['{embedding_type}']")
+            doc_embedder = CohereEmbedder(embedding_type=embedding_type)
+            query_embedder = CohereEmbedder(embedding_type=embedding_type, input_type="search_query")
+            index = PackedEmbeddingIndex(doc_embedder.embed(documents), embedding_type, doc_embedder.output_dimension)
+            float_bytes = len(index) * index.output_dimension * 4
+            print(f"📦 {len(index)} vectors: {index.nbytes} bytes ({float_bytes // index.nbytes}x smaller than float)")
+
+            indices, scores = index.search(query_embedder.embed([question]), k=2)
+            for i, score in zip(indices[0], scores[0]):
+                print(f"   ✅ {score:>8}  {documents[i]}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Semantic response cache for Converse calls using Cohere Embed v4.
+
+Paraphrased questions ("How do I enable Global CRIS?" / "What are the steps
+to turn on global cross-Region inference?") miss an exact-match cache. Here
+each incoming prompt is embedded with input_type="search_query" and looked up
+in a per-namespace VectorIndex of previously answered prompts; when the
+nearest one is at least `threshold` cosine-similar, its answer is returned
+without calling the model.
+
+- namespaces (e.g. one per tenant) never see each other's answers, and
+  within a namespace entries are also separated by model ID and by the
+  request settings that shape the answer (system prompt, inferenceConfig,
+  toolConfig, guardrailConfig, additionalModelRequestFields)
+- only single-turn requests are cached, since a follow-up question's answer
+  depends on the earlier turns, and only complete text answers (stopReason
+  "end_turn"; no truncated answers, tool use or reasoning blocks)
+- each (namespace, model, settings) index holds at most
+  `max_entries` answers; expired and least recently used entries are
+  evicted in batches, and expired entries met during a lookup are evicted
+  on the spot
+- semantic_converse_stream() shares the same entries: a hit is replayed as
+  ConverseStream events, and a streamed miss is stored once it completes
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import copy
+import hashlib
+import json
+import threading
+import time
+
+import numpy as np
+
+from embed_pipeline import CohereEmbedder
+from vector_index import VectorIndex
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 1000
+DEFAULT_TTL = 24 * 3600
+# Nearest neighbours checked per lookup, so an expired nearest entry does not hide a live one
+LOOKUP_CANDIDATES = 5
+
+# Request fields besides the prompt that change the answer; entries are only shared when all match
+SCOPE_FIELDS = ("system", "inferenceConfig", "toolConfig", "guardrailConfig", "additionalModelRequestFields")
+
+# Share of a full namespace evicted at once, so the index is not rebuilt on every insert
+EVICTION_FRACTION = 0.1
+
+
+def prompt_text(messages: list) -> str | None:
+    """Text of a single-turn Converse request, or None for multi-turn / non-text requests."""
+    if len(messages) != 1 or messages[0].get("role") != "user":
+        return None
+    texts = [block["text"] for block in messages[0].get("content", []) if "text" in block]
+    if len(texts) != len(messages[0].get("content", [])):
+        return None
+    return "\n".join(texts)
+
+
+def request_settings(kwargs: dict) -> dict:
+    """The SCOPE_FIELDS a Converse request sets."""
+    return {name: kwargs[name] for name in SCOPE_FIELDS if name in kwargs}
+
+
+def _scope(namespace: str, model_id: str, settings: dict) -> tuple:
+    """Index key: answers are only shared for the same namespace, model and request settings."""
+    settings_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+    return namespace, model_id, settings_hash
+
+
+class _Entry:
+    __slots__ = ("prompt", "response", "created", "last_used", "hits")
+
+    def __init__(self, prompt: str, response: dict):
+        self.prompt = prompt
+        self.response = response
+        self.created = self.last_used = time.time()
+        self.hits = 0
+
+
+class SemanticCache:
+    """Thread-safe similarity cache of Converse responses, one index per scope."""
+
+    def __init__(
+        self,
+        embedder: CohereEmbedder | None = None,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float | None = DEFAULT_TTL,
+    ):
+        """
+        Args:
+            embedder: CohereEmbedder for prompts, defaults to float
+                search_query embeddings
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Cached answers per namespace, model and request settings
+            ttl: Seconds an answer stays valid, None for no expiry
+        """
+        self.embedder = embedder or CohereEmbedder(input_type="search_query")
+        if self.embedder.embedding_type != "float":
+            raise ValueError("SemanticCache needs float embeddings")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._indexes = {}  # scope -> VectorIndex
+        self._entries = {}  # scope -> {id: _Entry}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one prompt (a single Cohere request)."""
+        return self.embedder.embed_batch([text])[0]
+
+    def lookup(self, namespace: str, model_id: str, settings: dict, vector: np.ndarray) -> tuple:
+        """
+        Find the most similar unexpired cached prompt in a scope.
+
+        The LOOKUP_CANDIDATES nearest entries are checked in order of
+        similarity; expired ones among them are skipped and evicted.
+
+        Returns:
+            (entry or None, similarity); the entry is None below the threshold
+        """
+        scope = _scope(namespace, model_id, settings)
+        now = time.time()
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None or not len(index):
+                self.stats["misses"] += 1
+                return None, 0.0
+            ids, scores = index.search(vector, k=min(LOOKUP_CANDIDATES, len(index)))
+            entries = self._entries[scope]
+            entry, similarity, expired = None, 0.0, []
+            for entry_id, score in zip(ids[0].tolist(), scores[0].tolist()):
+                if self._expired(entries[entry_id], now):
+                    expired.append(entry_id)
+                    continue
+                entry, similarity = entries[entry_id], score
+                break
+            if expired:
+                self._remove(scope, expired)
+            if entry is None or similarity < self.threshold:
+                self.stats["misses"] += 1
+                return None, similarity
+            entry.last_used = now
+            entry.hits += 1
+            self.stats["hits"] += 1
+            return entry, similarity
+
+    def store(self, namespace: str, model_id: str, settings: dict, vector: np.ndarray, prompt: str, response: dict) -> None:
+        """Cache a response under its prompt embedding (incomplete answers and non-text content are skipped)."""
+        if response.get("stopReason") != "end_turn":
+            return
+        content = response.get("output", {}).get("message", {}).get("content", [])
+        if not content or any(set(block) != {"text"} for block in content):
+            return
+        scope = _scope(namespace, model_id, settings)
+        response = {name: value for name, value in response.items() if name != "ResponseMetadata"}
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is None:
+                index = self._indexes[scope] = VectorIndex(len(vector), metric="cosine")
+                self._entries[scope] = {}
+            entries = self._entries[scope]
+            if len(entries) >= self.max_entries:
+                self._evict(scope)
+            entry_id = self._next_id
+            self._next_id += 1
+            index.add(vector[None, :], ids=[entry_id])
+            entries[entry_id] = _Entry(prompt, copy.deepcopy(response))
+            self.stats["writes"] += 1
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _expired(self, entry: _Entry, now: float) -> bool:
+        return self.ttl is not None and entry.created + self.ttl <= now
+
+    def _evict(self, scope: tuple) -> None:
+        """Remove expired entries, then the least recently used, from a full scope (caller holds the lock)."""
+        entries = self._entries[scope]
+        now = time.time()
+        victims = [entry_id for entry_id, entry in entries.items() if self._expired(entry, now)]
+        target = max(1, int(self.max_entries * EVICTION_FRACTION))
+        if len(victims) < target:
+            live = sorted((entry.last_used, entry_id) for entry_id, entry in entries.items() if not self._expired(entry, now))
+            victims.extend(entry_id for _, entry_id in live[:target - len(victims)])
+        self._remove(scope, victims)
+
+    def _remove(self, scope: tuple, entry_ids: list) -> None:
+        """Drop entries from a scope's index (caller holds the lock)."""
+        self._indexes[scope].remove(entry_ids)
+        entries = self._entries[scope]
+        for entry_id in entry_ids:
+            del entries[entry_id]
+        self.stats["evictions"] += len(entry_ids)
+
+    def clear(self, namespace: str | None = None) -> None:
+        """Drop every cached answer, or only one namespace's."""
+        with self._lock:
+            for scope in list(self._indexes):
+                if namespace is None or scope[0] == namespace:
+                    del self._indexes[scope]
+                    del self._entries[scope]
+
+    def namespace_sizes(self) -> dict:
+        """Cached answers per namespace."""
+        with self._lock:
+            sizes = {}
+            for (namespace, _, _), entries in self._entries.items():
+                sizes[namespace] = sizes.get(namespace, 0) + len(entries)
+            return sizes
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+
+def semantic_converse(client, cache: SemanticCache, namespace: str = "default", **kwargs) -> dict:
+    """
+    converse() through the semantic cache.
+
+    Args:
+        client: Bedrock runtime client for the model call
+        cache: SemanticCache to read and fill
+        namespace: Cache namespace, e.g. the tenant ID
+        **kwargs: converse() parameters
+
+    Returns:
+        The converse() response or a copy of the cached one;
+        response["semanticCache"] holds "hit", "bypassed", "similarity" and,
+        on a hit, the cached "prompt" that matched; multi-turn and non-text
+        requests bypass the cache with {"hit": False, "bypassed": True}
+    """
+    prompt = prompt_text(kwargs.get("messages", []))
+    if prompt is None:
+        cache._count("bypassed")
+        response = client.converse(**kwargs)
+        response["semanticCache"] = {"hit": False, "bypassed": True}
+        return response
+
+    model_id = kwargs.get("modelId", "")
+    settings = request_settings(kwargs)
+    vector = cache.embed(prompt)
+    entry, similarity = cache.lookup(namespace, model_id, settings, vector)
+    if entry is not None:
+        response = copy.deepcopy(entry.response)
+        response["semanticCache"] = {"hit": True, "bypassed": False, "similarity": similarity, "prompt": entry.prompt}
+        return response
+
+    response = client.converse(**kwargs)
+    cache.store(namespace, model_id, settings, vector, prompt, response)
+    response["semanticCache"] = {"hit": False, "bypassed": False, "similarity": similarity}
+    return response
+
+
+def stream_events(response: dict):
+    """Replay a Converse response (text content only) as ConverseStream events."""
+    message = response["output"]["message"]
+    yield {"messageStart": {"role": message["role"]}}
+    for i, block in enumerate(message["content"]):
+        yield {"contentBlockDelta": {"delta": {"text": block["text"]}, "contentBlockIndex": i}}
+        yield {"contentBlockStop": {"contentBlockIndex": i}}
+    yield {"messageStop": {"stopReason": response.get("stopReason", "end_turn")}}
+    yield {"metadata": {"usage": response.get("usage", {}), "metrics": response.get("metrics", {})}}
+
+
+def _recorded_stream(events, store):
+    """Yield live ConverseStream events; once a text-only stream completes, pass the equivalent Converse response to `store`."""
+    role, blocks, response = "assistant", {}, {}
+    for event in events:
+        if "messageStart" in event:
+            role = event["messageStart"]["role"]
+        elif "contentBlockStart" in event:
+            # Only tool use blocks have a start event; None marks non-text content
+            blocks.setdefault(event["contentBlockStart"]["contentBlockIndex"], []).append(None)
+        elif "contentBlockDelta" in event:
+            delta = event["contentBlockDelta"]
+            blocks.setdefault(delta["contentBlockIndex"], []).append(delta["delta"].get("text"))
+        elif "messageStop" in event:
+            response["stopReason"] = event["messageStop"].get("stopReason")
+        elif "metadata" in event:
+            response["usage"] = event["metadata"].get("usage", {})
+            response["metrics"] = event["metadata"].get("metrics", {})
+        yield event
+    if blocks and all(None not in parts for parts in blocks.values()):
+        content = [{"text": "".join(parts)} for _, parts in sorted(blocks.items())]
+        store({"output": {"message": {"role": role, "content": content}}, **response})
+
+
+def semantic_converse_stream(client, cache: SemanticCache, namespace: str = "default", **kwargs) -> dict:
+    """
+    converse_stream() through the semantic cache.
+
+    Entries are shared with semantic_converse(): a hit is replayed as
+    ConverseStream events, and a miss is stored once its stream has been
+    read to the end.
+
+    Args:
+        client: Bedrock runtime client for the model call
+        cache: SemanticCache to read and fill
+        namespace: Cache namespace, e.g. the tenant ID
+        **kwargs: converse_stream() parameters
+
+    Returns:
+        {"stream": iterable of events, "semanticCache": {...}} as for semantic_converse()
+    """
+    prompt = prompt_text(kwargs.get("messages", []))
+    if prompt is None:
+        cache._count("bypassed")
+        response = client.converse_stream(**kwargs)
+        response["semanticCache"] = {"hit": False, "bypassed": True}
+        return response
+
+    model_id = kwargs.get("modelId", "")
+    settings = request_settings(kwargs)
+    vector = cache.embed(prompt)
+    entry, similarity = cache.lookup(namespace, model_id, settings, vector)
+    if entry is not None:
+        return {
+            "stream": stream_events(copy.deepcopy(entry.response)),
+            "semanticCache": {"hit": True, "bypassed": False, "similarity": similarity, "prompt": entry.prompt},
+        }
+
+    def store(response):
+        cache.store(namespace, model_id, settings, vector, prompt, response)
+
+    stream = _recorded_stream(client.converse_stream(**kwargs)["stream"], store)
+    return {"stream": stream, "semanticCache": {"hit": False, "bypassed": False, "similarity": similarity}}
+
+
+if __name__ == "__main__":
+    from clients import get_client
+
+    bedrock = get_client("bedrock-runtime")
+    cache = SemanticCache()
+    model_id = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
+    questions = [
+        ("tenant-a", "How do I enable Global cross-Region inference on Bedrock?"),
+        ("tenant-a", "What are the steps to turn on global cross-Region inference in Amazon Bedrock?"),
+        ("tenant-b", "How do I enable Global cross-Region inference on Bedrock?"),
+        ("tenant-a", "What does Global CRIS cost compared to on-demand?"),
+    ]
+
+    print(f"🧲 Semantic cache (threshold {cache.threshold}) in front of {model_id}")
+    try:
+        for namespace, question in questions:
+            start = time.perf_counter()
+            response = semantic_converse(
+                bedrock,
+                cache,
+                namespace,
+                modelId=model_id,
+                messages=[{"role": "user", "content": [{"text": question}]}],
+                inferenceConfig={"maxTokens": 200},
+            )
+            info = response["semanticCache"]
+            source = "cache" if info["hit"] else "model"
+            print(f"   [{namespace}] {source:<5} sim {info['similarity']:.3f} "
+                  f"{1000 * (time.perf_counter() - start):7.0f} ms  {question}")
+        print(f"\n📊 Hit rate: {cache.hit_rate:.0%}, stats: {cache.stats}, entries: {cache.namespace_sizes()}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
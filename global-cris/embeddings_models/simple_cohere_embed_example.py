@@ -7,11 +7,15 @@ Author: Navule Pavan Kumar Rao
 Date: November 20, 2025
 """
 import json
+import os
+import sys
 
-import boto3
 from botocore.exceptions import ClientError
 
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "foundation_models"))
+from clients import get_client
+
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Cohere Embed v4
 MODEL_ID = "global.cohere.embed-v4:0"
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+In-process vector index over Cohere Embed v4 embeddings.
+
+Two search modes over float32 vectors:
+
+- exact: batched matrix multiply against the whole corpus, in chunks, with a
+  running top-k merge so memory stays bounded
+- IVF: k-means centroids define `n_lists` inverted lists stored
+  contiguously, each vector going to the centroid it scores highest against
+  under the index metric; a query scans only the `nprobe` lists whose
+  centroids score highest, which is sub-linear in the corpus size
+
+add() appends into storage that grows geometrically, so inserting one vector
+at a time costs amortized O(1) copies. Once the index is trained, new
+vectors go to an unlisted tail that every IVF query scans exactly; the tail
+is assigned to lists in one batch when it outgrows REBUILD_FRACTION of the
+listed rows.
+
+save() writes plain .npy files and load() memory-maps them, so worker
+processes start instantly and share the corpus through the page cache.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+import os
+
+import numpy as np
+
+from packed_embeddings import top_k
+
+METRICS = ("cosine", "dot")
+
+# Corpus rows scored per matrix multiply
+DEFAULT_CHUNK_ROWS = 65536
+# Query rows scored per matrix multiply
+QUERY_BLOCK = 256
+# Unlisted rows tolerated after training before they are merged into the lists
+REBUILD_FRACTION = 0.1
+REBUILD_MIN_ROWS = 1024
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows (zero rows are left as zeros)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, np.float32(1e-12))
+
+
+def top_k_rows(ids: np.ndarray, scores: np.ndarray, k: int):
+    """Best k (largest score) entries of each row, returning their ids and scores."""
+    positions, best = top_k(scores, k, largest=True)
+    return np.take_along_axis(ids, positions, axis=1), best
+
+
+def _append(buffer: np.ndarray, size: int, rows: np.ndarray) -> np.ndarray:
+    """Write rows after the first `size` rows of buffer, doubling its capacity when full."""
+    needed = size + len(rows)
+    if needed > len(buffer) or not buffer.flags.writeable:
+        grown = np.empty((max(needed, 2 * len(buffer), 16),) + buffer.shape[1:], dtype=buffer.dtype)
+        grown[:size] = buffer[:size]
+        buffer = grown
+    buffer[size:needed] = rows
+    return buffer
+
+
+def _merge_top_k(best_ids, best_scores, ids, scores, k):
+    """Merge a new block of candidates into the running top-k per query."""
+    if best_ids is None:
+        return top_k_rows(ids, scores, k)
+    return top_k_rows(np.concatenate([best_ids, ids], axis=1), np.concatenate([best_scores, scores], axis=1), k)
+
+
+def kmeans(
+    vectors: np.ndarray,
+    n_clusters: int,
+    iterations: int = 20,
+    sample_size: int = 100_000,
+    seed: int = 0,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> np.ndarray:
+    """
+    Lloyd's k-means on (a sample of) the vectors.
+
+    Returns:
+        float32 centroids of shape (n_clusters, dimension)
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    else:
+        sample = np.asarray(vectors, dtype=np.float32)
+    if len(sample) < n_clusters:
+        raise ValueError(f"Need at least {n_clusters} vectors to train {n_clusters} lists")
+
+    centroids = sample[rng.choice(len(sample), n_clusters, replace=False)].copy()
+    for _ in range(iterations):
+        labels = assign(sample, centroids, chunk_rows)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=n_clusters)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters from random sample points
+        if empty.any():
+            centroids[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+    return centroids
+
+
+def assign(
+    vectors: np.ndarray,
+    centroids: np.ndarray,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    inner_product: bool = False,
+) -> np.ndarray:
+    """
+    Index of the nearest centroid for every vector.
+
+    Nearest is smallest squared L2 distance, or largest inner product when
+    `inner_product` is set (the measure IVF probes with for metric="dot").
+    """
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_rows):
+        block = np.asarray(vectors[start:start + chunk_rows], dtype=np.float32)
+        if inner_product:
+            labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        else:
+            # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, and ||x||^2 does not change the argmin
+            labels[start:start + len(block)] = np.argmin(centroid_norms - 2 * (block @ centroids.T), axis=1)
+    return labels
+
+
+class VectorIndex:
+    """Float32 vector index with exact and IVF search."""
+
+    def __init__(self, dimension: int, metric: str = "cosine"):
+        """
+        Args:
+            dimension: Embedding dimension (e.g. Cohere output_dimension)
+            metric: "cosine" (vectors are normalized on add) or "dot"
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {METRICS}")
+        self.dimension = dimension
+        self.metric = metric
+        # Rows [0, _size) of the buffers are in use; the rest is spare capacity
+        self._vectors = np.empty((0, dimension), dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._size = 0
+        self._next_id = 0
+        # IVF state: list i holds rows offsets[i]:offsets[i + 1]; rows from
+        # offsets[-1] on are the unlisted tail
+        self.centroids = None
+        self.offsets = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[:self._size]
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {vectors.shape[1]}")
+        return normalize(vectors) if self.metric == "cosine" else vectors
+
+    def add(self, vectors: np.ndarray, ids=None) -> None:
+        """
+        Add vectors (e.g. the output of CohereEmbedder.embed()).
+
+        Args:
+            vectors: (n, dimension) array
+            ids: n integer IDs, defaults to consecutive numbers after the
+                largest ID added so far
+        """
+        vectors = self._prepare(vectors)
+        if ids is None:
+            ids = np.arange(self._next_id, self._next_id + len(vectors), dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length")
+        if len(ids):
+            self._next_id = max(self._next_id, int(ids.max()) + 1)
+
+        self._vectors = _append(self._vectors, self._size, vectors)
+        self._ids = _append(self._ids, self._size, ids)
+        self._size += len(vectors)
+        if self.is_trained:
+            listed = int(self.offsets[-1])
+            if self._size - listed > max(REBUILD_MIN_ROWS, REBUILD_FRACTION * listed):
+                self._merge_tail()
+
+    def remove(self, ids) -> int:
+        """
+        Delete vectors by ID.
+
+        Returns:
+            Number of vectors removed
+        """
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        removed = len(keep) - int(keep.sum())
+        if removed:
+            if self.is_trained:
+                # Rows stay sorted by list, so only the list boundaries move
+                kept_before = np.concatenate([[0], np.cumsum(keep)])
+                self.offsets = kept_before[self.offsets].astype(np.int64)
+            self._vectors = np.ascontiguousarray(self.vectors[keep])
+            self._ids = self.ids[keep]
+            self._size = len(self._ids)
+        return removed
+
+    def train(self, n_lists: int | None = None, iterations: int = 20, seed: int = 0) -> None:
+        """
+        Partition the indexed vectors into IVF lists with k-means.
+
+        Args:
+            n_lists: Number of lists, defaults to about sqrt(len(index))
+            iterations: k-means iterations
+            seed: Random seed for sampling and initialization
+        """
+        n_lists = n_lists or max(1, int(np.sqrt(len(self))))
+        self.centroids = kmeans(self.vectors, n_lists, iterations=iterations, seed=seed)
+        if self.metric == "cosine":
+            self.centroids = normalize(self.centroids)
+        self._sort_lists(self._assign(self.vectors))
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        List of every vector, by the measure queries probe with.
+
+        With normalized vectors and centroids (cosine) the L2-nearest centroid
+        is also the one with the largest inner product; for "dot" they can
+        differ, so rows are assigned by inner product like the probes.
+        """
+        return assign(vectors, self.centroids, inner_product=self.metric == "dot")
+
+    def _merge_tail(self) -> None:
+        """Assign the unlisted tail to lists; listed rows keep the list they are in."""
+        listed = int(self.offsets[-1])
+        labels = np.concatenate([
+            np.repeat(np.arange(len(self.centroids)), np.diff(self.offsets)),
+            self._assign(self.vectors[listed:]),
+        ])
+        self._sort_lists(labels)
+
+    def _sort_lists(self, labels: np.ndarray) -> None:
+        """Sort rows by list so every list is one contiguous slice."""
+        order = np.argsort(labels, kind="stable")
+        self._vectors = np.ascontiguousarray(self.vectors[order])
+        self._ids = self.ids[order]
+        counts = np.bincount(labels, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    def search(self, queries: np.ndarray, k: int = 10, nprobe: int | None = None):
+        """
+        Find the k nearest vectors for each query.
+
+        Args:
+            queries: (dimension,) or (n_queries, dimension) array
+            k: Results per query
+            nprobe: IVF lists scanned per query; None searches exactly
+
+        Returns:
+            (ids, scores), each of shape (n_queries, k), best first
+        """
+        queries = self._prepare(queries)
+        if nprobe is None or not self.is_trained:
+            return self._search_exact(queries, k)
+        return self._search_ivf(queries, k, nprobe)
+
+    def _search_exact(self, queries: np.ndarray, k: int, chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        result_ids, result_scores = [], []
+        for q_start in range(0, len(queries), QUERY_BLOCK):
+            block = queries[q_start:q_start + QUERY_BLOCK]
+            best_ids = best_scores = None
+            for start in range(0, len(self.vectors), chunk_rows):
+                scores = block @ np.asarray(self.vectors[start:start + chunk_rows]).T
+                ids = np.broadcast_to(self.ids[start:start + scores.shape[1]], scores.shape)
+                best_ids, best_scores = _merge_top_k(best_ids, best_scores, ids, scores, k)
+            if best_ids is None:
+                best_ids = np.empty((len(block), 0), dtype=np.int64)
+                best_scores = np.empty((len(block), 0), dtype=np.float32)
+            result_ids.append(best_ids)
+            result_scores.append(best_scores)
+        return np.concatenate(result_ids), np.concatenate(result_scores)
+
+    def _search_ivf(self, queries: np.ndarray, k: int, nprobe: int):
+        nprobe = min(nprobe, len(self.centroids))
+        probes, _ = top_k(queries @ self.centroids.T, nprobe, largest=True)
+        k = min(k, len(self))
+        ids_out = np.full((len(queries), k), -1, dtype=np.int64)
+        scores_out = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        tail = (int(self.offsets[-1]), len(self))
+        for row, lists in enumerate(probes):
+            # Score each probed list (and the unlisted tail) in place, without gathering vectors
+            segments = [(self.offsets[i], self.offsets[i + 1]) for i in lists] + [tail]
+            segments = [(start, end) for start, end in segments if end > start]
+            if not segments:
+                continue
+            scores = np.concatenate([np.asarray(self.vectors[start:end]) @ queries[row] for start, end in segments])
+            ids = np.concatenate([self.ids[start:end] for start, end in segments])
+            ids, best = top_k_rows(ids[None, :], scores[None, :], k)
+            ids_out[row, :ids.shape[1]] = ids[0]
+            scores_out[row, :best.shape[1]] = best[0]
+        return ids_out, scores_out
+
+    def save(self, directory: str) -> None:
+        """Write the index as .npy files plus index.json into `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        np.save(os.path.join(directory, "ids.npy"), self.ids)
+        if self.is_trained:
+            np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+            np.save(os.path.join(directory, "offsets.npy"), self.offsets)
+        with open(os.path.join(directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"dimension": self.dimension, "metric": self.metric, "trained": self.is_trained}, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "VectorIndex":
+        """
+        Open an index written by save().
+
+        With mmap=True the vectors stay on disk and are paged in on demand;
+        adding vectors later copies them into memory.
+        """
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            metadata = json.load(f)
+        mode = "r" if mmap else None
+        index = cls(metadata["dimension"], metadata["metric"])
+        index._vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mode)
+        index._ids = np.load(os.path.join(directory, "ids.npy"))
+        index._size = len(index._ids)
+        index._next_id = int(index._ids.max()) + 1 if index._size else 0
+        if metadata["trained"]:
+            index.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            index.offsets = np.load(os.path.join(directory, "offsets.npy"))
+        return index
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    from embed_pipeline import CohereEmbedder
+
+    documents = [
+        "Global cross-Region inference routes requests to regions with available capacity.",
+        "Amazon S3 stores objects in buckets with eleven nines of durability.",
+        "Application inference profiles track usage and cost per tenant.",
+        "AWS Lambda runs code without provisioning servers.",
+        "Prompt caching reduces latency and cost for repeated context.",
+    ]
+    question = "How do I attribute Bedrock spend to each of my customers?"
+
+    try:
+        print(f"🚀 Embedding {len(documents)} documents with Cohere Embed v4...")
+        vectors = CohereEmbedder().embed(documents)
+        index = VectorIndex(vectors.shape[1])
+        index.add(vectors)
+
+        query = CohereEmbedder(input_type="search_query").embed([question])
+        ids, scores = index.search(query, k=2)
+        print(f"\n💬 {question}")
+        for i, score in zip(ids[0], scores[0]):
+            print(f"   ✅ {score:.3f}  {documents[i]}")
+
+        # IVF on a larger synthetic corpus
+        rng = np.random.default_rng(0)
+        corpus = rng.standard_normal((100_000, 256)).astype(np.float32)
+        large = VectorIndex(256)
+        large.add(corpus)
+        large.train(n_lists=256)
+        with tempfile.TemporaryDirectory() as directory:
+            large.save(directory)
+            large = VectorIndex.load(directory)
+            probe = corpus[:32] + 0.1 * rng.standard_normal((32, 256)).astype(np.float32)
+            for nprobe in (None, 8):
+                start = time.perf_counter()
+                found, _ = large.search(probe, k=1, nprobe=nprobe)
+                recall = float(np.mean(found[:, 0] == np.arange(32)))
+                label = "exact" if nprobe is None else f"IVF nprobe={nprobe}"
+                print(f"📊 {label:<15} {1000 * (time.perf_counter() - start):7.1f} ms, recall@1 {recall:.0%}")
+            del large
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Asyncio engine for the Amazon Bedrock Converse and ConverseStream APIs.
+
+Exposes `await engine.converse(...)` and `async for event in
+engine.converse_stream(...)` for Global CRIS model IDs, with thousands of
+requests in flight on one event loop.
+
+boto3 is a blocking library, so instead of running each call on a worker
+thread the engine sends requests over its own non-blocking HTTP/1.1
+transport (asyncio streams with keep-alive connections) and reuses
+botocore's public pieces for everything else:
+
+- the request is built by botocore's serializer from the service model, so
+  parameters are validated and encoded exactly as boto3 would send them
+- it is signed with SigV4Auth using the session's credentials
+- responses and errors are parsed by botocore's parsers (errors raise
+  ClientError), and ConverseStream bodies are decoded with botocore's
+  EventStreamBuffer into the same event dicts boto3 yields
+
+A semaphore bounds the coroutines in flight; each in-flight request holds
+one connection and no thread. Throttling, 5xx responses and connection
+errors are retried with jittered backoff, like botocore's standard mode.
+Cancelling a call (or breaking out of a stream) closes its connection.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import asyncio
+import random
+import ssl
+from collections import deque
+from urllib.parse import urlsplit
+
+import boto3
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest, HeadersDict
+from botocore.eventstream import EventStreamBuffer
+from botocore.exceptions import (
+    ClientError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    EventStreamError,
+    ReadTimeoutError,
+)
+from botocore.parsers import EventStreamJSONParser, create_parser
+from botocore.serialize import create_serializer
+
+from clients import DEFAULT_MAX_ATTEMPTS, get_client
+from rate_limiter import is_throttle
+
+DEFAULT_MAX_CONCURRENCY = 1024
+
+# Bytes read from the socket per call for Content-Length bodies
+_READ_SIZE = 65536
+
+
+class _Response:
+    """Status, headers and body of one HTTP response on a pooled connection."""
+
+    def __init__(self, pool: "_ConnectionPool", reader, writer, status: int, headers: HeadersDict, reusable: bool):
+        self._pool = pool
+        self._reader = reader
+        self._writer = writer
+        self.status = status
+        self.headers = headers
+        self._reusable = reusable
+        self._done = False
+
+    async def _read(self, coro):
+        try:
+            return await asyncio.wait_for(coro, self._pool.read_timeout)
+        except asyncio.TimeoutError:
+            raise ReadTimeoutError(endpoint_url=self._pool.endpoint_url) from None
+        except (OSError, asyncio.IncompleteReadError):
+            raise EndpointConnectionError(endpoint_url=self._pool.endpoint_url) from None
+
+    async def iter_chunks(self):
+        """Yield the body as it arrives; the connection is pooled again once it is read to the end."""
+        try:
+            if self.headers.get("transfer-encoding", "").lower() == "chunked":
+                while True:
+                    size = int((await self._read(self._reader.readline())).split(b";")[0], 16)
+                    if size == 0:
+                        # Skip trailers up to the blank line
+                        while (await self._read(self._reader.readline())) not in (b"\r\n", b""):
+                            pass
+                        break
+                    yield (await self._read(self._reader.readexactly(size + 2)))[:-2]
+            elif "content-length" in self.headers:
+                remaining = int(self.headers["content-length"])
+                while remaining:
+                    data = await self._read(self._reader.read(min(remaining, _READ_SIZE)))
+                    if not data:
+                        raise EndpointConnectionError(endpoint_url=self._pool.endpoint_url)
+                    remaining -= len(data)
+                    yield data
+            else:
+                self._reusable = False
+                while data := await self._read(self._reader.read(_READ_SIZE)):
+                    yield data
+            self._done = True
+        finally:
+            self.release()
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_chunks()])
+
+    def release(self) -> None:
+        """Return the connection to the pool if the body was read completely, otherwise close it."""
+        if self._writer is None:
+            return
+        if self._done and self._reusable:
+            self._pool._release(self._reader, self._writer)
+        else:
+            self._writer.close()
+        self._writer = None
+
+
+class _ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one endpoint, driven by asyncio streams."""
+
+    def __init__(self, endpoint_url: str, connect_timeout: float, read_timeout: float, max_idle: int):
+        self.endpoint_url = endpoint_url
+        parts = urlsplit(endpoint_url)
+        self.secure = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.secure else 80)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_idle = max_idle
+        self._ssl = ssl.create_default_context() if self.secure else None
+        self._idle = deque()
+
+    async def _connect(self):
+        try:
+            return await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self._ssl), self.connect_timeout
+            )
+        except asyncio.TimeoutError:
+            raise ConnectTimeoutError(endpoint_url=self.endpoint_url) from None
+        except OSError:
+            raise EndpointConnectionError(endpoint_url=self.endpoint_url) from None
+
+    def _release(self, reader, writer) -> None:
+        if len(self._idle) < self.max_idle and not writer.is_closing():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def request(self, method: str, path: str, headers: dict, body: bytes) -> _Response:
+        """Send a request and read the status line and headers; the body is read from the response."""
+        head = f"{method} {path} HTTP/1.1\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        payload = head.encode("latin-1") + b"\r\n" + body
+        while True:
+            reused = bool(self._idle)
+            reader, writer = self._idle.pop() if reused else await self._connect()
+            try:
+                writer.write(payload)
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), self.read_timeout)
+                if not status_line:
+                    raise ConnectionResetError("connection closed before the response")
+                version, status = status_line.split(b" ", 2)[:2]
+                status = int(status)
+                response_headers = HeadersDict()
+                while (line := await asyncio.wait_for(reader.readline(), self.read_timeout)) not in (b"\r\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    response_headers[name.strip()] = value.strip()
+            except asyncio.TimeoutError:
+                writer.close()
+                raise ReadTimeoutError(endpoint_url=self.endpoint_url) from None
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                writer.close()
+                # The server may close an idle keep-alive connection at any time: retry on a fresh one
+                if reused:
+                    continue
+                raise EndpointConnectionError(endpoint_url=self.endpoint_url) from None
+            except BaseException:
+                writer.close()
+                raise
+            reusable = version == b"HTTP/1.1" and response_headers.get("connection", "").lower() != "close"
+            return _Response(self, reader, writer, status, response_headers, reusable)
+
+    def close(self) -> None:
+        while self._idle:
+            self._idle.pop()[1].close()
+
+
+class AsyncBedrockEngine:
+    """Run Converse / ConverseStream calls concurrently on an asyncio loop."""
+
+    def __init__(
+        self,
+        region: str | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        client=None,
+        profile: str | None = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ):
+        """
+        Args:
+            region: AWS region for the bedrock-runtime endpoint
+            max_concurrency: Maximum number of requests in flight (and of
+                open connections); no threads are used per request
+            client: Optional bedrock-runtime client whose service model,
+                region, endpoint and timeouts are used (it is never called)
+            profile: Named AWS credentials profile used for signing
+            max_attempts: Total attempts per request, including the first
+        """
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.client = client or get_client("bedrock-runtime", region=region, profile=profile)
+        meta = self.client.meta
+        self._service_model = meta.service_model
+        self._region = meta.region_name
+        self._serializer = create_serializer(self._service_model.metadata["protocol"], include_validation=True)
+        self._parser = create_parser(self._service_model.metadata["protocol"])
+        self._event_parser = EventStreamJSONParser()
+        self._credentials = boto3.Session(profile_name=profile).get_credentials()
+        self._pool = _ConnectionPool(
+            meta.endpoint_url, meta.config.connect_timeout, meta.config.read_timeout, max_idle=max_concurrency
+        )
+        parts = urlsplit(meta.endpoint_url)
+        self._host = parts.netloc if parts.port not in (None, 80, 443) else parts.hostname
+        self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _sign(self, request: dict) -> dict:
+        """Headers of a serialized request, signed with SigV4."""
+        headers = {**request["headers"], "Host": self._host, "Content-Length": str(len(request["body"]))}
+        aws_request = AWSRequest(
+            method=request["method"], url=self._pool.endpoint_url + request["url_path"], data=request["body"], headers=headers
+        )
+        # Frozen credentials refresh (e.g. from an SSO or instance role) only when they are about to expire
+        SigV4Auth(self._credentials.get_frozen_credentials(), self._service_model.signing_name, self._region).add_auth(
+            aws_request
+        )
+        return dict(aws_request.headers.items())
+
+    def _parse(self, operation_model, response: _Response, body: bytes, shape=None) -> dict:
+        response_dict = {
+            "status_code": response.status,
+            "headers": response.headers,
+            "body": body,
+            "context": {"operation_name": operation_model.name},
+        }
+        return self._parser.parse(response_dict, operation_model.output_shape if shape is None else shape)
+
+    async def _send(self, operation: str, params: dict):
+        """
+        Serialize, sign and send a request, retrying throttling, 5xx and connection errors.
+
+        Returns:
+            (operation model, response with a 2xx status and unread body)
+        """
+        operation_model = self._service_model.operation_model(operation)
+        request = self._serializer.serialize_to_request(params, operation_model)
+        for attempt in range(self.max_attempts):
+            last_attempt = attempt == self.max_attempts - 1
+            try:
+                response = await self._pool.request(request["method"], request["url_path"], self._sign(request), request["body"])
+            except (EndpointConnectionError, ConnectTimeoutError):
+                if last_attempt:
+                    raise
+            else:
+                if response.status < 300:
+                    return operation_model, response
+                parsed = self._parse(operation_model, response, await response.read())
+                error = ClientError(parsed, operation_model.name)
+                if last_attempt or not (is_throttle(error) or response.status >= 500):
+                    raise error
+            await asyncio.sleep(random.uniform(0, min(20.0, 0.5 * 2 ** attempt)))  # nosec B311 - jitter, not crypto
+
+    async def converse(self, model_id: str, messages: list, **kwargs) -> dict:
+        """
+        Call the Converse API without blocking the event loop.
+
+        Args:
+            model_id: Global CRIS model ID or inference profile ARN
+            messages: Converse messages list
+            **kwargs: Extra Converse parameters (system, inferenceConfig, ...)
+
+        Returns:
+            Converse API response dict, as boto3 returns it
+        """
+        async with self._get_semaphore():
+            operation_model, response = await self._send("Converse", {"modelId": model_id, "messages": messages, **kwargs})
+            return self._parse(operation_model, response, await response.read())
+
+    async def converse_stream(self, model_id: str, messages: list, **kwargs):
+        """
+        Call the ConverseStream API and yield events as they arrive.
+
+        Breaking out of the loop early, or cancelling the task, closes the
+        connection.
+
+        Args:
+            model_id: Global CRIS model ID or inference profile ARN
+            messages: Converse messages list
+            **kwargs: Extra ConverseStream parameters
+
+        Yields:
+            ConverseStream event dicts (messageStart, contentBlockDelta, ...)
+
+        Raises:
+            EventStreamError: For errors sent inside the stream
+        """
+        async with self._get_semaphore():
+            operation_model, response = await self._send(
+                "ConverseStream", {"modelId": model_id, "messages": messages, **kwargs}
+            )
+            stream_shape = operation_model.output_shape.members["stream"]
+            buffer = EventStreamBuffer()
+            try:
+                async for chunk in response.iter_chunks():
+                    buffer.add_data(chunk)
+                    for message in buffer:
+                        response_dict = message.to_response_dict()
+                        event = self._event_parser.parse(response_dict, stream_shape)
+                        if response_dict["status_code"] != 200:
+                            raise EventStreamError(event, operation_model.name)
+                        if event:
+                            yield event
+            finally:
+                response.release()
+
+    async def close(self) -> None:
+        """Close the idle pooled connections."""
+        self._pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def _demo():
+    """Fan out several prompts and stream one response."""
+    model_id = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
+    prompts = [
+        "Explain cloud computing in 2 sentences.",
+        "What is serverless computing?",
+        "What is a content delivery network?",
+        "What is infrastructure as code?",
+    ]
+
+    async with AsyncBedrockEngine(max_concurrency=16) as engine:
+        print(f"🚀 Sending {len(prompts)} concurrent Converse requests...")
+        responses = await asyncio.gather(
+            *(
+                engine.converse(
+                    model_id,
+                    [{"role": "user", "content": [{"text": prompt}]}],
+                    inferenceConfig={"maxTokens": 200},
+                )
+                for prompt in prompts
+            )
+        )
+        for prompt, response in zip(prompts, responses):
+            text = response["output"]["message"]["content"][0]["text"]
+            print(f"\n📝 {prompt}\n💬 {text}")
+
+        print("\n💬 Streaming Response:")
+        print("-" * 50)
+        async for event in engine.converse_stream(
+            model_id,
+            [{"role": "user", "content": [{"text": prompts[0]}]}],
+            inferenceConfig={"maxTokens": 200},
+        ):
+            if "contentBlockDelta" in event:
+                print(event["contentBlockDelta"]["delta"].get("text", ""), end="", flush=True)
+        print("\n" + "-" * 50)
+        print("✅ Async Global CRIS requests completed successfully!")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(_demo())
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Batched concurrent runner for JSONL files of Bedrock requests.
+
+Each input line is a JSON object describing one request:
+
+    {"id": "q1", "api": "converse", "modelId": "global.anthropic...",
+     "messages": [...], "inferenceConfig": {...}}
+    {"id": "q2", "api": "invoke_model", "modelId": "global.amazon.nova-2-lite-v1:0",
+     "body": {...}}
+
+"api" defaults to "converse"; every other key except "id" is passed straight
+to the API call ("body" is JSON-encoded for invoke_model). Results are written
+to an output JSONL file either in input order or in completion order.
+
+The output file doubles as the checkpoint: on restart, requests that already
+have an "ok" record in the output are skipped, so an interrupted job resumes
+where it stopped. Error records (throttling, timeouts, ...) are removed from
+the output and their requests are run again; their new results are appended
+after the records kept from earlier runs.
+
+Usage:
+    python batch_runner.py prompts.jsonl results.jsonl --concurrency 64
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+
+from clients import get_client
+
+DEFAULT_CONCURRENCY = 32
+ORDER_INPUT = "input"
+ORDER_COMPLETION = "completion"
+
+
+def read_requests(path: str):
+    """
+    Stream requests from a JSONL file.
+
+    Args:
+        path: Input JSONL path
+
+    Yields:
+        (index, request dict) tuples, skipping blank lines
+    """
+    with open(path, encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            yield index, json.loads(line)
+            index += 1
+
+
+def load_checkpoint(path: str) -> set:
+    """
+    Collect the indices that completed successfully in an output file.
+
+    Only "ok" records count as done. Error records are dropped from the file
+    (so the retried request's result replaces them), as is a trailing partial
+    line left by a crash; the file is rewritten atomically when anything is
+    dropped.
+
+    Args:
+        path: Output JSONL path
+
+    Returns:
+        Set of successfully completed request indices
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "rb") as f:
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    kept = []
+    for line in data[:end].splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if record.get("status") == "ok" and record["index"] not in done:
+            done.add(record["index"])
+            kept.append(line)
+
+    if len(kept) != data[:end].count(b"\n") or end != len(data):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(line + b"\n" for line in kept)
+        os.replace(tmp_path, path)
+    return done
+
+
+def execute_request(client, request: dict) -> dict:
+    """
+    Execute one Converse or InvokeModel request.
+
+    Args:
+        client: Bedrock runtime client
+        request: Request dict from the input file (without "id")
+
+    Returns:
+        Response payload (ResponseMetadata removed, InvokeModel body decoded)
+    """
+    params = dict(request)
+    api = params.pop("api", "converse")
+
+    if api == "converse":
+        response = client.converse(**params)
+        response.pop("ResponseMetadata", None)
+        return response
+
+    if api == "invoke_model":
+        body = params.pop("body")
+        if not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+        params.setdefault("contentType", "application/json")
+        response = client.invoke_model(body=body, **params)
+        return json.loads(response["body"].read())
+
+    raise ValueError(f"Unsupported api: {api}")
+
+
+def _run_one(client, index: int, request: dict) -> dict:
+    """Run one request and wrap the outcome in a result record."""
+    request = dict(request)
+    record = {"index": index, "id": request.pop("id", index)}
+    try:
+        record["response"] = execute_request(client, request)
+        record["status"] = "ok"
+    except ClientError as e:
+        record["status"] = "error"
+        record["error"] = {
+            "code": e.response.get("Error", {}).get("Code", "Unknown"),
+            "message": e.response.get("Error", {}).get("Message", str(e)),
+        }
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = {"code": type(e).__name__, "message": str(e)}
+    return record
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    order: str = ORDER_INPUT,
+    resume: bool = True,
+    client=None,
+    on_result=None,
+) -> dict:
+    """
+    Run every request in a JSONL file with bounded parallelism.
+
+    At most `concurrency` requests are in flight, and at most twice that many
+    results are held in memory while waiting for earlier ones in input order.
+
+    Args:
+        input_path: Input JSONL path
+        output_path: Output JSONL path (also used as the checkpoint)
+        concurrency: Maximum number of requests in flight
+        order: "input" to keep input order, "completion" to write as results arrive
+        resume: Skip requests with an "ok" record in the output file and
+            retry the ones that failed
+        client: Optional bedrock-runtime client
+        on_result: Optional callback invoked with each result record
+
+    Returns:
+        Summary dict with ok / error / skipped counts
+    """
+    if order not in (ORDER_INPUT, ORDER_COMPLETION):
+        raise ValueError(f"order must be '{ORDER_INPUT}' or '{ORDER_COMPLETION}'")
+
+    client = client or get_client("bedrock-runtime", max_pool_connections=concurrency)
+    done = load_checkpoint(output_path) if resume else set()
+    summary = {"ok": 0, "error": 0, "skipped": 0}
+    window = concurrency * 2
+
+    pending = set()
+    buffered = {}  # index -> record, waiting for earlier indices (input order)
+    order_queue = []  # indices in submission order (input order)
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="bedrock-batch"
+    ) as executor:
+
+        def write(record):
+            out.write(json.dumps(record, default=str) + "\n")
+            summary[record["status"]] += 1
+            if on_result:
+                on_result(record)
+
+        def collect(block: bool):
+            nonlocal pending
+            if not pending:
+                return
+            finished, pending = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                if order == ORDER_COMPLETION:
+                    write(record)
+                else:
+                    buffered[record["index"]] = record
+            # Flush the contiguous prefix of completed records
+            while order_queue and order_queue[0] in buffered:
+                write(buffered.pop(order_queue.pop(0)))
+            out.flush()
+
+        for index, request in read_requests(input_path):
+            if index in done:
+                summary["skipped"] += 1
+                continue
+            while len(pending) + len(buffered) >= window:
+                collect(block=True)
+            pending.add(executor.submit(_run_one, client, index, request))
+            if order == ORDER_INPUT:
+                order_queue.append(index)
+            collect(block=False)
+
+        while pending:
+            collect(block=True)
+
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of Bedrock requests concurrently")
+    parser.add_argument("input", help="Input JSONL file of Converse / InvokeModel requests")
+    parser.add_argument("output", help="Output JSONL file (also used to resume)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--order", choices=[ORDER_INPUT, ORDER_COMPLETION], default=ORDER_INPUT)
+    parser.add_argument("--region", default=None)
+    parser.add_argument("--no-resume", action="store_true", help="Overwrite the output file")
+    args = parser.parse_args()
+
+    client = get_client("bedrock-runtime", region=args.region, max_pool_connections=args.concurrency)
+    print(f"🚀 Running {args.input} with concurrency {args.concurrency} ({args.order} order)")
+    summary = run_batch(
+        args.input,
+        args.output,
+        concurrency=args.concurrency,
+        order=args.order,
+        resume=not args.no_resume,
+        client=client,
+    )
+    print(f"✅ Completed: {summary['ok']} ok, {summary['error']} errors, {summary['skipped']} skipped (already done)")
+    if summary["error"]:
+        print("🔁 Run the same command again to retry the failed requests")
+    print(f"📁 Results: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Client-side benchmark of Converse vs InvokeModel vs their streaming variants.
+
+Runs every API x model combination (Claude Haiku 4.5, Sonnet 4.5, Sonnet 4.6,
+Opus 4.5, Opus 4.6 and Nova 2 Lite) against the local stand-in server and
+reports, per combination:
+
+- p50 / p95 / p99 wall-clock latency
+- CPU time per request on the calling thread
+- serialization cost (botocore request build + json.dumps of native bodies)
+- deserialization cost (botocore response parsing, including the event
+  stream decoding done while a stream is iterated and the loopback reads
+  interleaved with it, + json.loads of native bodies and stream chunks)
+- peak RSS of the process that ran the combination
+
+Each combination runs in a fresh process so its peak RSS is not polluted by
+earlier runs. With the default zero TTFT and unpaced tokens, latency is pure
+client + loopback overhead.
+
+Usage:
+    python benchmark.py --requests 200 --output-tokens 500
+    python benchmark.py --endpoint-url http://127.0.0.1:8787 --json results.json
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from local_server import StandInConfig, start_server
+from metrics import percentile
+
+MODELS = {
+    "Claude Haiku 4.5": "global.anthropic.claude-haiku-4-5-20251001-v1:0",
+    "Claude Sonnet 4.5": "global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+    "Claude Sonnet 4.6": "global.anthropic.claude-sonnet-4-6",
+    "Claude Opus 4.5": "global.anthropic.claude-opus-4-5-20251101-v1:0",
+    "Claude Opus 4.6": "global.anthropic.claude-opus-4-6-v1",
+    "Amazon Nova 2 Lite": "global.amazon.nova-2-lite-v1:0",
+}
+
+APIS = ("converse", "converse_stream", "invoke_model", "invoke_model_stream")
+
+PROMPT = "Explain the benefits of serverless computing in 3 bullet points."
+
+
+def _native_request(model_id: str, prompt: str, max_tokens: int) -> dict:
+    """Build the InvokeModel body for the model family, as the examples do."""
+    if "nova" in model_id:
+        return {
+            "inferenceConfig": {"max_new_tokens": max_tokens, "temperature": 0.7},
+            "messages": [{"role": "user", "content": [{"text": prompt}]}],
+        }
+    return {
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "messages": [{"role": "user", "content": [{"type": "text", "text": prompt}]}],
+    }
+
+
+class _SerdeTimer:
+    """Time botocore serialization and parsing through client events."""
+
+    def __init__(self, client):
+        self.serialize = 0.0
+        self.parse = 0.0
+        self._mark = 0.0
+        events = client.meta.events
+        events.register("provide-client-params.bedrock-runtime.*", self._start_serialize)
+        events.register("before-call.bedrock-runtime.*", self._end_serialize)
+        events.register("before-parse.bedrock-runtime.*", self._start_parse)
+        events.register("after-call.bedrock-runtime.*", self._end_parse)
+
+    def reset(self):
+        self.serialize = self.parse = 0.0
+
+    def _start_serialize(self, **kwargs):
+        self._mark = time.perf_counter()
+
+    def _end_serialize(self, **kwargs):
+        self.serialize += time.perf_counter() - self._mark
+
+    def _start_parse(self, **kwargs):
+        self._mark = time.perf_counter()
+
+    def _end_parse(self, **kwargs):
+        self.parse += time.perf_counter() - self._mark
+
+
+def _timed_events(stream, timer: _SerdeTimer):
+    """
+    Iterate a botocore EventStream, timing each step of its public iterator.
+
+    EventStream decodes and parses lazily during iteration, after the
+    after-call event has fired. The timed steps also include the socket
+    reads; against the unpaced stand-in these are loopback copies of data
+    that has mostly already arrived, so decoding and parsing dominate.
+    """
+    events = iter(stream)
+    while True:
+        start = time.perf_counter()
+        event = next(events, None)
+        timer.parse += time.perf_counter() - start
+        if event is None:
+            return
+        yield event
+
+
+def _call(client, api: str, model_id: str, max_tokens: int, timer: _SerdeTimer) -> None:
+    """Execute one request and consume the full response."""
+    messages = [{"role": "user", "content": [{"text": PROMPT}]}]
+    config = {"maxTokens": max_tokens, "temperature": 0.7}
+
+    if api == "converse":
+        response = client.converse(modelId=model_id, messages=messages, inferenceConfig=config)
+        response["output"]["message"]["content"][0]["text"]
+        return
+
+    if api == "converse_stream":
+        response = client.converse_stream(modelId=model_id, messages=messages, inferenceConfig=config)
+        for event in _timed_events(response["stream"], timer):
+            if "contentBlockDelta" in event:
+                event["contentBlockDelta"]["delta"]["text"]
+        return
+
+    start = time.perf_counter()
+    body = json.dumps(_native_request(model_id, PROMPT, max_tokens))
+    timer.serialize += time.perf_counter() - start
+
+    if api == "invoke_model":
+        response = client.invoke_model(modelId=model_id, body=body, contentType="application/json")
+        raw = response["body"].read()
+        start = time.perf_counter()
+        json.loads(raw)
+        timer.parse += time.perf_counter() - start
+        return
+
+    response = client.invoke_model_with_response_stream(
+        modelId=model_id, body=body, contentType="application/json"
+    )
+    for event in _timed_events(response["body"], timer):
+        raw = event["chunk"]["bytes"]
+        start = time.perf_counter()
+        json.loads(raw)
+        timer.parse += time.perf_counter() - start
+
+
+def run_combination(endpoint_url: str, api: str, model_id: str, requests: int, warmup: int, max_tokens: int) -> dict:
+    """
+    Benchmark one API x model combination (runs in a worker process).
+
+    Returns:
+        Dict of latency percentiles, mean CPU / serde cost and peak RSS
+    """
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "local")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "local")
+    from clients import get_client
+
+    client = get_client("bedrock-runtime", endpoint_url=endpoint_url, max_attempts=1)
+    timer = _SerdeTimer(client)
+
+    for _ in range(warmup):
+        _call(client, api, model_id, max_tokens, timer)
+
+    latencies, cpu_times, serialize_times, parse_times = [], [], [], []
+    for _ in range(requests):
+        timer.reset()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        _call(client, api, model_id, max_tokens, timer)
+        cpu_times.append((time.thread_time() - cpu_start) * 1000)
+        latencies.append((time.perf_counter() - wall_start) * 1000)
+        serialize_times.append(timer.serialize * 1000)
+        parse_times.append(timer.parse * 1000)
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == "darwin" else peak_rss / 1024
+
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "cpu_ms": sum(cpu_times) / len(cpu_times),
+        "serialize_ms": sum(serialize_times) / len(serialize_times),
+        "parse_ms": sum(parse_times) / len(parse_times),
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_benchmark(
+    endpoint_url: str,
+    requests: int = 100,
+    warmup: int = 5,
+    max_tokens: int = 500,
+    models: dict | None = None,
+    apis: tuple = APIS,
+) -> list:
+    """
+    Benchmark every API x model combination, each in a fresh process.
+
+    Returns:
+        List of result dicts with "model", "api" and the measured stats
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for model_name, model_id in (models or MODELS).items():
+        for api in apis:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                stats = executor.submit(
+                    run_combination, endpoint_url, api, model_id, requests, warmup, max_tokens
+                ).result()
+            results.append({"model": model_name, "api": api, **stats})
+            print(
+                f"   {model_name:<20} {api:<20} p50 {stats['p50_ms']:7.2f} ms"
+                f"  p99 {stats['p99_ms']:7.2f} ms  cpu {stats['cpu_ms']:6.2f} ms"
+            )
+    return results
+
+
+def print_table(results: list) -> None:
+    header = (
+        f"{'Model':<20} {'API':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        f" {'CPU ms':>8} {'ser ms':>8} {'parse ms':>9} {'RSS MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['model']:<20} {r['api']:<20} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f}"
+            f" {r['cpu_ms']:8.2f} {r['serialize_ms']:8.3f} {r['parse_ms']:9.3f} {r['peak_rss_mb']:8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Bedrock runtime API styles per model family")
+    parser.add_argument("--endpoint-url", default=None, help="Existing stand-in endpoint; starts one in-process if omitted")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--output-tokens", type=int, default=200)
+    parser.add_argument("--ttft-ms", type=float, default=0.0)
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="0 disables pacing")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to a JSON file")
+    args = parser.parse_args()
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        server, endpoint_url = start_server(
+            StandInConfig(
+                ttft_ms=args.ttft_ms,
+                tokens_per_second=args.tokens_per_second,
+                output_tokens=args.output_tokens,
+                seed=42,
+            )
+        )
+
+    print(f"📊 Benchmarking {len(MODELS)} models x {len(APIS)} APIs against {endpoint_url}")
+    print(f"   {args.requests} requests per combination, {args.output_tokens} output tokens")
+    try:
+        results = run_benchmark(endpoint_url, args.requests, args.warmup, args.output_tokens)
+    finally:
+        if server:
+            server.shutdown()
+
+    print()
+    print_table(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Results written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Shared AWS client factory for Amazon Bedrock Global CRIS examples.
+
+Clients are created once per (service, region, profile) and reused, so the
+connection pool, TLS sessions and endpoint resolution are shared across calls
+and threads instead of being rebuilt by every script at import time.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+# Default source region used by the examples (Mumbai)
+DEFAULT_REGION = "ap-south-1"
+
+# botocore defaults to 10 pooled connections, which caps concurrency at 10
+DEFAULT_MAX_POOL_CONNECTIONS = 64
+DEFAULT_CONNECT_TIMEOUT = 5
+# Long thinking / streaming responses can take minutes
+DEFAULT_READ_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_MODE = "standard"
+
+# Point bedrock-runtime clients at a different endpoint (e.g. a local stand-in)
+ENDPOINT_URL_ENV = "BEDROCK_RUNTIME_ENDPOINT_URL"
+
+_clients = {}
+_sessions = {}
+_lock = threading.Lock()
+
+
+def build_config(
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    read_timeout: float = DEFAULT_READ_TIMEOUT,
+    tcp_keepalive: bool = True,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    retry_mode: str = DEFAULT_RETRY_MODE,
+) -> Config:
+    """
+    Build a botocore Config tuned for high-concurrency Bedrock traffic.
+
+    Args:
+        max_pool_connections: Size of the urllib3 connection pool
+        connect_timeout: Seconds to wait when opening a connection
+        read_timeout: Seconds to wait for data on an open connection
+        tcp_keepalive: Enable TCP keepalive on pooled sockets
+        max_attempts: Total attempts including the first call
+        retry_mode: botocore retry mode ("standard", "adaptive" or "legacy")
+
+    Returns:
+        botocore Config instance
+    """
+    return Config(
+        max_pool_connections=max_pool_connections,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        tcp_keepalive=tcp_keepalive,
+        retries={"total_max_attempts": max_attempts, "mode": retry_mode},
+    )
+
+
+def _get_session(profile: str | None) -> boto3.Session:
+    """Return a cached boto3 session for the profile (caller holds the lock)."""
+    session = _sessions.get(profile)
+    if session is None:
+        session = boto3.Session(profile_name=profile)
+        _sessions[profile] = session
+    return session
+
+
+def get_client(
+    service: str = "bedrock-runtime",
+    region: str | None = None,
+    profile: str | None = None,
+    endpoint_url: str | None = None,
+    **config_options,
+):
+    """
+    Return a cached, thread-safe boto3 client.
+
+    boto3 sessions are not thread-safe, but the clients they create are, so
+    creation happens under a lock and the resulting client is shared.
+
+    Args:
+        service: AWS service name (e.g. "bedrock-runtime", "bedrock", "s3")
+        region: AWS region, defaults to AWS_REGION or ap-south-1
+        profile: Named AWS credentials profile, defaults to the environment
+        endpoint_url: Override endpoint URL; bedrock-runtime also honours
+            the BEDROCK_RUNTIME_ENDPOINT_URL environment variable
+        **config_options: Overrides passed to build_config()
+
+    Returns:
+        Boto3 client for the service
+    """
+    region = region or os.getenv("AWS_REGION") or DEFAULT_REGION
+    if endpoint_url is None and service == "bedrock-runtime":
+        endpoint_url = os.getenv(ENDPOINT_URL_ENV) or None
+
+    key = (service, region, profile, endpoint_url, tuple(sorted(config_options.items())))
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            session = _get_session(profile)
+            client = session.client(
+                service,
+                region_name=region,
+                endpoint_url=endpoint_url,
+                config=build_config(**config_options),
+            )
+            _clients[key] = client
+    return client
+
+
+def clear_clients() -> None:
+    """Drop all cached clients and sessions (e.g. after fork or credential rotation)."""
+    with _lock:
+        _clients.clear()
+        _sessions.clear()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Persistent conversation store with incremental request serialization.
+
+Long agent sessions resend the whole history on every turn. Keeping the
+history as a list of dicts means re-encoding every message each time, and
+the session is lost when the process exits. ConversationStore keeps each
+message as the JSON bytes it was encoded to when it was appended:
+
+- messages are encoded exactly once and stored in SQLite, so a session can
+  be resumed after a restart without re-encoding anything
+- request bodies are assembled by joining the cached bytes into a
+  RequestTemplate (see request_templates.py), so a turn costs only the
+  encoding of the new message
+- when the model returns a `compaction` block, every message before it is
+  dropped (the API ignores them anyway), so the stored history shrinks
+  along with the context
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import sqlite3
+import threading
+import time
+
+from request_templates import RequestTemplate, dumps, loads
+
+
+def compaction_index(content) -> int | None:
+    """Index of the last compaction block in an assistant message's content."""
+    if not isinstance(content, list):
+        return None
+    for i in range(len(content) - 1, -1, -1):
+        if content[i].get("type") == "compaction":
+            return i
+    return None
+
+
+class Conversation:
+    """One session's messages, held as encoded JSON bytes."""
+
+    def __init__(self, store: "ConversationStore", session_id: str, rows: list):
+        self.store = store
+        self.session_id = session_id
+        self._encoded = [encoded for (encoded,) in rows]
+        self.stats = {"encoded_bytes": 0, "compactions": 0}
+
+    def __len__(self) -> int:
+        return len(self._encoded)
+
+    def append(self, message: dict) -> None:
+        """Encode and persist one message."""
+        encoded = dumps(message)
+        self.store._insert(self.session_id, encoded)
+        self._encoded.append(encoded)
+        self.stats["encoded_bytes"] += len(encoded)
+
+    def append_user(self, content) -> None:
+        """Append a user turn (a string or content blocks)."""
+        self.append({"role": "user", "content": content})
+
+    def append_response(self, model_response: dict) -> bool:
+        """
+        Append an Anthropic InvokeModel response as the assistant turn.
+
+        If the response contains a compaction block, all earlier messages are
+        replaced, in one transaction, by an assistant turn holding only the
+        blocks from the compaction block on.
+
+        Returns:
+            True if the response was compacted
+        """
+        content = model_response["content"]
+        index = compaction_index(content)
+        if index is None:
+            self.append({"role": "assistant", "content": content})
+            return False
+
+        encoded = dumps({"role": "assistant", "content": content[index:]})
+        self.store._replace(self.session_id, [encoded])
+        self._encoded = [encoded]
+        self.stats["encoded_bytes"] = len(encoded)
+        self.stats["compactions"] += 1
+        return True
+
+    def replace(self, messages: list) -> None:
+        """Replace the whole history with `messages` (e.g. a client-side summary) in one transaction."""
+        encoded = [dumps(message) for message in messages]
+        self.store._replace(self.session_id, encoded)
+        self._encoded = encoded
+        self.stats["encoded_bytes"] = sum(len(item) for item in encoded)
+
+    def encoded_messages(self) -> list:
+        """Encoded messages, oldest first (a copy of the list, not the bytes)."""
+        return list(self._encoded)
+
+    def messages(self) -> list:
+        """Decoded messages, oldest first."""
+        return [loads(encoded) for encoded in self._encoded]
+
+    def render(self, template: RequestTemplate) -> bytes:
+        """Request body with this conversation spliced into the template's `messages` slot."""
+        return template.render_encoded(messages=self._encoded)
+
+    def clear(self) -> None:
+        """Delete every message in the session."""
+        self.store._delete(self.session_id)
+        self._encoded = []
+
+
+class ConversationStore:
+    """Thread-safe SQLite store of conversations."""
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a throwaway store)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            "session_id TEXT NOT NULL, seq INTEGER NOT NULL, encoded BLOB NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (session_id, seq))"
+        )
+        self._conn.commit()
+        self._sessions = {}
+
+    def session(self, session_id: str) -> Conversation:
+        """Open a session, loading its stored messages (created on first append)."""
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                rows = self._conn.execute(
+                    "SELECT encoded FROM messages WHERE session_id = ? ORDER BY seq", (session_id,)
+                ).fetchall()
+                conversation = self._sessions[session_id] = Conversation(self, session_id, rows)
+            return conversation
+
+    def sessions(self) -> list:
+        """IDs of all stored sessions."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT DISTINCT session_id FROM messages")]
+
+    def _insert(self, session_id: str, encoded: bytes) -> None:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)).fetchone()
+            seq = 0 if row[0] is None else row[0] + 1
+            self._conn.execute(
+                "INSERT INTO messages (session_id, seq, encoded, created) VALUES (?, ?, ?, ?)",
+                (session_id, seq, encoded, time.time()),
+            )
+            self._conn.commit()
+
+    def _replace(self, session_id: str, encoded_messages: list) -> None:
+        """Replace a session's messages in a single transaction."""
+        now = time.time()
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+                self._conn.executemany(
+                    "INSERT INTO messages (session_id, seq, encoded, created) VALUES (?, ?, ?, ?)",
+                    [(session_id, seq, encoded, now) for seq, encoded in enumerate(encoded_messages)],
+                )
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def _delete(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import json
+
+    from request_templates import anthropic_template
+
+    template = anthropic_template(max_tokens=4096, system="You are a meticulous AWS solutions architect.")
+    store = ConversationStore()
+    conversation = store.session("benchmark")
+
+    # 400 messages of history, as an agent session near a 100k-token trigger would have
+    history = []
+    for i in range(200):
+        history.append({"role": "user", "content": f"Question {i}: how should we shard table {i}? " * 5})
+        history.append({"role": "assistant", "content": [{"type": "text", "text": f"Answer {i}: " + "use a composite key. " * 40}]})
+    for message in history:
+        conversation.append(message)
+
+    try:
+        new_turn = {"role": "user", "content": "Summarize the sharding plan."}
+        conversation.append(new_turn)
+        start = time.perf_counter()
+        for _ in range(100):
+            json.dumps({"anthropic_version": "bedrock-2023-05-31", "max_tokens": 4096, "messages": [*history, new_turn]})
+        full = (time.perf_counter() - start) * 10
+        start = time.perf_counter()
+        for _ in range(100):
+            conversation.render(template)
+        incremental = (time.perf_counter() - start) * 10
+        print(f"⚡ Request body for a {len(conversation)}-message session")
+        print(f"   📊 json.dumps of the full history: {full:6.2f} ms per turn")
+        print(f"   📊 Cached message bytes:           {incremental:6.2f} ms per turn")
+
+        compacted = conversation.append_response(
+            {"content": [{"type": "compaction", "content": "Summary of the sharding discussion."},
+                         {"type": "text", "text": "Use composite keys per tenant."}]}
+        )
+        print(f"📦 Compaction returned: {compacted}, messages kept: {len(conversation)}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
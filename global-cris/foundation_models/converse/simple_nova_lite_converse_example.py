@@ -7,10 +7,14 @@ Author: Navule Pavan Kumar Rao
 Date: January 13, 2026
 """
 
-import boto3
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
 
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Amazon Nova 2 Lite
 MODEL_ID = "global.amazon.nova-2-lite-v1:0"
@@ -10,11 +10,15 @@ Author: Navule Pavan Kumar Rao
 Date: March 3, 2026
 """
 
-import boto3
+import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Claude Opus 4.6
 MODEL_ID = "global.anthropic.claude-opus-4-6-v1"
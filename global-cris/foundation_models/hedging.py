@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Hedged requests across Global CRIS and geographic CRIS profiles.
+
+A request is sent to the `global.` profile first. If it has not completed
+after a hedge delay (the recent p95 latency for that model), a duplicate is
+sent to a geographic profile (`apac.`, `us.`, `eu.`, ...) or the base model
+ID, and the first successful response wins.
+
+- hedged_converse(): the first full response wins; the slower call's result
+  is discarded (an in-flight boto3 call cannot be aborted)
+- hedged_converse_stream(): the first stream to produce an event wins and the
+  other stream is closed
+- errors caused by the request itself (ValidationException) are raised at
+  once instead of being repeated against the hedge target
+- full-response latencies and first-event latencies are kept apart, and a
+  slow primary's latency is recorded even when the hedge wins, so the delay
+  tracks the primary's real tail rather than only the winners
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+
+from metrics import percentile
+
+# Geographic CRIS prefixes that can replace "global."
+GEO_PREFIXES = ("us", "eu", "apac", "jp", "au", "ca", "us-gov")
+
+DEFAULT_HEDGE_DELAY = 2.0
+
+# Errors caused by the request itself: a hedge would fail the same way
+REQUEST_ERROR_CODES = {"ValidationException"}
+
+
+def is_request_error(error: Exception) -> bool:
+    """True if an error would recur on any target, so hedging cannot help."""
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in REQUEST_ERROR_CODES
+
+
+def stream_key(model_id: str) -> str:
+    """HedgePolicy key for first-event latencies, kept apart from full-response latencies."""
+    return f"{model_id}:stream"
+
+
+def geo_profile_for(model_id: str, geo: str | None = "apac") -> str:
+    """
+    Derive the geographic counterpart of a Global CRIS model ID.
+
+    Args:
+        model_id: e.g. "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
+        geo: Geographic prefix ("apac", "us", "eu", ...) or None for the
+            base (in-region) model ID
+
+    Returns:
+        e.g. "apac.anthropic.claude-sonnet-4-5-20250929-v1:0"
+    """
+    prefix, _, base = model_id.partition(".")
+    if prefix != "global" and prefix not in GEO_PREFIXES:
+        base = model_id
+    return f"{geo}.{base}" if geo else base
+
+
+class HedgePolicy:
+    """Per-model hedge delay derived from a rolling window of latencies."""
+
+    def __init__(
+        self,
+        percentile_target: float = 95,
+        window: int = 200,
+        min_samples: int = 20,
+        initial_delay: float = DEFAULT_HEDGE_DELAY,
+        min_delay: float = 0.05,
+        executor: ThreadPoolExecutor | None = None,
+    ):
+        """
+        Args:
+            percentile_target: Latency percentile used as the hedge delay
+            window: Number of recent latencies kept per model
+            min_samples: Samples needed before the percentile is trusted
+            initial_delay: Delay (seconds) used until then
+            min_delay: Lower bound on the delay (seconds)
+            executor: Thread pool running the requests; by default one is
+                created on first use, sized to the client's connection pool
+        """
+        self.percentile_target = percentile_target
+        self.window = window
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.executor = executor
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "hedged": 0, "hedge_won": 0, "request_errors": 0}
+
+    def record(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def delay(self, key: str) -> float:
+        """Seconds to wait before sending the hedge request."""
+        with self._lock:
+            samples = list(self._latencies.get(key, ()))
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, percentile(samples, self.percentile_target))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+
+    def _executor_for(self, client) -> ThreadPoolExecutor:
+        """The injected executor, or one with a worker per pooled connection of `client`."""
+        with self._lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=client.meta.config.max_pool_connections, thread_name_prefix="bedrock-hedge"
+                )
+            return self.executor
+
+
+def hedged_converse(client, policy: HedgePolicy, model_id: str, hedge_model_id: str | None = None, **kwargs) -> dict:
+    """
+    Converse with a hedge request to a geographic profile.
+
+    Args:
+        client: Bedrock runtime client
+        policy: HedgePolicy providing the delay and collecting latencies
+        model_id: Primary (Global CRIS) model ID
+        hedge_model_id: Hedge target, defaults to geo_profile_for(model_id)
+        **kwargs: Other converse() parameters
+
+    Returns:
+        The first successful converse() response; the model ID that won is
+        stored under response["hedge"]["modelId"]
+
+    Raises:
+        ClientError: At once for request errors (see REQUEST_ERROR_CODES),
+            otherwise the last error once both calls have failed
+    """
+    hedge_model_id = hedge_model_id or geo_profile_for(model_id)
+    executor = policy._executor_for(client)
+    policy._count("requests")
+
+    def call(target):
+        sent = time.perf_counter()
+        response = client.converse(modelId=target, **kwargs)
+        # Recorded even if the other call already won, so a slow primary still counts
+        policy.record(target, time.perf_counter() - sent)
+        return target, response
+
+    pending = {executor.submit(call, model_id)}
+    finished, pending = wait(pending, timeout=policy.delay(model_id))
+    hedged = False
+    last_error = None
+
+    while True:
+        for future in finished:
+            try:
+                target, response = future.result()
+            except Exception as e:
+                if is_request_error(e):
+                    for other in pending:
+                        other.cancel()
+                    policy._count("request_errors")
+                    raise
+                last_error = e
+                continue
+            for other in pending:
+                other.cancel()
+            if target == hedge_model_id:
+                policy._count("hedge_won")
+            response["hedge"] = {"modelId": target, "hedged": hedged}
+            return response
+
+        # Primary is slow or failed: send the hedge (once)
+        if not hedged:
+            hedged = True
+            policy._count("hedged")
+            pending.add(executor.submit(call, hedge_model_id))
+        if not pending:
+            raise last_error
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+def hedged_converse_stream(client, policy: HedgePolicy, model_id: str, hedge_model_id: str | None = None, **kwargs):
+    """
+    ConverseStream with a hedge request; the first stream to emit wins.
+
+    The race is decided on the first event (time to first byte). The losing
+    stream is closed as soon as it is known. First-event latencies are kept
+    under stream_key(model_id); when the hedge wins, the primary's elapsed
+    time is recorded as a lower bound of its latency.
+
+    Args:
+        client: Bedrock runtime client
+        policy: HedgePolicy providing the delay and collecting TTFB
+        model_id: Primary (Global CRIS) model ID
+        hedge_model_id: Hedge target, defaults to geo_profile_for(model_id)
+        **kwargs: Other converse_stream() parameters
+
+    Yields:
+        ConverseStream events of the winning request
+
+    Raises:
+        ClientError: At once for request errors (see REQUEST_ERROR_CODES),
+            otherwise the last error once both calls have failed
+    """
+    hedge_model_id = hedge_model_id or geo_profile_for(model_id)
+    executor = policy._executor_for(client)
+    policy._count("requests")
+    start = time.perf_counter()
+    arrivals = queue.Queue()
+    winner = []
+    streams = {}
+    lock = threading.Lock()
+
+    def attempt(target):
+        sent = time.perf_counter()
+        try:
+            stream = client.converse_stream(modelId=target, **kwargs)["stream"]
+            with lock:
+                lost = bool(winner)
+                streams[target] = stream
+            if lost:
+                stream.close()
+                return
+            events = iter(stream)
+            first = next(events)
+        except Exception as e:
+            arrivals.put((target, None, None, None, e))
+            return
+        elapsed = time.perf_counter() - sent
+        with lock:
+            lost = bool(winner)
+            if not lost:
+                winner.append(target)
+        if lost:
+            stream.close()
+        else:
+            policy.record(stream_key(target), elapsed)
+            arrivals.put((target, stream, events, first, None))
+
+    executor.submit(attempt, model_id)
+    attempts = 1
+    hedged = False
+    last_error = None
+    timeout = policy.delay(stream_key(model_id))
+
+    while True:
+        try:
+            target, stream, events, first, error = arrivals.get(timeout=timeout)
+        except queue.Empty:
+            target = error = None
+        if target is not None and error is None:
+            break
+        if error is not None:
+            if is_request_error(error):
+                with lock:
+                    winner.append(None)
+                    others = list(streams.values())
+                for other in others:
+                    other.close()
+                policy._count("request_errors")
+                raise error
+            last_error = error
+            attempts -= 1
+        if not hedged:
+            hedged = True
+            policy._count("hedged")
+            executor.submit(attempt, hedge_model_id)
+            attempts += 1
+        elif attempts == 0:
+            raise last_error
+        timeout = None
+
+    # Close the losing stream even if it is still waiting for its first event
+    with lock:
+        losers = [s for t, s in streams.items() if t != target]
+    for loser in losers:
+        loser.close()
+
+    if target == hedge_model_id:
+        policy._count("hedge_won")
+        # The primary had not produced an event by now: a lower bound of its latency
+        policy.record(stream_key(model_id), time.perf_counter() - start)
+    try:
+        yield first
+        yield from events
+    finally:
+        stream.close()
+
+
+if __name__ == "__main__":
+    from clients import get_client
+
+    MODEL_ID = "global.anthropic.claude-opus-4-5-20251101-v1:0"
+    bedrock = get_client("bedrock-runtime")
+    policy = HedgePolicy(initial_delay=3.0)
+    messages = [{"role": "user", "content": [{"text": "Summarise the benefits of Global CRIS in one sentence."}]}]
+
+    print("🌍 Hedged requests: Global CRIS first, geographic CRIS after the hedge delay")
+    print(f"🚀 Primary: {MODEL_ID}")
+    print(f"🛡️  Hedge:   {geo_profile_for(MODEL_ID)}")
+    try:
+        response = hedged_converse(bedrock, policy, MODEL_ID, messages=messages)
+        print(f"\n💬 {response['output']['message']['content'][0]['text']}")
+        print(f"🏁 Served by: {response['hedge']['modelId']} (hedged: {response['hedge']['hedged']})")
+
+        print("\n💬 Streaming Response:")
+        print("-" * 50)
+        for event in hedged_converse_stream(bedrock, policy, MODEL_ID, messages=messages):
+            if "contentBlockDelta" in event:
+                print(event["contentBlockDelta"]["delta"].get("text", ""), end="", flush=True)
+        print("\n" + "-" * 50)
+        print(f"📊 Hedge stats: {policy.stats}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
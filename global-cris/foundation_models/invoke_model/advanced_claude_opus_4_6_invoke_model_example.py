@@ -15,11 +15,19 @@ Date: March 3, 2026
 """
 
 import json
-import boto3
+import os
+import sys
+import tempfile
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+from conversation_store import ConversationStore
+from request_templates import anthropic_template
+from token_estimator import ConversationTokens, TokenEstimator, choose_max_tokens, should_compact
+
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Claude Opus 4.6
 MODEL_ID = "global.anthropic.claude-opus-4-6-v1"
@@ -137,50 +145,90 @@ def demo_compaction():
     print("\n💡 Compaction is in beta - requires anthropic_beta header")
     print("💡 Only works with InvokeModel (not Converse API during beta)")
     
-    messages = []
+    # Messages are encoded once and persisted; start the demo from an empty session
+    store = ConversationStore(os.path.join(tempfile.gettempdir(), "opus_4_6_conversations.sqlite3"))
+    conversation = store.session("demo-compaction")
+    conversation.clear()
+    # Running input token estimate, calibrated by each response's usage
+    tokens = ConversationTokens(TokenEstimator(), MODEL_ID)
+    # Constant request fields are encoded once per trigger threshold and max_tokens
+    templates = {}
+    
+    def template_for(trigger_threshold: int, max_tokens: int):
+        """Request template with compaction enabled, built once per settings."""
+        template = templates.get((trigger_threshold, max_tokens))
+        if template is None:
+            template = templates[(trigger_threshold, max_tokens)] = anthropic_template(
+                max_tokens=max_tokens,
+                anthropic_beta=["compact-2026-01-12"],
+                context_management={
+                    "edits": [{
+                        "type": "compact_20260112",
+                        "trigger": {
+                            "type": "input_tokens",
+                            "value": trigger_threshold
+                        }
+                    }]
+                }
+            )
+        return template
+    
+    def compact_history(user_message: str):
+        """Summarize the history before the pending user turn and replace it with the summary."""
+        history = conversation.messages()[:-1]
+        response = bedrock.invoke_model(
+            modelId=MODEL_ID,
+            body=json.dumps({
+                "anthropic_version": "bedrock-2023-05-31",
+                "max_tokens": 4096,
+                "messages": history + [{
+                    "role": "user",
+                    "content": "Summarize our conversation so far, keeping every decision and open question."
+                }]
+            }),
+            contentType="application/json"
+        )
+        summary = next(
+            block["text"] for block in json.loads(response["body"].read())["content"] if block["type"] == "text"
+        )
+        conversation.replace([{
+            "role": "user",
+            "content": f"Summary of our conversation so far:\n{summary}\n\n{user_message}"
+        }])
+        tokens.reset()
     
     def chat(user_message: str, trigger_threshold: int = 100000):
         """Send a message with compaction enabled."""
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+        conversation.append_user(user_message)
         
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "anthropic_beta": ["compact-2026-01-12"],
-            "max_tokens": 4096,
-            "messages": messages,
-            "context_management": {
-                "edits": [{
-                    "type": "compact_20260112",
-                    "trigger": {
-                        "type": "input_tokens",
-                        "value": trigger_threshold
-                    }
-                }]
-            }
-        }
+        # Size the request before sending it: leave room for the answer in the context window
+        body = conversation.render(template_for(trigger_threshold, 4096))
+        estimated = tokens.estimate(body)
+        max_tokens = choose_max_tokens(estimated)
+        if should_compact(estimated, trigger_threshold) or not max_tokens:
+            # Compact before sending rather than overflowing or paying for a compaction round trip
+            print(f"   📏 ~{estimated} input tokens: compacting the history before this turn")
+            compact_history(user_message)
+            body = conversation.render(template_for(trigger_threshold, 4096))
+            estimated = tokens.estimate(body)
+            max_tokens = choose_max_tokens(estimated)
+        if max_tokens != 4096:
+            body = conversation.render(template_for(trigger_threshold, max_tokens))
+        print(f"   Estimated input tokens: {estimated} (max_tokens {max_tokens})")
         
         response = bedrock.invoke_model(
             modelId=MODEL_ID,
-            body=json.dumps(request_body),
+            body=body,
             contentType="application/json"
         )
         
         model_response = json.loads(response["body"].read())
+        tokens.record(body, model_response.get("usage", {}))
         
-        # Append assistant response to maintain conversation
-        messages.append({
-            "role": "assistant",
-            "content": model_response["content"]
-        })
-        
-        # Check for compaction
-        has_compaction = any(
-            block.get("type") == "compaction"
-            for block in model_response["content"]
-        )
+        # Append assistant response; a compaction block drops the messages before it
+        has_compaction = conversation.append_response(model_response)
+        if has_compaction:
+            tokens.reset()
         
         # Extract text response
         text_response = ""
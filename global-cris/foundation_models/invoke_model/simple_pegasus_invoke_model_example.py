@@ -21,12 +21,12 @@ import os
 import tempfile
 import urllib.request
 
-import boto3
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
 from utils import ensure_bedrock_bucket_access
 
 # Load environment variables from .env file
@@ -47,9 +47,9 @@ if not AWS_REGION:
         raise ValueError("AWS region is required")
 
 # Initialize AWS clients with consistent region
-bedrock = boto3.client("bedrock-runtime", region_name=AWS_REGION)
-s3 = boto3.client("s3", region_name=AWS_REGION)
-sts = boto3.client("sts", region_name=AWS_REGION)
+bedrock = get_client("bedrock-runtime", region=AWS_REGION)
+s3 = get_client("s3", region=AWS_REGION)
+sts = get_client("sts", region=AWS_REGION)
 
 # Global CRIS model ID for TwelveLabs Pegasus v1.2
 MODEL_ID = "global.twelvelabs.pegasus-1-2-v1:0"
@@ -13,11 +13,16 @@ Date: March 3, 2026
 """
 
 import json
-import boto3
+import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+from stream_decoder import BLOCK_START, TEXT, THINKING, StreamDecoder
+
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Claude Opus 4.6
 MODEL_ID = "global.anthropic.claude-opus-4-6-v1"
@@ -66,46 +71,30 @@ Consider team size, deployment complexity, and scaling requirements."""
         contentType="application/json"
     )
     
-    # Track what we're currently streaming
-    current_block_type = None
-    thinking_content = ""
-    text_content = ""
+    # Decoder buffers thinking and text; deltas are dispatched by kind
+    decoder = StreamDecoder()
     
-    for event in streaming_response["body"]:
-        chunk = json.loads(event["chunk"]["bytes"])
-        
+    for delta in decoder.iter_stream(streaming_response["body"]):
         # Handle content block start
-        if chunk["type"] == "content_block_start":
-            block = chunk.get("content_block", {})
-            current_block_type = block.get("type")
+        if delta.kind == BLOCK_START:
+            current_block_type = delta.data.get("type")
             if current_block_type == "thinking":
                 print("\n🤔 [Claude's Thinking]:")
             elif current_block_type == "text":
                 print("\n\n📝 [Response]:")
         
-        # Handle content block delta
-        elif chunk["type"] == "content_block_delta":
-            delta = chunk.get("delta", {})
-            delta_type = delta.get("type")
-            
-            if delta_type == "thinking_delta":
-                thinking = delta.get("thinking", "")
-                thinking_content += thinking
-                # Stream thinking in real-time (dimmed for visual distinction)
-                print(f"\033[90m{thinking}\033[0m", end="", flush=True)
-            
-            elif delta_type == "text_delta":
-                text = delta.get("text", "")
-                text_content += text
-                print(text, end="", flush=True)
+        # Stream thinking in real-time (dimmed for visual distinction)
+        elif delta.kind == THINKING:
+            print(f"\033[90m{delta.text}\033[0m", end="", flush=True)
         
-        # Handle message delta (contains usage info)
-        elif chunk["type"] == "message_delta":
-            pass  # Usage info available here
+        elif delta.kind == TEXT:
+            print(delta.text, end="", flush=True)
     
     print("\n" + "-" * 50)
-    print(f"\n📊 Thinking length: {len(thinking_content)} characters")
-    print(f"📊 Response length: {len(text_content)} characters")
+    print(f"\n📊 Thinking length: {len(decoder.thinking)} characters")
+    print(f"📊 Response length: {len(decoder.text)} characters")
+    if decoder.usage:
+        print(f"🔢 Token Usage: {decoder.usage.get('input_tokens', 0)} in / {decoder.usage.get('output_tokens', 0)} out")
     print("✅ Adaptive thinking streaming demo completed!")
 
 
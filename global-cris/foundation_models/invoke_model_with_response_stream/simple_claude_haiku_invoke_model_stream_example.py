@@ -7,12 +7,16 @@ Author: Navule Pavan Kumar Rao
 Date: November 20, 2025
 """
 
-import boto3
 import json
+import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Claude Haiku 4.5
 MODEL_ID = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
@@ -7,12 +7,17 @@ Author: Navule Pavan Kumar Rao
 Date: January 13, 2026
 """
 
-import boto3
 import json
+import os
+import sys
 from botocore.exceptions import ClientError
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+from stream_decoder import TEXT, StreamDecoder
+
 # Initialize Bedrock client for India region (Mumbai)
-bedrock = boto3.client("bedrock-runtime", region_name="ap-south-1")
+bedrock = get_client("bedrock-runtime", region="ap-south-1")
 
 # Global CRIS model ID for Amazon Nova 2 Lite
 MODEL_ID = "global.amazon.nova-2-lite-v1:0"
@@ -51,13 +56,11 @@ try:
     )
 
     # Extract and print the response text in real-time
-    complete_response = ""
-    for event in streaming_response["body"]:
-        chunk = json.loads(event["chunk"]["bytes"])
-        if "contentBlockDelta" in chunk:
-            text = chunk["contentBlockDelta"].get("delta", {}).get("text", "")
-            print(text, end="", flush=True)
-            complete_response += text
+    decoder = StreamDecoder()
+    for delta in decoder.iter_stream(streaming_response["body"]):
+        if delta.kind == TEXT:
+            print(delta.text, end="", flush=True)
+    complete_response = decoder.text
 
     print("\n" + "-" * 50)
     print("✅ InvokeModelWithResponseStream completed successfully!")
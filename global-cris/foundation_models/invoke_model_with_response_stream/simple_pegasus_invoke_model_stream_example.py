@@ -21,12 +21,13 @@ import os
 import tempfile
 import urllib.request
 
-import boto3
 from botocore.exceptions import ClientError
 from dotenv import load_dotenv
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from clients import get_client
+from stream_decoder import TEXT, StreamDecoder
 from utils import ensure_bedrock_bucket_access
 
 # Load environment variables from .env file
@@ -47,9 +48,9 @@ if not AWS_REGION:
         raise ValueError("AWS region is required")
 
 # Initialize AWS clients with consistent region
-bedrock = boto3.client("bedrock-runtime", region_name=AWS_REGION)
-s3 = boto3.client("s3", region_name=AWS_REGION)
-sts = boto3.client("sts", region_name=AWS_REGION)
+bedrock = get_client("bedrock-runtime", region=AWS_REGION)
+s3 = get_client("s3", region=AWS_REGION)
+sts = get_client("sts", region=AWS_REGION)
 
 # Global CRIS model ID for TwelveLabs Pegasus v1.2
 MODEL_ID = "global.twelvelabs.pegasus-1-2-v1:0"
@@ -156,17 +157,12 @@ try:
     )
 
     # Extract and print the response text in real-time
-    complete_response = ""
-    finish_reason = None
-    for event in streaming_response["body"]:
-        chunk = json.loads(event["chunk"]["bytes"])
-        # Handle different chunk types from Pegasus streaming
-        if "message" in chunk:
-            text = chunk["message"]
-            print(text, end="", flush=True)
-            complete_response += text
-        if "finishReason" in chunk:
-            finish_reason = chunk["finishReason"]
+    decoder = StreamDecoder()
+    for delta in decoder.iter_stream(streaming_response["body"]):
+        if delta.kind == TEXT:
+            print(delta.text, end="", flush=True)
+    complete_response = decoder.text
+    finish_reason = decoder.stop_reason
 
     print("\n" + "-" * 50)
     print("✅ InvokeModelWithResponseStream completed successfully!")
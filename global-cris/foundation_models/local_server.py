@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Amazon Bedrock runtime API, for offline benchmarking.
+
+Implements the four runtime operations used by the examples:
+
+- POST /model/{modelId}/converse
+- POST /model/{modelId}/converse-stream              (AWS event-stream framing)
+- POST /model/{modelId}/invoke
+- POST /model/{modelId}/invoke-with-response-stream  (AWS event-stream framing)
+
+InvokeModel responses use the native shape of the model family in the model
+ID: Anthropic Claude, Amazon Nova, Cohere Embed v4 or TwelveLabs Pegasus.
+Time to first token, tokens per second, throttling rate and error rate are
+configurable, and a fixed seed makes runs repeatable.
+
+Point the examples at it through the client factory:
+
+    python local_server.py --port 8787 --ttft-ms 300 --tokens-per-second 80
+    export BEDROCK_RUNTIME_ENDPOINT_URL=http://127.0.0.1:8787
+    export AWS_ACCESS_KEY_ID=local AWS_SECRET_ACCESS_KEY=local
+    python converse/simple_claude_haiku_converse_example.py
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import struct
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+DEFAULT_PORT = 8787
+
+_WORDS = (
+    "cloud", "region", "latency", "throughput", "model", "inference", "global",
+    "routing", "capacity", "token", "stream", "request", "profile", "quota",
+)
+
+
+@dataclass
+class StandInConfig:
+    """Behaviour of the stand-in server."""
+
+    ttft_ms: float = 200.0
+    tokens_per_second: float = 100.0
+    output_tokens: int = 100
+    throttle_rate: float = 0.0
+    error_rate: float = 0.0
+    seed: int | None = None
+
+
+# ---------------------------------------------------------------------------
+# AWS event-stream framing
+# ---------------------------------------------------------------------------
+
+
+def _encode_headers(headers: dict) -> bytes:
+    """Encode string-valued event-stream headers (header type 7)."""
+    encoded = b""
+    for name, value in headers.items():
+        name_bytes = name.encode("utf-8")
+        value_bytes = value.encode("utf-8")
+        encoded += struct.pack("B", len(name_bytes)) + name_bytes
+        encoded += struct.pack("!BH", 7, len(value_bytes)) + value_bytes
+    return encoded
+
+
+def encode_event(event_type: str, payload: dict) -> bytes:
+    """
+    Encode one AWS event-stream message.
+
+    Layout: total length, headers length, prelude CRC, headers, payload,
+    message CRC (all CRC32, big-endian).
+
+    Args:
+        event_type: Value of the :event-type header
+        payload: JSON payload of the event
+
+    Returns:
+        Encoded message bytes
+    """
+    headers = _encode_headers(
+        {
+            ":event-type": event_type,
+            ":content-type": "application/json",
+            ":message-type": "event",
+        }
+    )
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    total_length = 12 + len(headers) + len(body) + 4
+    prelude = struct.pack("!II", total_length, len(headers))
+    prelude += struct.pack("!I", zlib.crc32(prelude))
+    message = prelude + headers + body
+    return message + struct.pack("!I", zlib.crc32(message))
+
+
+# ---------------------------------------------------------------------------
+# Response shapes
+# ---------------------------------------------------------------------------
+
+
+def model_family(model_id: str) -> str:
+    """Map a model ID or profile ARN to a response family."""
+    if "cohere.embed" in model_id:
+        return "cohere_embed"
+    if "pegasus" in model_id:
+        return "pegasus"
+    if "nova" in model_id:
+        return "nova"
+    return "anthropic"
+
+
+def _estimate_input_tokens(body: bytes) -> int:
+    return max(1, len(body) // 4)
+
+
+def _generate_tokens(rng: random.Random, count: int) -> list:
+    return [(" " if i else "") + rng.choice(_WORDS) for i in range(count)]
+
+
+def _embedding(text: str, dimension: int) -> list:
+    """Deterministic pseudo-embedding derived from the text."""
+    rng = random.Random(hashlib.sha256(text.encode("utf-8")).digest())
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimension)]
+
+
+def _quantize(vector: list, embedding_type: str) -> list:
+    if embedding_type == "int8":
+        return [max(-128, min(127, round(v * 127))) for v in vector]
+    if embedding_type == "uint8":
+        return [max(0, min(255, round((v + 1) * 127.5))) for v in vector]
+    if embedding_type in ("binary", "ubinary"):
+        packed = []
+        for i in range(0, len(vector), 8):
+            byte = 0
+            for bit in vector[i:i + 8]:
+                byte = (byte << 1) | (1 if bit > 0 else 0)
+            packed.append(byte - 128 if embedding_type == "binary" else byte)
+        return packed
+    return vector
+
+
+def cohere_embed_response(request: dict) -> dict:
+    """Build a Cohere Embed v4 response for texts, images or inputs."""
+    items = list(request.get("texts") or [])
+    items += [f"image:{image[:64]}" for image in request.get("images") or []]
+    items += [json.dumps(item, sort_keys=True)[:256] for item in request.get("inputs") or []]
+    dimension = request.get("output_dimension", 1536)
+    types = request.get("embedding_types") or ["float"]
+
+    vectors = [_embedding(item, dimension) for item in items]
+    return {
+        "id": str(uuid.uuid4()),
+        "embeddings": {t: [_quantize(v, t) for v in vectors] for t in types},
+        "texts": list(request.get("texts") or []),
+        "response_type": "embeddings_by_type",
+    }
+
+
+def invoke_response(family: str, request: dict, tokens: list, input_tokens: int) -> dict:
+    """Build a non-streaming InvokeModel response body."""
+    text = "".join(tokens)
+    if family == "nova":
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": "end_turn",
+            "usage": {
+                "inputTokens": input_tokens,
+                "outputTokens": len(tokens),
+                "totalTokens": input_tokens + len(tokens),
+            },
+        }
+    if family == "pegasus":
+        return {"message": text, "finishReason": "stop"}
+
+    content = []
+    if request.get("thinking"):
+        content.append({"type": "thinking", "thinking": "Considering the question.", "signature": "local"})
+    content.append({"type": "text", "text": text})
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": "local-stand-in",
+        "content": content,
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": len(tokens)},
+    }
+
+
+def converse_response(tokens: list, input_tokens: int, latency_ms: int) -> dict:
+    """Build a Converse API response."""
+    return {
+        "output": {"message": {"role": "assistant", "content": [{"text": "".join(tokens)}]}},
+        "stopReason": "end_turn",
+        "usage": {
+            "inputTokens": input_tokens,
+            "outputTokens": len(tokens),
+            "totalTokens": input_tokens + len(tokens),
+        },
+        "metrics": {"latencyMs": latency_ms},
+    }
+
+
+def invoke_stream_chunks(family: str, request: dict, tokens: list, input_tokens: int):
+    """
+    Yield (is_token, chunk dict) pairs for InvokeModelWithResponseStream.
+
+    The final chunk carries amazon-bedrock-invocationMetrics like Bedrock does.
+    """
+    metrics = {"inputTokenCount": input_tokens, "outputTokenCount": len(tokens)}
+
+    if family == "nova":
+        yield False, {"messageStart": {"role": "assistant"}}
+        for token in tokens:
+            yield True, {"contentBlockDelta": {"delta": {"text": token}, "contentBlockIndex": 0}}
+        yield False, {"contentBlockStop": {"contentBlockIndex": 0}}
+        yield False, {"messageStop": {"stopReason": "end_turn"}}
+        yield False, {
+            "metadata": {"usage": {"inputTokens": input_tokens, "outputTokens": len(tokens)}},
+            "amazon-bedrock-invocationMetrics": metrics,
+        }
+        return
+
+    if family == "pegasus":
+        for token in tokens:
+            yield True, {"message": token}
+        yield False, {"finishReason": "stop", "amazon-bedrock-invocationMetrics": metrics}
+        return
+
+    yield False, {
+        "type": "message_start",
+        "message": {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": "local-stand-in",
+            "content": [],
+            "usage": {"input_tokens": input_tokens, "output_tokens": 1},
+        },
+    }
+    index = 0
+    if request.get("thinking"):
+        yield False, {"type": "content_block_start", "index": 0, "content_block": {"type": "thinking", "thinking": ""}}
+        yield True, {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": "Considering the question."}}
+        yield False, {"type": "content_block_stop", "index": 0}
+        index = 1
+    yield False, {"type": "content_block_start", "index": index, "content_block": {"type": "text", "text": ""}}
+    for token in tokens:
+        yield True, {"type": "content_block_delta", "index": index, "delta": {"type": "text_delta", "text": token}}
+    yield False, {"type": "content_block_stop", "index": index}
+    yield False, {
+        "type": "message_delta",
+        "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+        "usage": {"output_tokens": len(tokens)},
+    }
+    yield False, {"type": "message_stop", "amazon-bedrock-invocationMetrics": metrics}
+
+
+def converse_stream_events(tokens: list, input_tokens: int, latency_ms: int):
+    """Yield (is_token, event_type, payload) triples for ConverseStream."""
+    yield False, "messageStart", {"role": "assistant"}
+    for token in tokens:
+        yield True, "contentBlockDelta", {"contentBlockIndex": 0, "delta": {"text": token}}
+    yield False, "contentBlockStop", {"contentBlockIndex": 0}
+    yield False, "messageStop", {"stopReason": "end_turn"}
+    yield False, "metadata", {
+        "usage": {
+            "inputTokens": input_tokens,
+            "outputTokens": len(tokens),
+            "totalTokens": input_tokens + len(tokens),
+        },
+        "metrics": {"latencyMs": latency_ms},
+    }
+
+
+# ---------------------------------------------------------------------------
+# HTTP server
+# ---------------------------------------------------------------------------
+
+
+class BedrockStandInHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour comes from `self.server.config`."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; avoid Nagle / delayed-ACK stalls
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        # Keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status: int, code: str, message: str) -> None:
+        self._send_json(status, {"message": message}, {"x-amzn-ErrorType": f"{code}:http://internal.amazon.com/coral/com.amazon.bedrock/"})
+
+    def _start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.amazon.eventstream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _pace(self, is_token: bool, state: dict) -> None:
+        """Sleep until the next event is due: TTFT first, then 1/tokens_per_second."""
+        config = self.server.config
+        if not is_token:
+            return
+        if not state["first_sent"]:
+            state["first_sent"] = True
+            delay = state["start"] + config.ttft_ms / 1000 - time.perf_counter()
+        elif config.tokens_per_second > 0:
+            delay = 1 / config.tokens_per_second
+        else:
+            delay = 0
+        if delay > 0:
+            time.sleep(delay)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        config = self.server.config
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0))
+
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) != 3 or parts[0] != "model":
+            self._send_error(404, "UnknownOperationException", f"Unknown path {self.path}")
+            return
+        model_id, operation = unquote(parts[1]), parts[2]
+
+        with self.server.rng_lock:
+            roll = self.server.rng.random()
+            tokens = _generate_tokens(self.server.rng, config.output_tokens)
+        if roll < config.throttle_rate:
+            self._send_error(429, "ThrottlingException", "Too many requests, please wait before trying again.")
+            return
+        if roll < config.throttle_rate + config.error_rate:
+            self._send_error(503, "ServiceUnavailableException", "Service unavailable (injected by stand-in).")
+            return
+
+        try:
+            request = json.loads(body) if body else {}
+        except json.JSONDecodeError:
+            self._send_error(400, "ValidationException", "Malformed input request")
+            return
+
+        family = model_family(model_id)
+        input_tokens = _estimate_input_tokens(body)
+        full_latency = config.ttft_ms / 1000 + (
+            len(tokens) / config.tokens_per_second if config.tokens_per_second > 0 else 0
+        )
+        state = {"start": start, "first_sent": False}
+
+        if operation == "invoke":
+            if family == "cohere_embed":
+                time.sleep(config.ttft_ms / 1000)
+                payload = cohere_embed_response(request)
+                tokens = []
+            else:
+                time.sleep(full_latency)
+                payload = invoke_response(family, request, tokens, input_tokens)
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            self._send_json(
+                200,
+                payload,
+                {
+                    "x-amzn-bedrock-input-token-count": str(input_tokens),
+                    "x-amzn-bedrock-output-token-count": str(len(tokens)),
+                    "x-amzn-bedrock-invocation-latency": str(latency_ms),
+                },
+            )
+        elif operation == "converse":
+            time.sleep(full_latency)
+            latency_ms = int((time.perf_counter() - start) * 1000)
+            self._send_json(200, converse_response(tokens, input_tokens, latency_ms))
+        elif operation == "converse-stream":
+            self._start_stream()
+            latency_ms = int(full_latency * 1000)
+            for is_token, event_type, payload in converse_stream_events(tokens, input_tokens, latency_ms):
+                self._pace(is_token, state)
+                self._write_chunk(encode_event(event_type, payload))
+            self._end_stream()
+        elif operation == "invoke-with-response-stream":
+            self._start_stream()
+            for is_token, chunk in invoke_stream_chunks(family, request, tokens, input_tokens):
+                self._pace(is_token, state)
+                if "amazon-bedrock-invocationMetrics" in chunk:
+                    chunk["amazon-bedrock-invocationMetrics"]["invocationLatency"] = int((time.perf_counter() - start) * 1000)
+                    chunk["amazon-bedrock-invocationMetrics"]["firstByteLatency"] = int(config.ttft_ms)
+                encoded = base64.b64encode(json.dumps(chunk, separators=(",", ":")).encode("utf-8")).decode("ascii")
+                self._write_chunk(encode_event("chunk", {"bytes": encoded}))
+            self._end_stream()
+        else:
+            self._send_error(404, "UnknownOperationException", f"Unknown operation {operation}")
+
+
+def start_server(config: StandInConfig | None = None, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the stand-in server on a background thread.
+
+    Args:
+        config: Server behaviour, defaults to StandInConfig()
+        host: Interface to bind
+        port: Port to bind, 0 picks a free port
+
+    Returns:
+        (server, endpoint_url); call server.shutdown() to stop it
+    """
+    server = ThreadingHTTPServer((host, port), BedrockStandInHandler)
+    server.daemon_threads = True
+    server.config = config or StandInConfig()
+    server.rng = random.Random(server.config.seed)
+    server.rng_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Bedrock runtime stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="0 disables pacing")
+    parser.add_argument("--output-tokens", type=int, default=100)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with ThrottlingException")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with ServiceUnavailableException")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StandInConfig(
+        ttft_ms=args.ttft_ms,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    server, endpoint_url = start_server(config, args.host, args.port)
+    print(f"🧪 Bedrock runtime stand-in listening on {endpoint_url}")
+    print(f"   export BEDROCK_RUNTIME_ENDPOINT_URL={endpoint_url}")
+    print("   Press Ctrl+C to stop")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Latency instrumentation for the four Bedrock runtime API styles.
+
+Wraps converse, converse_stream, invoke_model and
+invoke_model_with_response_stream and records:
+
+- request duration (all APIs)
+- time to first token (TTFT): first content delta of a stream
+- inter-token latency: gaps between consecutive content deltas, kept raw and
+  as a bucketed histogram
+- total stream duration and output tokens per second
+
+Records are plain dataclasses that can be summarised per model ID (e.g. to
+compare a `global.` profile against a geographic one) or exported as JSONL.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import io
+import json
+import math
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+
+# Inter-token histogram bucket upper bounds in milliseconds
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+
+# Byte markers for content-bearing InvokeModelWithResponseStream chunks
+# (Claude and Nova respectively)
+_CONTENT_MARKERS = (b'"content_block_delta"', b'"contentBlockDelta"')
+# Pegasus chunks are {"message": ...} without a "type" field; Claude's
+# message_start chunk also has a "message" key, but always has "type"
+_PEGASUS_MARKER = b'"message"'
+_TYPE_FIELD = b'"type"'
+_INVOCATION_METRICS = b"amazon-bedrock-invocationMetrics"
+
+
+@dataclass
+class LatencyRecord:
+    """Timing for one Bedrock runtime call."""
+
+    api: str
+    model_id: str
+    started_at: float
+    duration_ms: float = 0.0
+    ttft_ms: float | None = None
+    inter_token_ms: list = field(default_factory=list)
+    input_tokens: int | None = None
+    output_tokens: int | None = None
+    server_latency_ms: int | None = None
+    error: str | None = None
+
+    @property
+    def output_tokens_per_second(self) -> float | None:
+        """Output tokens divided by total duration."""
+        if not self.output_tokens or not self.duration_ms:
+            return None
+        return self.output_tokens / (self.duration_ms / 1000)
+
+    def histogram(self) -> dict:
+        """Bucket inter-token gaps into HISTOGRAM_BUCKETS_MS."""
+        counts = dict.fromkeys(HISTOGRAM_BUCKETS_MS, 0)
+        for gap in self.inter_token_ms:
+            for bound in HISTOGRAM_BUCKETS_MS:
+                if gap <= bound:
+                    counts[bound] += 1
+                    break
+        return {("+Inf" if b == float("inf") else f"le_{b}ms"): c for b, c in counts.items()}
+
+    def to_dict(self, include_gaps: bool = False) -> dict:
+        """Export as a JSON-serialisable dict."""
+        record = asdict(self)
+        if not include_gaps:
+            record.pop("inter_token_ms")
+        record["output_tokens_per_second"] = self.output_tokens_per_second
+        record["inter_token_histogram"] = self.histogram()
+        return record
+
+
+def percentile(values: list, pct: float) -> float | None:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class LatencyRecorder:
+    """Thread-safe collector of LatencyRecord objects."""
+
+    def __init__(self, sink_path: str | None = None):
+        """
+        Args:
+            sink_path: Optional JSONL file each record is appended to
+        """
+        self.records = []
+        self.sink_path = sink_path
+        self._lock = threading.Lock()
+
+    def add(self, record: LatencyRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self.sink_path:
+                with open(self.sink_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record.to_dict()) + "\n")
+
+    def export_jsonl(self, path_or_file=None, include_gaps: bool = False) -> None:
+        """Write all records as JSONL to a path or file object (stdout by default)."""
+        out = path_or_file or sys.stdout
+        if isinstance(out, str):
+            with open(out, "w", encoding="utf-8") as f:
+                return self.export_jsonl(f, include_gaps)
+        for record in list(self.records):
+            out.write(json.dumps(record.to_dict(include_gaps)) + "\n")
+
+    def summary(self) -> dict:
+        """
+        Summarise records per (api, model_id).
+
+        Returns:
+            Dict keyed by "api model_id" with count, errors and p50/p95/p99
+            of duration, TTFT and inter-token latency
+        """
+        groups = {}
+        for record in list(self.records):
+            groups.setdefault(f"{record.api} {record.model_id}", []).append(record)
+
+        summary = {}
+        for key, records in groups.items():
+            ok = [r for r in records if r.error is None]
+            durations = [r.duration_ms for r in ok]
+            ttfts = [r.ttft_ms for r in ok if r.ttft_ms is not None]
+            gaps = [g for r in ok for g in r.inter_token_ms]
+            rates = [r.output_tokens_per_second for r in ok if r.output_tokens_per_second]
+            summary[key] = {
+                "count": len(records),
+                "errors": len(records) - len(ok),
+                "output_tokens_per_second_mean": sum(rates) / len(rates) if rates else None,
+            }
+            for name, values in (("duration_ms", durations), ("ttft_ms", ttfts), ("inter_token_ms", gaps)):
+                for pct in (50, 95, 99):
+                    summary[key][f"{name}_p{pct}"] = percentile(values, pct)
+        return summary
+
+
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def timed_converse(client, recorder: LatencyRecorder, **kwargs) -> dict:
+    """
+    Call converse() and record its duration and token usage.
+
+    Args:
+        client: Bedrock runtime client
+        recorder: LatencyRecorder receiving the record
+        **kwargs: converse() parameters
+
+    Returns:
+        The converse() response
+    """
+    record = LatencyRecord("converse", kwargs.get("modelId", ""), time.time())
+    start = time.perf_counter()
+    try:
+        response = client.converse(**kwargs)
+    except Exception as e:
+        record.error = type(e).__name__
+        record.duration_ms = _elapsed_ms(start)
+        recorder.add(record)
+        raise
+
+    record.duration_ms = _elapsed_ms(start)
+    usage = response.get("usage", {})
+    record.input_tokens = usage.get("inputTokens")
+    record.output_tokens = usage.get("outputTokens")
+    record.server_latency_ms = response.get("metrics", {}).get("latencyMs")
+    recorder.add(record)
+    return response
+
+
+def timed_invoke_model(client, recorder: LatencyRecorder, **kwargs) -> dict:
+    """
+    Call invoke_model(), read the body and record the duration.
+
+    The body is read inside the timed section and replaced with an in-memory
+    stream, so callers can still use `response["body"].read()`.
+
+    Args:
+        client: Bedrock runtime client
+        recorder: LatencyRecorder receiving the record
+        **kwargs: invoke_model() parameters
+
+    Returns:
+        The invoke_model() response
+    """
+    record = LatencyRecord("invoke_model", kwargs.get("modelId", ""), time.time())
+    start = time.perf_counter()
+    try:
+        response = client.invoke_model(**kwargs)
+        body = response["body"].read()
+    except Exception as e:
+        record.error = type(e).__name__
+        record.duration_ms = _elapsed_ms(start)
+        recorder.add(record)
+        raise
+
+    record.duration_ms = _elapsed_ms(start)
+    headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+    if "x-amzn-bedrock-input-token-count" in headers:
+        record.input_tokens = int(headers["x-amzn-bedrock-input-token-count"])
+    if "x-amzn-bedrock-output-token-count" in headers:
+        record.output_tokens = int(headers["x-amzn-bedrock-output-token-count"])
+    if "x-amzn-bedrock-invocation-latency" in headers:
+        record.server_latency_ms = int(headers["x-amzn-bedrock-invocation-latency"])
+    recorder.add(record)
+
+    response["body"] = io.BytesIO(body)
+    return response
+
+
+def is_content_chunk(raw: bytes) -> bool:
+    """True for InvokeModelWithResponseStream chunks that carry generated content."""
+    if _INVOCATION_METRICS in raw:
+        return False
+    if any(marker in raw for marker in _CONTENT_MARKERS):
+        return True
+    return _PEGASUS_MARKER in raw and _TYPE_FIELD not in raw
+
+
+def _timed_stream(events, record: LatencyRecord, recorder: LatencyRecorder, start: float, is_content, on_event):
+    """Yield stream events while recording TTFT and inter-token gaps."""
+    last = None
+    try:
+        for event in events:
+            if is_content(event):
+                now = time.perf_counter()
+                if last is None:
+                    record.ttft_ms = (now - start) * 1000
+                else:
+                    record.inter_token_ms.append((now - last) * 1000)
+                last = now
+            else:
+                on_event(event)
+            yield event
+    except Exception as e:
+        record.error = type(e).__name__
+        raise
+    finally:
+        record.duration_ms = _elapsed_ms(start)
+        recorder.add(record)
+
+
+def timed_converse_stream(client, recorder: LatencyRecorder, **kwargs):
+    """
+    Call converse_stream() and yield its events while recording latency.
+
+    The record is added once the stream is exhausted or closed.
+
+    Args:
+        client: Bedrock runtime client
+        recorder: LatencyRecorder receiving the record
+        **kwargs: converse_stream() parameters
+
+    Yields:
+        ConverseStream events, unchanged
+    """
+    record = LatencyRecord("converse_stream", kwargs.get("modelId", ""), time.time())
+    start = time.perf_counter()
+    try:
+        response = client.converse_stream(**kwargs)
+    except Exception as e:
+        record.error = type(e).__name__
+        record.duration_ms = _elapsed_ms(start)
+        recorder.add(record)
+        raise
+
+    def on_event(event):
+        if "metadata" in event:
+            usage = event["metadata"].get("usage", {})
+            record.input_tokens = usage.get("inputTokens")
+            record.output_tokens = usage.get("outputTokens")
+            record.server_latency_ms = event["metadata"].get("metrics", {}).get("latencyMs")
+
+    yield from _timed_stream(
+        response["stream"], record, recorder, start, lambda event: "contentBlockDelta" in event, on_event
+    )
+
+
+def timed_invoke_model_stream(client, recorder: LatencyRecorder, **kwargs):
+    """
+    Call invoke_model_with_response_stream() and yield its events while
+    recording latency.
+
+    Content chunks are detected with a byte search, so chunks are not parsed
+    twice. Token counts come from the amazon-bedrock-invocationMetrics block
+    in the final chunk.
+
+    Args:
+        client: Bedrock runtime client
+        recorder: LatencyRecorder receiving the record
+        **kwargs: invoke_model_with_response_stream() parameters
+
+    Yields:
+        Stream events, unchanged
+    """
+    record = LatencyRecord("invoke_model_with_response_stream", kwargs.get("modelId", ""), time.time())
+    start = time.perf_counter()
+    try:
+        response = client.invoke_model_with_response_stream(**kwargs)
+    except Exception as e:
+        record.error = type(e).__name__
+        record.duration_ms = _elapsed_ms(start)
+        recorder.add(record)
+        raise
+
+    def is_content(event):
+        return is_content_chunk(event.get("chunk", {}).get("bytes", b""))
+
+    def on_event(event):
+        raw = event.get("chunk", {}).get("bytes", b"")
+        if _INVOCATION_METRICS in raw:
+            metrics = json.loads(raw)[_INVOCATION_METRICS.decode()]
+            record.input_tokens = metrics.get("inputTokenCount")
+            record.output_tokens = metrics.get("outputTokenCount")
+            record.server_latency_ms = metrics.get("invocationLatency")
+
+    yield from _timed_stream(response["body"], record, recorder, start, is_content, on_event)
+
+
+if __name__ == "__main__":
+    from clients import get_client
+
+    bedrock = get_client("bedrock-runtime")
+    recorder = LatencyRecorder()
+    messages = [{"role": "user", "content": [{"text": "Explain cloud computing in 2 sentences."}]}]
+
+    try:
+        for model_id in (
+            "global.anthropic.claude-haiku-4-5-20251001-v1:0",
+            "global.anthropic.claude-sonnet-4-5-20250929-v1:0",
+        ):
+            print(f"⏱️  Measuring {model_id}...")
+            timed_converse(bedrock, recorder, modelId=model_id, messages=messages)
+            for _ in timed_converse_stream(bedrock, recorder, modelId=model_id, messages=messages):
+                pass
+
+        print("\n📊 Latency summary:")
+        for key, stats in recorder.summary().items():
+            print(f"\n🔹 {key}")
+            for name, value in stats.items():
+                if value is not None:
+                    print(f"   {name}: {value:.1f}" if isinstance(value, float) else f"   {name}: {value}")
+        print("\n📁 Records (JSONL):")
+        recorder.export_jsonl()
+    except Exception as e:
+        print(f"❌ Error: {e}")
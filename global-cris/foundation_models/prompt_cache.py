@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Prompt-cache checkpoint placement for Converse and Anthropic InvokeModel.
+
+Claude models on Bedrock can cache a request prefix, but only up to an
+explicit checkpoint: a `cachePoint` block (Converse) or a `cache_control`
+field (Anthropic InvokeModel). PromptCache places up to four checkpoints at
+the boundaries that stay stable across requests, in the order the prefix is
+built (tools, then system, then messages):
+
+- after the tool definitions
+- after the system prompt
+- after the previous user turn, which the last request cached
+- after the newest message, so the next turn can read the whole history
+
+A checkpoint is only placed when the prefix before it reaches the model's
+minimum cacheable length. Each checkpoint's prefix is hashed (checkpoint
+markers excluded), so the cache can predict whether a request will read
+from the cache and compare that with the realized cacheReadInputTokens /
+cacheWriteInputTokens per model.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import hashlib
+import io
+import json
+import threading
+import time
+
+from rate_limiter import estimate_tokens
+
+MAX_CACHE_POINTS = 4
+DEFAULT_TTL = 300
+
+# Minimum prefix tokens a checkpoint needs, by model ID fragment
+MIN_CACHEABLE_TOKENS = {
+    "claude-haiku-4-5": 4096,
+    "claude-opus-4-5": 4096,
+    "claude-opus-4-6": 4096,
+    "claude-3-5-haiku": 2048,
+}
+DEFAULT_MIN_CACHEABLE_TOKENS = 1024
+
+CONVERSE_CACHE_POINT = {"cachePoint": {"type": "default"}}
+ANTHROPIC_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def min_cacheable_tokens(model_id: str) -> int:
+    """Minimum prefix length (tokens) at which a checkpoint takes effect."""
+    for fragment, tokens in MIN_CACHEABLE_TOKENS.items():
+        if fragment in model_id:
+            return tokens
+    return DEFAULT_MIN_CACHEABLE_TOKENS
+
+
+def _strip_markers(value):
+    """Drop existing cachePoint blocks / cache_control fields before hashing."""
+    if isinstance(value, list):
+        return [_strip_markers(item) for item in value if not (isinstance(item, dict) and "cachePoint" in item)]
+    if isinstance(value, dict):
+        return {key: _strip_markers(item) for key, item in value.items() if key != "cache_control"}
+    return value
+
+
+class _Prefix:
+    """Running hash and token estimate of a request prefix."""
+
+    def __init__(self, model_id: str):
+        self._hash = hashlib.sha256(model_id.encode("utf-8"))
+        self.tokens = 0
+
+    def extend(self, part) -> None:
+        encoded = json.dumps(_strip_markers(part), sort_keys=True, separators=(",", ":"))
+        self._hash.update(encoded.encode("utf-8"))
+        self.tokens += estimate_tokens(encoded)
+
+    def digest(self) -> str:
+        return self._hash.copy().hexdigest()
+
+
+def _previous_user_turn(messages: list) -> int | None:
+    """Index of the last user message before the newest message."""
+    for i in range(len(messages) - 2, -1, -1):
+        if messages[i].get("role") == "user":
+            return i
+    return None
+
+
+class CachePlan:
+    """Checkpoints placed in one request and the predicted cache outcome."""
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.checkpoints = []  # (location, prefix hash, estimated prefix tokens)
+        self.predicted_read_tokens = 0
+
+    @property
+    def predicted_hit(self) -> bool:
+        return self.predicted_read_tokens > 0
+
+
+class PromptCache:
+    """Places cache checkpoints and tracks predicted vs. realized cache reads."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_cache_points: int = MAX_CACHE_POINTS, cache_tools: bool = True):
+        """
+        Args:
+            ttl: Seconds a cached prefix stays live after its last use
+            max_cache_points: Checkpoints per request (Bedrock allows 4)
+            cache_tools: Place a checkpoint after the tool definitions
+        """
+        self.ttl = ttl
+        self.max_cache_points = max_cache_points
+        self.cache_tools = cache_tools
+        self._live = {}  # prefix hash -> expiry (monotonic)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _plan(self, model_id: str, tools, system, messages: list) -> tuple:
+        """
+        Choose checkpoint locations.
+
+        Returns:
+            (CachePlan, list of locations) where a location is "tools",
+            "system" or a message index
+        """
+        plan = CachePlan(model_id)
+        minimum = min_cacheable_tokens(model_id)
+        prefix = _Prefix(model_id)
+        candidates = []
+
+        if tools:
+            prefix.extend(tools)
+            if self.cache_tools:
+                candidates.append(("tools", prefix.digest(), prefix.tokens))
+        if system:
+            prefix.extend(system)
+            candidates.append(("system", prefix.digest(), prefix.tokens))
+        targets = {_previous_user_turn(messages), len(messages) - 1} - {None}
+        for i, message in enumerate(messages):
+            prefix.extend(message)
+            if i in targets:
+                candidates.append((i, prefix.digest(), prefix.tokens))
+
+        candidates = [c for c in candidates if c[2] >= minimum]
+        # Over budget: keep the longest prefixes, which cover the shorter ones
+        plan.checkpoints = candidates[-self.max_cache_points:]
+
+        now = time.monotonic()
+        with self._lock:
+            for _, digest, tokens in plan.checkpoints:
+                if self._live.get(digest, 0) > now:
+                    plan.predicted_read_tokens = tokens
+        return plan, [location for location, _, _ in plan.checkpoints]
+
+    def prepare_converse(self, **kwargs) -> tuple:
+        """
+        Add cachePoint blocks to converse() / converse_stream() parameters.
+
+        The caller's system, toolConfig and messages are not modified.
+
+        Returns:
+            (kwargs with checkpoints, CachePlan)
+        """
+        kwargs = dict(kwargs)
+        tools = kwargs.get("toolConfig", {}).get("tools")
+        system = kwargs.get("system")
+        messages = list(kwargs.get("messages", []))
+        plan, locations = self._plan(kwargs.get("modelId", ""), tools, system, messages)
+
+        for location in locations:
+            if location == "tools":
+                kwargs["toolConfig"] = {**kwargs["toolConfig"], "tools": [*tools, CONVERSE_CACHE_POINT]}
+            elif location == "system":
+                kwargs["system"] = [*system, CONVERSE_CACHE_POINT]
+            else:
+                message = messages[location]
+                messages[location] = {**message, "content": [*message["content"], CONVERSE_CACHE_POINT]}
+        kwargs["messages"] = messages
+        return kwargs, plan
+
+    def prepare_invoke_model(self, **kwargs) -> tuple:
+        """
+        Add cache_control fields to an Anthropic invoke_model() body.
+
+        Accepts the body as a dict, str or bytes and returns it encoded.
+
+        Returns:
+            (kwargs with checkpoints, CachePlan)
+        """
+        kwargs = dict(kwargs)
+        body = kwargs.get("body", {})
+        body = dict(json.loads(body) if isinstance(body, (str, bytes)) else body)
+        tools = body.get("tools")
+        system = body.get("system")
+        if isinstance(system, str):
+            system = [{"type": "text", "text": system}]
+        messages = list(body.get("messages", []))
+        plan, locations = self._plan(kwargs.get("modelId", ""), tools, system, messages)
+
+        def mark(blocks: list) -> list:
+            return [*blocks[:-1], {**blocks[-1], "cache_control": ANTHROPIC_CACHE_CONTROL}]
+
+        for location in locations:
+            if location == "tools":
+                body["tools"] = mark(tools)
+            elif location == "system":
+                body["system"] = mark(system)
+            else:
+                message = messages[location]
+                content = message["content"]
+                if isinstance(content, str):
+                    content = [{"type": "text", "text": content}]
+                messages[location] = {**message, "content": mark(content)}
+        body["messages"] = messages
+        kwargs["body"] = json.dumps(body)
+        return kwargs, plan
+
+    def record(self, plan: CachePlan, input_tokens: int, cache_read_tokens: int, cache_write_tokens: int) -> None:
+        """
+        Record a request's realized usage and mark its prefixes as cached.
+
+        Args:
+            plan: CachePlan returned by prepare_converse / prepare_invoke_model
+            input_tokens: Uncached input tokens
+            cache_read_tokens: Input tokens read from the cache
+            cache_write_tokens: Input tokens written to the cache
+        """
+        with self._lock:
+            stats = self._stats.setdefault(
+                plan.model_id,
+                {
+                    "requests": 0,
+                    "predicted_hits": 0,
+                    "hits": 0,
+                    "correct_predictions": 0,
+                    "input_tokens": 0,
+                    "cache_read_tokens": 0,
+                    "cache_write_tokens": 0,
+                },
+            )
+            hit = cache_read_tokens > 0
+            stats["requests"] += 1
+            stats["predicted_hits"] += plan.predicted_hit
+            stats["hits"] += hit
+            stats["correct_predictions"] += plan.predicted_hit == hit
+            stats["input_tokens"] += input_tokens
+            stats["cache_read_tokens"] += cache_read_tokens
+            stats["cache_write_tokens"] += cache_write_tokens
+
+            if hit or cache_write_tokens:
+                # Reading or writing a prefix (re)starts its TTL
+                expiry = time.monotonic() + self.ttl
+                for _, digest, _ in plan.checkpoints:
+                    self._live[digest] = expiry
+            now = time.monotonic()
+            if len(self._live) > 10000:
+                self._live = {digest: expiry for digest, expiry in self._live.items() if expiry > now}
+
+    def record_converse_usage(self, plan: CachePlan, usage: dict) -> None:
+        """Record a Converse / ConverseStream `usage` block."""
+        self.record(
+            plan,
+            usage.get("inputTokens", 0),
+            usage.get("cacheReadInputTokens", 0),
+            usage.get("cacheWriteInputTokens", 0),
+        )
+
+    def record_anthropic_usage(self, plan: CachePlan, usage: dict) -> None:
+        """Record an Anthropic InvokeModel `usage` block."""
+        self.record(
+            plan,
+            usage.get("input_tokens", 0),
+            usage.get("cache_read_input_tokens", 0),
+            usage.get("cache_creation_input_tokens", 0),
+        )
+
+    def summary(self) -> dict:
+        """
+        Per-model cache statistics.
+
+        Returns:
+            Dict keyed by model ID with the counters plus
+            "cache_read_ratio" (cached share of all input tokens) and
+            "prediction_accuracy"
+        """
+        with self._lock:
+            summary = {}
+            for model_id, stats in self._stats.items():
+                total_input = stats["input_tokens"] + stats["cache_read_tokens"] + stats["cache_write_tokens"]
+                summary[model_id] = {
+                    **stats,
+                    "cache_read_ratio": stats["cache_read_tokens"] / total_input if total_input else 0.0,
+                    "prediction_accuracy": stats["correct_predictions"] / stats["requests"],
+                }
+            return summary
+
+
+def cached_converse(client, cache: PromptCache, **kwargs) -> dict:
+    """
+    Call converse() with cache checkpoints and record the cache usage.
+
+    Args:
+        client: Bedrock runtime client
+        cache: PromptCache placing checkpoints and collecting statistics
+        **kwargs: converse() parameters
+
+    Returns:
+        The converse() response
+    """
+    kwargs, plan = cache.prepare_converse(**kwargs)
+    response = client.converse(**kwargs)
+    cache.record_converse_usage(plan, response.get("usage", {}))
+    return response
+
+
+def cached_converse_stream(client, cache: PromptCache, **kwargs):
+    """
+    Call converse_stream() with cache checkpoints and yield its events.
+
+    Cache usage is recorded from the metadata event.
+
+    Yields:
+        ConverseStream events, unchanged
+    """
+    kwargs, plan = cache.prepare_converse(**kwargs)
+    response = client.converse_stream(**kwargs)
+    for event in response["stream"]:
+        if "metadata" in event:
+            cache.record_converse_usage(plan, event["metadata"].get("usage", {}))
+        yield event
+
+
+def cached_invoke_model(client, cache: PromptCache, **kwargs) -> dict:
+    """
+    Call invoke_model() on an Anthropic model with cache checkpoints.
+
+    The body is read to record the cache usage and replaced with an
+    in-memory stream, so callers can still use `response["body"].read()`.
+
+    Returns:
+        The invoke_model() response
+    """
+    kwargs, plan = cache.prepare_invoke_model(**kwargs)
+    response = client.invoke_model(**kwargs)
+    body = response["body"].read()
+    cache.record_anthropic_usage(plan, json.loads(body).get("usage", {}))
+    response["body"] = io.BytesIO(body)
+    return response
+
+
+if __name__ == "__main__":
+    from clients import get_client
+
+    bedrock = get_client("bedrock-runtime")
+    cache = PromptCache()
+    model_id = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
+
+    # A long, shared system prompt is the part worth caching
+    guidelines = "\n".join(
+        f"{i}. When reviewing architecture, check {topic} and explain the trade-offs in plain language."
+        for i, topic in enumerate(["availability", "cost", "security", "latency", "operability"] * 100, 1)
+    )
+    system = [{"text": f"You are a senior AWS solutions architect.\n{guidelines}"}]
+    questions = [
+        "Should a startup use Aurora Serverless or DynamoDB for a catalog service?",
+        "How would that choice change for 50,000 writes per second?",
+        "Summarize your recommendation in one sentence.",
+    ]
+
+    print(f"🧠 Prompt caching with {model_id}")
+    messages = []
+    try:
+        for question in questions:
+            messages.append({"role": "user", "content": [{"text": question}]})
+            kwargs, plan = cache.prepare_converse(
+                modelId=model_id, system=system, messages=messages, inferenceConfig={"maxTokens": 300}
+            )
+            response = bedrock.converse(**kwargs)
+            usage = response["usage"]
+            cache.record_converse_usage(plan, usage)
+            messages.append(response["output"]["message"])
+            print(f"💬 {question}")
+            print(f"   📍 Checkpoints: {[location for location, _, _ in plan.checkpoints]}, "
+                  f"predicted hit: {plan.predicted_hit}")
+            print(f"   🔢 input {usage.get('inputTokens')}, cache read {usage.get('cacheReadInputTokens', 0)}, "
+                  f"cache write {usage.get('cacheWriteInputTokens', 0)}")
+
+        print("\n📊 Cache summary:")
+        for key, stats in cache.summary().items():
+            print(f"🔹 {key}: read ratio {stats['cache_read_ratio']:.1%}, "
+                  f"prediction accuracy {stats['prediction_accuracy']:.0%}, hits {stats['hits']}/{stats['requests']}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
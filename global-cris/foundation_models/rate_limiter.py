@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Adaptive client-side rate limiting for Bedrock runtime calls.
+
+Combines, per model ID:
+
+- token buckets for requests per minute (RPM) and tokens per minute (TPM);
+  tokens are reserved from an estimate before the call and reconciled with
+  the real usage afterwards (usage.inputTokens / outputTokens for Converse,
+  x-amzn-bedrock-*-token-count headers for InvokeModel)
+- an AIMD concurrency limit: +1 slot per window of successful calls, halved
+  on ThrottlingException / ServiceUnavailableException; calls that fail for
+  any other reason neither grow nor shrink it
+- a permit always releases its slot, and a TPM reservation that was never
+  reconciled (the call raised, e.g. a ReadTimeout) is returned to the bucket
+
+Throttled calls are retried here with jittered backoff, so create the client
+with max_attempts=1 to keep botocore from retrying on top (retry storms).
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from botocore.exceptions import ClientError
+
+# Error codes that mean "slow down" rather than "request is wrong"
+THROTTLING_ERROR_CODES = {
+    "ThrottlingException",
+    "ServiceUnavailableException",
+    "TooManyRequestsException",
+    "ModelNotReadyException",
+}
+
+
+@dataclass
+class ModelQuota:
+    """Quota and concurrency bounds for one model ID."""
+
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+    # Requests allowed back to back, defaults to a full minute's worth
+    request_burst: float | None = None
+    initial_concurrency: int = 8
+    min_concurrency: int = 1
+    max_concurrency: int = 256
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at per_minute / 60 per second.
+
+    The level may go negative when actual usage exceeds the reservation;
+    later callers then wait for the debt to be repaid.
+    """
+
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.capacity = capacity or per_minute
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if available now)."""
+        self._refill()
+        # Requests larger than the bucket only need a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= amount
+
+    def give(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class _ModelLimiter:
+    """Buckets and AIMD state for one model ID (guarded by the parent lock)."""
+
+    def __init__(self, quota: ModelQuota):
+        self.quota = quota
+        self.rpm = TokenBucket(quota.requests_per_minute, quota.request_burst) if quota.requests_per_minute else None
+        self.tpm = TokenBucket(quota.tokens_per_minute) if quota.tokens_per_minute else None
+        self.limit = float(quota.initial_concurrency)
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.stats = {"requests": 0, "throttled": 0, "failed": 0, "input_tokens": 0, "output_tokens": 0}
+
+
+class Permit:
+    """Handle for one admitted call; report usage with record_usage()."""
+
+    def __init__(self, limiter: "RateLimiter", model_id: str, reserved_tokens: int):
+        self._limiter = limiter
+        self.model_id = model_id
+        self.reserved_tokens = reserved_tokens
+        self.throttled = False
+        self.failed = False
+        self._usage_recorded = False
+
+    def record_usage(self, input_tokens: int, output_tokens: int) -> None:
+        """Reconcile the TPM reservation with the real token usage."""
+        self._usage_recorded = True
+        self._limiter._reconcile(self.model_id, self.reserved_tokens, input_tokens, output_tokens)
+
+    def record_throttle(self) -> None:
+        """Mark the call as throttled so the concurrency limit backs off."""
+        self.throttled = True
+
+
+class RateLimiter:
+    """Thread-safe RPM / TPM / AIMD limiter keyed by model ID."""
+
+    def __init__(self, quotas: dict | None = None, default_quota: ModelQuota | None = None):
+        """
+        Args:
+            quotas: {model_id: ModelQuota}
+            default_quota: Quota for model IDs not in `quotas`
+        """
+        self._quotas = dict(quotas or {})
+        self._default_quota = default_quota or ModelQuota()
+        self._models = {}
+        self._cond = threading.Condition()
+
+    def _model(self, model_id: str) -> _ModelLimiter:
+        model = self._models.get(model_id)
+        if model is None:
+            model = _ModelLimiter(self._quotas.get(model_id, self._default_quota))
+            self._models[model_id] = model
+        return model
+
+    @contextmanager
+    def acquire(self, model_id: str, estimated_tokens: int = 0, timeout: float | None = None):
+        """
+        Wait for an RPM slot, a TPM reservation and a concurrency slot.
+
+        Args:
+            model_id: Model ID or inference profile ARN
+            estimated_tokens: Tokens to reserve (input estimate + max output)
+            timeout: Maximum seconds to wait, None waits forever
+
+        Yields:
+            Permit for the call
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            model = self._model(model_id)
+            while True:
+                wait = 0.0
+                if model.in_flight >= int(model.limit):
+                    wait = None  # Woken by release()
+                else:
+                    if model.rpm:
+                        wait = max(wait, model.rpm.wait_time(1))
+                    if model.tpm and estimated_tokens:
+                        wait = max(wait, model.tpm.wait_time(estimated_tokens))
+                    if wait == 0.0:
+                        break
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Rate limiter timed out waiting for {model_id}")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+            if model.rpm:
+                model.rpm.take(1)
+            if model.tpm and estimated_tokens:
+                model.tpm.take(estimated_tokens)
+            model.in_flight += 1
+            model.stats["requests"] += 1
+
+        permit = Permit(self, model_id, estimated_tokens)
+        try:
+            yield permit
+        except BaseException:
+            # Any exception leaving the block (ClientError, ReadTimeout, ...) is a failed call
+            permit.failed = True
+            raise
+        finally:
+            self._release(permit)
+
+    def _release(self, permit: Permit) -> None:
+        with self._cond:
+            model = self._model(permit.model_id)
+            model.in_flight -= 1
+            if not permit._usage_recorded and model.tpm and permit.reserved_tokens:
+                # The call never reported usage: return the whole reservation
+                model.tpm.give(permit.reserved_tokens)
+            quota = model.quota
+            if permit.throttled:
+                model.stats["throttled"] += 1
+                now = time.monotonic()
+                # One multiplicative decrease per burst of throttles
+                if now - model.last_decrease > 1.0:
+                    model.limit = max(quota.min_concurrency, model.limit / 2)
+                    model.last_decrease = now
+            elif permit.failed:
+                model.stats["failed"] += 1
+            else:
+                # Additive increase: about +1 slot per `limit` successful calls
+                model.limit = min(quota.max_concurrency, model.limit + 1 / model.limit)
+            self._cond.notify_all()
+
+    def _reconcile(self, model_id: str, reserved: int, input_tokens: int, output_tokens: int) -> None:
+        with self._cond:
+            model = self._model(model_id)
+            model.stats["input_tokens"] += input_tokens
+            model.stats["output_tokens"] += output_tokens
+            if model.tpm:
+                difference = reserved - (input_tokens + output_tokens)
+                if difference > 0:
+                    model.tpm.give(difference)
+                elif difference < 0:
+                    model.tpm.take(-difference)
+            self._cond.notify_all()
+
+    def snapshot(self) -> dict:
+        """Current concurrency limit, in-flight count and counters per model."""
+        with self._cond:
+            return {
+                model_id: {
+                    "concurrency_limit": round(model.limit, 2),
+                    "in_flight": model.in_flight,
+                    **model.stats,
+                }
+                for model_id, model in self._models.items()
+            }
+
+
+def estimate_tokens(payload) -> int:
+    """Rough token estimate (~4 characters per token) of a request payload."""
+    text = payload if isinstance(payload, (str, bytes)) else json.dumps(payload)
+    return max(1, len(text) // 4)
+
+
+def is_throttle(error: ClientError) -> bool:
+    """True if a ClientError is one of the Bedrock throttling error codes."""
+    return error.response.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def backoff(attempt: int, base: float = 0.5, cap: float = 20.0) -> None:
+    """Sleep for a full-jitter exponential backoff before retry `attempt` (0-based)."""
+    time.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))  # nosec B311 - jitter, not crypto
+
+
+def limited_converse(client, limiter: RateLimiter, max_retries: int = 6, **kwargs) -> dict:
+    """
+    Call converse() through the rate limiter, retrying throttled calls.
+
+    Args:
+        client: Bedrock runtime client (preferably with max_attempts=1)
+        limiter: RateLimiter instance
+        max_retries: Retries after throttling before giving up
+        **kwargs: converse() parameters
+
+    Returns:
+        The converse() response
+    """
+    model_id = kwargs["modelId"]
+    max_output = kwargs.get("inferenceConfig", {}).get("maxTokens", 1024)
+    estimated = estimate_tokens(kwargs.get("messages", [])) + estimate_tokens(kwargs.get("system", [])) + max_output
+
+    for attempt in range(max_retries + 1):
+        with limiter.acquire(model_id, estimated) as permit:
+            try:
+                response = client.converse(**kwargs)
+            except ClientError as e:
+                if not is_throttle(e):
+                    raise
+                permit.record_throttle()
+                if attempt == max_retries:
+                    raise
+            else:
+                usage = response.get("usage", {})
+                permit.record_usage(usage.get("inputTokens", 0), usage.get("outputTokens", 0))
+                return response
+        backoff(attempt)
+
+
+def limited_invoke_model(client, limiter: RateLimiter, max_output_tokens: int = 1024, max_retries: int = 6, **kwargs) -> dict:
+    """
+    Call invoke_model() through the rate limiter, retrying throttled calls.
+
+    Token usage is read from the x-amzn-bedrock-input/output-token-count
+    response headers, which Bedrock sets for every model family.
+
+    Args:
+        client: Bedrock runtime client (preferably with max_attempts=1)
+        limiter: RateLimiter instance
+        max_output_tokens: Output tokens to reserve up front
+        max_retries: Retries after throttling before giving up
+        **kwargs: invoke_model() parameters
+
+    Returns:
+        The invoke_model() response
+    """
+    model_id = kwargs["modelId"]
+    estimated = estimate_tokens(kwargs.get("body", "")) + max_output_tokens
+
+    for attempt in range(max_retries + 1):
+        with limiter.acquire(model_id, estimated) as permit:
+            try:
+                response = client.invoke_model(**kwargs)
+            except ClientError as e:
+                if not is_throttle(e):
+                    raise
+                permit.record_throttle()
+                if attempt == max_retries:
+                    raise
+            else:
+                headers = response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+                permit.record_usage(
+                    int(headers.get("x-amzn-bedrock-input-token-count", 0)),
+                    int(headers.get("x-amzn-bedrock-output-token-count", 0)),
+                )
+                return response
+        backoff(attempt)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    from clients import get_client
+
+    MODEL_ID = "global.anthropic.claude-haiku-4-5-20251001-v1:0"
+    bedrock = get_client("bedrock-runtime", max_attempts=1)
+    limiter = RateLimiter({MODEL_ID: ModelQuota(requests_per_minute=60, tokens_per_minute=50000)})
+
+    def ask(i):
+        return limited_converse(
+            bedrock,
+            limiter,
+            modelId=MODEL_ID,
+            messages=[{"role": "user", "content": [{"text": f"Give me fun fact #{i} about clouds."}]}],
+            inferenceConfig={"maxTokens": 100},
+        )
+
+    try:
+        print("🚦 Sending 20 requests through the adaptive rate limiter...")
+        with ThreadPoolExecutor(max_workers=20) as executor:
+            for response in executor.map(ask, range(20)):
+                print(f"   ✅ {response['usage']['outputTokens']} output tokens")
+        print("\n📊 Limiter state:")
+        for model_id, state in limiter.snapshot().items():
+            print(f"   {model_id}: {state}")
+    except Exception as e:
+        print(f"❌ Error: {e}")
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Exact-match response cache for deterministic Bedrock requests.
+
+Repeated prompts (FAQ-style traffic, demos re-running the same question)
+can be answered without calling the model. ResponseCache keys each request
+by a SHA-256 hash of its canonical JSON (API, modelId, messages, system,
+inferenceConfig and any other request fields, with sorted keys) and keeps
+the response in two tiers:
+
+- an in-memory LRU of the most recently used responses
+- an optional SQLite file shared across runs, bounded by total bytes
+
+Both tiers expire entries after a TTL. Only requests whose temperature is 0
+are cached; anything sampled at a higher temperature (including the
+model's default when none is given) bypasses the cache.
+
+Streaming responses are cached as their list of events and replayed as a
+synthetic event stream, so callers iterate a cache hit exactly like a live
+converse_stream() / invoke_model_with_response_stream() response.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import base64
+import hashlib
+import io
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from request_templates import dumps, loads
+
+DEFAULT_TTL = 3600
+DEFAULT_MEMORY_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Temperature assumed when a request does not set one (Claude and Nova default to 1)
+DEFAULT_TEMPERATURE = 1.0
+
+
+# Bytes (image and document blocks, redacted reasoning) are stored as {BYTES_TAG: base64}
+BYTES_TAG = "__bytes__"
+
+
+def _parse_body(body):
+    return loads(body) if isinstance(body, (str, bytes)) else body
+
+
+def _encode_bytes(value):
+    """json/orjson default hook: encode bytes as a tagged base64 object."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {BYTES_TAG: base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_bytes(value):
+    """Restore the bytes that _encode_bytes tagged."""
+    if isinstance(value, dict):
+        if len(value) == 1 and BYTES_TAG in value:
+            return base64.b64decode(value[BYTES_TAG])
+        return {name: _decode_bytes(item) for name, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_bytes(item) for item in value]
+    return value
+
+
+def _decode(encoded: bytes):
+    value = loads(encoded)
+    # Only walk the value when something was tagged; most responses are plain text
+    return _decode_bytes(value) if BYTES_TAG.encode("ascii") in encoded else value
+
+
+def request_key(api: str, **kwargs) -> bytes:
+    """
+    SHA-256 digest of a request's canonical JSON.
+
+    InvokeModel bodies are parsed first, so formatting differences in the
+    body do not produce different keys. Bytes (image and document blocks)
+    are hashed as their base64 encoding.
+    """
+    if "body" in kwargs:
+        kwargs = {**kwargs, "body": _parse_body(kwargs["body"])}
+    canonical = json.dumps(
+        {"api": api, **kwargs}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=_encode_bytes
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).digest()
+
+
+def request_temperature(**kwargs) -> float:
+    """Sampling temperature of a Converse or InvokeModel request."""
+    if "body" in kwargs:
+        body = _parse_body(kwargs["body"])
+        temperature = body.get("temperature", body.get("inferenceConfig", {}).get("temperature"))
+    else:
+        temperature = kwargs.get("inferenceConfig", {}).get("temperature")
+    return DEFAULT_TEMPERATURE if temperature is None else temperature
+
+
+class ResponseCache:
+    """Thread-safe two-tier (memory LRU + SQLite) response cache with TTL."""
+
+    def __init__(
+        self,
+        path: str | None = None,
+        ttl: float = DEFAULT_TTL,
+        max_memory_entries: int = DEFAULT_MEMORY_ENTRIES,
+        max_bytes: int | None = DEFAULT_MAX_BYTES,
+    ):
+        """
+        Args:
+            path: SQLite file for the disk tier, None for memory only
+            ttl: Seconds a response stays valid
+            max_memory_entries: Responses kept in the memory tier
+            max_bytes: Maximum total size of the disk tier
+        """
+        self.ttl = ttl
+        self.max_memory_entries = max_memory_entries
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()  # key -> (expires_at, value bytes)
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+
+        self._conn = None
+        self._bytes = 0
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def get(self, key: bytes) -> tuple:
+        """
+        Look a key up in memory, then on disk.
+
+        Returns:
+            (decoded value, "memory" | "disk") or (None, None) on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return _decode(entry[1]), "memory"
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM responses WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self._remember(key, row[1], row[0])
+                    self.stats["disk_hits"] += 1
+                    return _decode(row[0]), "disk"
+
+            self.stats["misses"] += 1
+            return None, None
+
+    def put(self, key: bytes, value) -> None:
+        """Store a JSON-serialisable value (bytes allowed) in both tiers."""
+        encoded = dumps(value, default=_encode_bytes)
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, encoded)
+            self.stats["writes"] += 1
+            if self._conn is None:
+                return
+            previous = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, expires_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), expires_at, now),
+            )
+            self._bytes += len(encoded) - (previous[0] if previous else 0)
+            self._evict(now)
+            self._conn.commit()
+
+    def _remember(self, key: bytes, expires_at: float, encoded: bytes) -> None:
+        """Insert into the memory LRU (caller holds the lock)."""
+        self._memory[key] = (expires_at, encoded)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones over max_bytes (caller holds the lock)."""
+        if self.max_bytes is None or self._bytes <= self.max_bytes:
+            return
+        expired = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at <= ?", (now,)
+        ).fetchone()
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self._bytes -= expired[1]
+        self.stats["evictions"] += expired[0]
+        while self._bytes > self.max_bytes:
+            victims = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used LIMIT 100").fetchall()
+            if not victims:
+                break
+            evicted = []
+            for key, size in victims:
+                if self._bytes <= self.max_bytes:
+                    break
+                evicted.append((key,))
+                self._bytes -= size
+            self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+            self.stats["evictions"] += len(evicted)
+
+    def bypass(self, **kwargs) -> bool:
+        """True (and counted) when a request is sampled and must not be cached."""
+        if request_temperature(**kwargs) > 0:
+            with self._lock:
+                self.stats["bypassed"] += 1
+            return True
+        return False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM responses")
+                self._conn.commit()
+            self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def _hit(tier: str | None, bypassed: bool = False) -> dict:
+    """response["responseCache"]: hit or miss, the tier that served it, and whether the cache was bypassed."""
+    return {"hit": tier is not None, "tier": tier, "bypassed": bypassed}
+
+
+def memoized_converse(client, cache: ResponseCache, **kwargs) -> dict:
+    """
+    converse() through the response cache.
+
+    Args:
+        client: Bedrock runtime client
+        cache: ResponseCache to read and fill
+        **kwargs: converse() parameters
+
+    Returns:
+        The converse() response; response["responseCache"] says whether it
+        was served from the cache, from which tier, and whether the request
+        bypassed the cache (temperature above 0)
+    """
+    if cache.bypass(**kwargs):
+        response = client.converse(**kwargs)
+        response["responseCache"] = _hit(None, bypassed=True)
+        return response
+    key = request_key("converse", **kwargs)
+    response, tier = cache.get(key)
+    if response is None:
+        response = client.converse(**kwargs)
+        cache.put(key, {name: value for name, value in response.items() if name != "ResponseMetadata"})
+    response["responseCache"] = _hit(tier)
+    return response
+
+
+def memoized_invoke_model(client, cache: ResponseCache, **kwargs) -> dict:
+    """
+    invoke_model() through the response cache.
+
+    Returns:
+        A response with an in-memory `body` stream and `contentType`, plus
+        response["responseCache"]
+    """
+    if cache.bypass(**kwargs):
+        response = client.invoke_model(**kwargs)
+        response["responseCache"] = _hit(None, bypassed=True)
+        return response
+    key = request_key("invoke_model", **kwargs)
+    cached, tier = cache.get(key)
+    if cached is None:
+        response = client.invoke_model(**kwargs)
+        body = response["body"].read()
+        cache.put(key, {"body": body.decode("utf-8"), "contentType": response.get("contentType")})
+        response["body"] = io.BytesIO(body)
+    else:
+        response = {"body": io.BytesIO(cached["body"].encode("utf-8")), "contentType": cached["contentType"]}
+    response["responseCache"] = _hit(tier)
+    return response
+
+
+def _recorded_stream(events, cache: ResponseCache, key: bytes, encode_event):
+    """Yield live events and cache them once the stream completes."""
+    recorded = []
+    for event in events:
+        recorded.append(encode_event(event))
+        yield event
+    cache.put(key, recorded)
+
+
+def memoized_converse_stream(client, cache: ResponseCache, **kwargs) -> dict:
+    """
+    converse_stream() through the response cache.
+
+    A miss streams from Bedrock and caches the events once the stream has
+    been read to the end; a hit replays the recorded events.
+
+    Returns:
+        {"stream": iterable of events, "responseCache": {...}}
+    """
+    if cache.bypass(**kwargs):
+        response = client.converse_stream(**kwargs)
+        response["responseCache"] = _hit(None, bypassed=True)
+        return response
+    key = request_key("converse_stream", **kwargs)
+    events, tier = cache.get(key)
+    if events is None:
+        stream = _recorded_stream(client.converse_stream(**kwargs)["stream"], cache, key, lambda event: event)
+    else:
+        stream = iter(events)
+    return {"stream": stream, "responseCache": _hit(tier)}
+
+
+def memoized_invoke_model_stream(client, cache: ResponseCache, **kwargs) -> dict:
+    """
+    invoke_model_with_response_stream() through the response cache.
+
+    Returns:
+        {"body": iterable of {"chunk": {"bytes": ...}} events, "responseCache": {...}}
+    """
+    if cache.bypass(**kwargs):
+        response = client.invoke_model_with_response_stream(**kwargs)
+        response["responseCache"] = _hit(None, bypassed=True)
+        return response
+    key = request_key("invoke_model_with_response_stream", **kwargs)
+    chunks, tier = cache.get(key)
+    if chunks is None:
+
+        def encode_event(event):
+            return event["chunk"]["bytes"].decode("utf-8") if "chunk" in event else None
+
+        response = client.invoke_model_with_response_stream(**kwargs)
+        body = _recorded_stream(response["body"], cache, key, encode_event)
+    else:
+        body = ({"chunk": {"bytes": chunk.encode("utf-8")}} for chunk in chunks if chunk is not None)
+    return {"body": body, "responseCache": _hit(tier)}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from clients import get_client
+
+    bedrock = get_client("bedrock-runtime")
+    cache = ResponseCache(os.path.join(tempfile.gettempdir(), "bedrock_response_cache.sqlite3"))
+    request = {
+        "modelId": "global.anthropic.claude-haiku-4-5-20251001-v1:0",
+        "messages": [{"role": "user", "content": [{"text": "What is Global cross-Region inference? One sentence."}]}],
+        "inferenceConfig": {"maxTokens": 200, "temperature": 0},
+    }
+
+    try:
+        print("🗄️  Exact-match response cache (temperature 0)")
+        for attempt in range(3):
+            start = time.perf_counter()
+            response = memoized_converse(bedrock, cache, **request)
+            source = response["responseCache"]["tier"] or "Bedrock"
+            print(f"   {attempt + 1}. {source:<8} {1000 * (time.perf_counter() - start):7.1f} ms")
+
+        print("\n🌊 Streaming the same question twice:")
+        for attempt in range(2):
+            response = memoized_converse_stream(bedrock, cache, **request)
+            text = "".join(
+                event["contentBlockDelta"]["delta"].get("text", "")
+                for event in response["stream"]
+                if "contentBlockDelta" in event
+            )
+            print(f"   {attempt + 1}. cache {response['responseCache']}: {text[:80]}")
+        print(f"\n📊 Hit rate: {cache.hit_rate:.0%}, stats: {cache.stats}")
+        cache.close()
+    except Exception as e:
+        print(f"❌ Error: {e}")
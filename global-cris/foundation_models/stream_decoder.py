@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Incremental decoder for InvokeModelWithResponseStream chunks.
+
+The streaming examples call json.loads() on every chunk before appending
+its text with `complete_response += text`, which allocates a full dict per
+token. StreamDecoder instead:
+
+- parses Anthropic `content_block_delta` chunks with a fast path that only
+  decodes the delta string, falling back to json.loads for everything else
+- dispatches on the event `type` (Anthropic) or top-level key (Nova, Pegasus)
+- appends text and thinking to str buffers that CPython resizes in place
+  (amortised O(1) per token) and returns them without a copy on read, so
+  peak memory matches the naive pattern instead of holding a byte buffer
+  and its decoded copy at once
+
+Run this file directly to compare dict allocations, peak memory and decode
+time for a 10k-token response.
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import json
+import time
+import tracemalloc
+from json.decoder import scanstring
+from typing import NamedTuple
+
+# Delta kinds yielded by the decoder
+TEXT = "text"
+THINKING = "thinking"
+BLOCK_START = "block_start"
+BLOCK_STOP = "block_stop"
+MESSAGE_START = "message_start"
+MESSAGE_DELTA = "message_delta"
+MESSAGE_STOP = "message_stop"
+OTHER = "other"
+
+# Compact prefixes Bedrock uses for Anthropic delta chunks
+_DELTA_PREFIX = '{"type":"content_block_delta","index":'
+_TEXT_DELTA = ',"delta":{"type":"text_delta","text":"'
+_THINKING_DELTA = ',"delta":{"type":"thinking_delta","thinking":"'
+
+
+class StreamDelta(NamedTuple):
+    """One decoded stream event."""
+
+    kind: str
+    text: str = ""
+    index: int = 0
+    data: dict | None = None
+
+
+def _fast_delta(raw: str) -> StreamDelta | None:
+    """
+    Decode a compact text/thinking content_block_delta without json.loads.
+
+    Returns None when the chunk does not have the exact expected layout, so
+    the caller can fall back to the full parser.
+    """
+    if not raw.startswith(_DELTA_PREFIX):
+        return None
+    start = len(_DELTA_PREFIX)
+    comma = raw.find(",", start)
+    if comma < 0 or not raw[start:comma].isdigit():
+        return None
+    index = int(raw[start:comma])
+
+    if raw.startswith(_TEXT_DELTA, comma):
+        kind, offset = TEXT, comma + len(_TEXT_DELTA)
+    elif raw.startswith(_THINKING_DELTA, comma):
+        kind, offset = THINKING, comma + len(_THINKING_DELTA)
+    else:
+        return None
+
+    text, end = scanstring(raw, offset)
+    if raw[end:] != "}}":
+        return None
+    return StreamDelta(kind, text, index)
+
+
+class StreamDecoder:
+    """
+    Decode streaming chunks into StreamDelta objects and buffer the output.
+
+    Works with Anthropic Claude, Amazon Nova and TwelveLabs Pegasus chunks.
+    """
+
+    def __init__(self):
+        self._text = ""
+        self._thinking = ""
+        self.block_types = []
+        self.usage = {}
+        self.stop_reason = None
+        # Chunks handled by the fast path vs. full json.loads
+        self.fast_path_chunks = 0
+        self.parsed_chunks = 0
+
+    @property
+    def text(self) -> str:
+        """Complete response text received so far."""
+        return self._text
+
+    @property
+    def thinking(self) -> str:
+        """Complete thinking text received so far."""
+        return self._thinking
+
+    def decode(self, raw: bytes) -> StreamDelta:
+        """
+        Decode one chunk payload and record it in the buffers.
+
+        Args:
+            raw: The `event["chunk"]["bytes"]` payload
+
+        Returns:
+            StreamDelta describing the chunk
+        """
+        raw = raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else raw
+        delta = _fast_delta(raw)
+        if delta is None:
+            self.parsed_chunks += 1
+            delta = self._decode_slow(json.loads(raw))
+        else:
+            self.fast_path_chunks += 1
+
+        # Detach each buffer before appending: a str whose only reference is a
+        # local is resized in place by CPython rather than copied
+        if delta.kind == TEXT:
+            text, self._text = self._text, ""
+            text += delta.text
+            self._text = text
+        elif delta.kind == THINKING:
+            thinking, self._thinking = self._thinking, ""
+            thinking += delta.text
+            self._thinking = thinking
+        return delta
+
+    def _decode_slow(self, chunk: dict) -> StreamDelta:
+        """Dispatch a fully parsed chunk on its event type."""
+        event_type = chunk.get("type")
+
+        # Anthropic Claude events
+        if event_type == "content_block_delta":
+            delta = chunk.get("delta", {})
+            index = chunk.get("index", 0)
+            if delta.get("type") == "text_delta":
+                return StreamDelta(TEXT, delta.get("text", ""), index)
+            if delta.get("type") == "thinking_delta":
+                return StreamDelta(THINKING, delta.get("thinking", ""), index)
+            return StreamDelta(OTHER, index=index, data=chunk)
+        if event_type == "content_block_start":
+            block = chunk.get("content_block", {})
+            self.block_types.append(block.get("type"))
+            return StreamDelta(BLOCK_START, index=chunk.get("index", 0), data=block)
+        if event_type == "content_block_stop":
+            return StreamDelta(BLOCK_STOP, index=chunk.get("index", 0))
+        if event_type == "message_start":
+            self.usage.update(chunk.get("message", {}).get("usage", {}))
+            return StreamDelta(MESSAGE_START, data=chunk.get("message"))
+        if event_type == "message_delta":
+            self.usage.update(chunk.get("usage", {}))
+            self.stop_reason = chunk.get("delta", {}).get("stop_reason", self.stop_reason)
+            return StreamDelta(MESSAGE_DELTA, data=chunk)
+        if event_type == "message_stop":
+            return StreamDelta(MESSAGE_STOP, data=chunk)
+
+        # Amazon Nova events
+        if "contentBlockDelta" in chunk:
+            block_delta = chunk["contentBlockDelta"]
+            delta = block_delta.get("delta", {})
+            index = block_delta.get("contentBlockIndex", 0)
+            if "reasoningContent" in delta:
+                return StreamDelta(THINKING, delta["reasoningContent"].get("text", ""), index)
+            return StreamDelta(TEXT, delta.get("text", ""), index)
+        if "messageStop" in chunk:
+            self.stop_reason = chunk["messageStop"].get("stopReason")
+            return StreamDelta(MESSAGE_STOP, data=chunk)
+        if "metadata" in chunk:
+            self.usage.update(chunk["metadata"].get("usage", {}))
+            return StreamDelta(MESSAGE_DELTA, data=chunk)
+
+        # TwelveLabs Pegasus events
+        if "message" in chunk or "finishReason" in chunk:
+            if "finishReason" in chunk:
+                self.stop_reason = chunk["finishReason"]
+            return StreamDelta(TEXT, chunk.get("message", ""), data=chunk)
+
+        return StreamDelta(OTHER, data=chunk)
+
+    def iter_stream(self, body):
+        """
+        Decode every chunk of an InvokeModelWithResponseStream body.
+
+        Args:
+            body: `response["body"]` event stream
+
+        Yields:
+            StreamDelta objects
+        """
+        for event in body:
+            if "chunk" in event:
+                yield self.decode(event["chunk"]["bytes"])
+
+
+def _synthetic_stream(tokens: int, thinking_tokens: int) -> list:
+    """Build Anthropic-style chunk payloads for the benchmark."""
+    chunks = [b'{"type":"message_start","message":{"usage":{"input_tokens":42}}}']
+    chunks.append(b'{"type":"content_block_start","index":0,"content_block":{"type":"thinking","thinking":""}}')
+    for i in range(thinking_tokens):
+        payload = {"type": "content_block_delta", "index": 0, "delta": {"type": "thinking_delta", "thinking": f" step{i}"}}
+        chunks.append(json.dumps(payload, separators=(",", ":")).encode())
+    chunks.append(b'{"type":"content_block_start","index":1,"content_block":{"type":"text","text":""}}')
+    for i in range(tokens):
+        payload = {"type": "content_block_delta", "index": 1, "delta": {"type": "text_delta", "text": f" word{i}"}}
+        chunks.append(json.dumps(payload, separators=(",", ":")).encode())
+    chunks.append(b'{"type":"message_delta","delta":{"stop_reason":"end_turn"},"usage":{"output_tokens":10000}}')
+    chunks.append(b'{"type":"message_stop"}')
+    return chunks
+
+
+def _decode_naive(chunks: list) -> tuple:
+    """The pattern used by the original examples."""
+    thinking_content = ""
+    text_content = ""
+    for raw in chunks:
+        chunk = json.loads(raw)
+        if chunk["type"] == "content_block_delta":
+            delta = chunk.get("delta", {})
+            if delta.get("type") == "thinking_delta":
+                thinking_content += delta.get("thinking", "")
+            elif delta.get("type") == "text_delta":
+                text_content += delta.get("text", "")
+    return (thinking_content, text_content), len(chunks)
+
+
+def _decode_buffered(chunks: list) -> tuple:
+    decoder = StreamDecoder()
+    for raw in chunks:
+        decoder.decode(raw)
+    return (decoder.thinking, decoder.text), decoder.parsed_chunks
+
+
+def benchmark(tokens: int = 10000, thinking_tokens: int = 10000) -> dict:
+    """
+    Compare the original decoding pattern with StreamDecoder.
+
+    Args:
+        tokens: Number of text delta chunks
+        thinking_tokens: Number of thinking delta chunks
+
+    Returns:
+        Dict of {name: {"parsed_chunks", "peak_bytes", "seconds"}}, where
+        parsed_chunks is the number of chunks decoded into a full dict
+    """
+    chunks = _synthetic_stream(tokens, thinking_tokens)
+    results = {}
+    outputs = []
+    for name, func in (("naive", _decode_naive), ("stream_decoder", _decode_buffered)):
+        start = time.perf_counter()
+        output, parsed_chunks = func(chunks)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        func(chunks)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        outputs.append(output)
+        results[name] = {"parsed_chunks": parsed_chunks, "peak_bytes": peak, "seconds": elapsed}
+
+    assert outputs[0] == outputs[1], "decoders disagree"
+    return results
+
+
+if __name__ == "__main__":
+    print("📊 Stream decoding benchmark: 10k thinking + 10k text delta chunks")
+    print("-" * 50)
+    for name, stats in benchmark().items():
+        print(f"🔹 {name}")
+        print(f"   Chunks parsed into dicts: {stats['parsed_chunks']}")
+        print(f"   Peak allocated memory: {stats['peak_bytes'] / 1024:.1f} KiB")
+        print(f"   Decode time: {stats['seconds'] * 1000:.1f} ms")
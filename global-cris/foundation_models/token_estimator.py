@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Client-side input token estimation, calibrated against returned usage.
+
+The real input token count is only known after a call. Knowing it before
+the call lets a client pick max_tokens so the request fits the context
+window, route short prompts to a faster model, and compact a conversation
+before it overflows instead of wasting a round trip.
+
+- TokenEstimator turns a request (dict, str or encoded bytes) into a token
+  estimate from its length, scaled by a per-model ratio that is updated
+  (exponential moving average) from every usage.input_tokens seen
+- ConversationTokens anchors on the last real count of a conversation, so
+  only the bytes added since then are estimated
+- choose_max_tokens(), choose_model() and should_compact() turn an
+  estimate into request settings
+
+Author: Navule Pavan Kumar Rao
+Date: October 16, 2026
+"""
+
+import threading
+
+from request_templates import dumps
+
+# Uncalibrated ratio: ~4 bytes of encoded request per token
+BYTES_PER_TOKEN = 4.0
+DEFAULT_ALPHA = 0.2
+DEFAULT_CONTEXT_WINDOW = 200000
+
+# Route by estimated input tokens: the first entry whose limit is not exceeded wins
+DEFAULT_ROUTES = (
+    (8000, "global.anthropic.claude-haiku-4-5-20251001-v1:0"),
+    (64000, "global.anthropic.claude-sonnet-4-5-20250929-v1:0"),
+    (float("inf"), "global.anthropic.claude-opus-4-6-v1"),
+)
+
+
+def _size(payload) -> int:
+    """Encoded size in bytes of a request body, message list or text."""
+    if isinstance(payload, bytes):
+        return len(payload)
+    if isinstance(payload, str):
+        return len(payload.encode("utf-8"))
+    return len(dumps(payload))
+
+
+def usage_input_tokens(usage: dict) -> int:
+    """Total input tokens (uncached + cache read + cache write) of a Converse or Anthropic usage block."""
+    if "inputTokens" in usage:
+        return usage["inputTokens"] + usage.get("cacheReadInputTokens", 0) + usage.get("cacheWriteInputTokens", 0)
+    return (
+        usage.get("input_tokens", 0)
+        + usage.get("cache_read_input_tokens", 0)
+        + usage.get("cache_creation_input_tokens", 0)
+    )
+
+
+class TokenEstimator:
+    """Thread-safe, per-model calibrated token estimates."""
+
+    def __init__(self, bytes_per_token: float = BYTES_PER_TOKEN, alpha: float = DEFAULT_ALPHA):
+        """
+        Args:
+            bytes_per_token: Starting ratio before any usage is observed
+            alpha: Weight of each new observation in the moving average
+        """
+        self.bytes_per_token = bytes_per_token
+        self.alpha = alpha
+        self._ratios = {}  # model ID -> actual tokens / uncalibrated estimate
+        self._errors = {}  # model ID -> [observations, sum of absolute relative error]
+        self._lock = threading.Lock()
+
+    def ratio(self, model_id: str) -> float:
+        with self._lock:
+            return self._ratios.get(model_id, 1.0)
+
+    def tokens_for_size(self, model_id: str, size: int) -> int:
+        """Calibrated estimate for `size` encoded bytes."""
+        return round(size / self.bytes_per_token * self.ratio(model_id))
+
+    def estimate(self, model_id: str, payload) -> int:
+        """
+        Estimate the input tokens of a request.
+
+        Args:
+            model_id: Model the request is for
+            payload: InvokeModel body, Converse messages/system, or text
+
+        Returns:
+            Estimated input tokens
+        """
+        return self.tokens_for_size(model_id, _size(payload))
+
+    def calibrate(self, model_id: str, payload, input_tokens: int) -> None:
+        """Update the model's ratio from the real input token count of a request."""
+        self.calibrate_size(model_id, _size(payload), input_tokens)
+
+    def calibrate_size(self, model_id: str, size: int, input_tokens: int) -> None:
+        """calibrate() for a request whose encoded size is already known."""
+        raw = size / self.bytes_per_token
+        if raw <= 0 or input_tokens <= 0:
+            return
+        with self._lock:
+            previous = self._ratios.get(model_id)
+            observed = input_tokens / raw
+            errors = self._errors.setdefault(model_id, [0, 0.0])
+            errors[0] += 1
+            errors[1] += abs(raw * (previous or 1.0) - input_tokens) / input_tokens
+            self._ratios[model_id] = observed if previous is None else previous + self.alpha * (observed - previous)
+
+    def summary(self) -> dict:
+        """Per model: calibrated ratio, observations and mean absolute relative error of the estimates."""
+        with self._lock:
+            return {
+                model_id: {
+                    "ratio": round(self._ratios[model_id], 4),
+                    "observations": count,
+                    "mean_abs_error": total / count,
+                }
+                for model_id, (count, total) in self._errors.items()
+            }
+
+
+class ConversationTokens:
+    """Running input token count of one conversation."""
+
+    def __init__(self, estimator: TokenEstimator, model_id: str):
+        self.estimator = estimator
+        self.model_id = model_id
+        self._anchor_size = 0
+        self._anchor_tokens = 0
+
+    def estimate(self, body) -> int:
+        """
+        Estimate the input tokens of the conversation's next request.
+
+        The last reported count is exact; only bytes added since are estimated.
+        """
+        size = _size(body)
+        if not self._anchor_tokens or size < self._anchor_size:
+            return self.estimator.tokens_for_size(self.model_id, size)
+        return self._anchor_tokens + self.estimator.tokens_for_size(self.model_id, size - self._anchor_size)
+
+    def record(self, body, usage: dict) -> None:
+        """Calibrate with a response's usage and anchor on its real count."""
+        size = _size(body)
+        input_tokens = usage_input_tokens(usage)
+        self.estimator.calibrate_size(self.model_id, size, input_tokens)
+        self._anchor_size, self._anchor_tokens = size, input_tokens
+
+    def reset(self) -> None:
+        """Forget the anchor, e.g. after the conversation was compacted."""
+        self._anchor_size = self._anchor_tokens = 0
+
+
+def choose_max_tokens(
+    input_tokens: int,
+    desired: int = 4096,
+    context_window: int = DEFAULT_CONTEXT_WINDOW,
+    margin: float = 0.05,
+    minimum: int = 256,
+) -> int:
+    """
+    Largest max_tokens up to `desired` that keeps the request inside the context window.
+
+    Args:
+        input_tokens: Estimated input tokens
+        desired: max_tokens wanted when there is room
+        context_window: Model context window
+        margin: Share of the window held back for estimation error
+        minimum: Smallest useful answer; with less room than this, 0 is returned
+
+    Returns:
+        max_tokens to send, or 0 when fewer than `minimum` tokens are left
+        (compact or trim the conversation before sending)
+    """
+    room = int(context_window * (1 - margin)) - input_tokens
+    return min(desired, room) if room >= minimum else 0
+
+
+def choose_model(input_tokens: int, routes=DEFAULT_ROUTES) -> str:
+    """Model ID of the first route whose input token limit covers the estimate."""
+    for limit, model_id in routes:
+        if input_tokens <= limit:
+            return model_id
+    return routes[-1][1]
+
+
+def should_compact(input_tokens: int, trigger: int, headroom: float = 0.9) -> bool:
+    """True once the estimate reaches `headroom` of a compaction trigger."""
+    return input_tokens >= trigger * headroom
+
+
+if __name__ == "__main__":
+    import random
+
+    rng = random.Random(0)
+    estimator = TokenEstimator()
+    model_id = "global.anthropic.claude-opus-4-6-v1"
+    conversation = ConversationTokens(estimator, model_id)
+    words = ["throughput", "region", "inference", "profile", "quota", "latency", "é", "数据", "{", "}"]
+
+    # Simulated usage: the model's tokenizer yields ~1 token per 3.3 bytes, varying per message
+    def simulated_tokens(message: dict) -> int:
+        return round(len(dumps(message)) / 3.3 * rng.uniform(0.85, 1.15))
+
+    trigger = 50000
+    messages = []
+    actual = 20  # real input tokens of the conversation so far
+    print(f"🧮 Calibrating the estimator for {model_id} on a simulated conversation")
+    for turn in range(1, 13):
+        message = {"role": "user", "content": " ".join(rng.choice(words) for _ in range(rng.randint(500, 5000)))}
+        messages.append(message)
+        actual += simulated_tokens(message)
+        body = dumps({"anthropic_version": "bedrock-2023-05-31", "max_tokens": 4096, "messages": messages})
+        estimate = conversation.estimate(body)
+        compact = should_compact(estimate, trigger)
+        print(f"   Turn {turn:>2}: estimate {estimate:>6}, actual {actual:>6} "
+              f"({100 * (estimate - actual) / actual:+5.1f}%), max_tokens {choose_max_tokens(estimate)}, "
+              f"route {choose_model(estimate).split('.')[2]}" + (", compacting" if compact else ""))
+        conversation.record(body, {"input_tokens": actual})
+
+        if compact:
+            # Simulated compaction: the history is replaced by a short summary, so the anchor no longer applies
+            messages = [{"role": "user", "content": "Summary of the conversation so far: " + "quota latency " * 200}]
+            actual = 20 + simulated_tokens(messages[0])
+            conversation.reset()
+        else:
+            reply = {"role": "assistant", "content": "ok " * rng.randint(50, 500)}
+            messages.append(reply)
+            actual += simulated_tokens(reply)
+    print(f"📊 {estimator.summary()}")